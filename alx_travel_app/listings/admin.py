@@ -1,11 +1,18 @@
 from django.contrib import admin
-from .models import Listing, Booking, Review, Payment
+from .models import (
+    Listing, ListingRate, Booking, Review, Payment, ChapaWebhookEvent, OutboundEmail,
+)
+
+class ListingRateInline(admin.TabularInline):
+    model = ListingRate
+    extra = 0
 
 @admin.register(Listing)
 class ListingAdmin(admin.ModelAdmin):
-    list_display = ('name', 'location', 'price_per_night', 'host', 'created_at')
+    list_display = ('name', 'location', 'price_per_night', 'avg_rating', 'review_count', 'host', 'created_at')
     search_fields = ('name', 'location', 'description')
     list_filter = ('created_at', 'location')
+    inlines = [ListingRateInline]
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -24,3 +31,22 @@ class PaymentAdmin(admin.ModelAdmin):
     list_display = ('booking', 'amount', 'currency', 'status', 'created_at')
     search_fields = ('booking__property__name', 'chapa_transaction_ref')
     list_filter = ('status', 'currency', 'created_at')
+
+@admin.register(ChapaWebhookEvent)
+class ChapaWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ('event', 'tx_ref', 'received_at')
+    search_fields = ('tx_ref',)
+    list_filter = ('event', 'received_at')
+    readonly_fields = ('event', 'tx_ref', 'payload', 'received_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    search_fields = ('subject', 'to')
+    list_filter = ('status', 'created_at')
@@ -0,0 +1,162 @@
+"""
+Async versions of the endpoints that mostly wait: payment verify and
+initialize, which wait on Chapa, and the availability and quote reads.
+
+Served in place of the DRF actions on the same URLs when ``ASYNC_VIEWS``
+is on, for ASGI deployments. DRF 3.14 has no async views, so these are
+plain Django async views that reuse DRF's authentication classes,
+serializers and error bodies, and answer exactly as the actions do.
+
+Chapa is called through ``chapa.get_async_client()``, so a request waiting
+on Chapa holds no thread and one worker can have many in flight. Django
+4.2 still runs database queries synchronously; they go through
+``sync_to_async``, so a read holds a thread for the length of its queries
+only.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import path, re_path
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import chapa, payments, views
+from .models import Payment
+from .serializers import DateRangeQuerySerializer, PaymentInitializeSerializer, PaymentSerializer
+
+
+def _json(data, status=status.HTTP_200_OK, headers=None):
+    return JsonResponse(data, encoder=JSONEncoder, safe=False, status=status, headers=headers)
+
+
+def _error(request, exc):
+    """The response ``APIView.handle_exception`` would give for ``exc``"""
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        challenge = request.authenticators[0].authenticate_header(request)
+        if challenge:
+            headers = {'WWW-Authenticate': challenge}
+        else:
+            exc.status_code = status.HTTP_403_FORBIDDEN
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return _json(data, status=exc.status_code, headers=headers)
+
+
+def api_view(methods, authenticated=True):
+    """
+    Wrap an async view taking a DRF ``Request``; with ``authenticated``,
+    anonymous users are refused as ``IsAuthenticated`` would.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request = Request(
+                request,
+                parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+                authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+            )
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                if authenticated:
+                    # Session lookups and the CSRF check run here
+                    user = await sync_to_async(lambda: request.user)()
+                    if not user.is_authenticated:
+                        raise exceptions.NotAuthenticated()
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as e:
+                return _error(request, e)
+
+        # As with DRF, SessionAuthentication checks CSRF for session users
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+async def _payment(request, pk):
+    """The payment, if the user may see it, as ``PaymentViewSet.get_object``"""
+    queryset = Payment.objects.select_related('booking__user')
+    if not request.user.is_staff:
+        queryset = queryset.filter(booking__user=request.user)
+    try:
+        return await queryset.aget(pk=pk)
+    except Payment.DoesNotExist:
+        raise exceptions.NotFound()
+
+
+@api_view(['GET'])
+async def verify(request, pk):
+    """``PaymentViewSet.verify``"""
+    payment = await _payment(request, pk)
+    try:
+        response = await chapa.get_async_client().verify(payment.id)
+        await sync_to_async(views.record_verification)(payment, response)
+    except chapa.ChapaUnavailable as e:
+        return _json({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception as e:
+        return _json({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return _json(PaymentSerializer(payment).data)
+
+
+@api_view(['POST'])
+async def initialize(request, pk):
+    """``PaymentViewSet.initialize``"""
+    options = PaymentInitializeSerializer(data=request.data)
+    # Checking notify_url resolves its host, which blocks
+    await sync_to_async(options.is_valid)(raise_exception=True)
+
+    payment = await _payment(request, pk)
+    callback_url, return_url = await sync_to_async(views.start_initialization)(request, payment)
+
+    if settings.CHAPA_INITIALIZE_ASYNC:
+        data = await sync_to_async(views.queue_initialization)(
+            request, payment, callback_url, return_url, options.validated_data.get('notify_url')
+        )
+        return _json(data, status=status.HTTP_202_ACCEPTED)
+
+    try:
+        await payments.ainitialize_payment(payment, callback_url, return_url)
+        return _json(await sync_to_async(views.send_checkout)(payment))
+    except chapa.ChapaUnavailable as e:
+        return _json({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except Exception as e:
+        await sync_to_async(payments.fail_initialization)(payment)
+        return _json({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def _listing_read(request, pk, read):
+    params = DateRangeQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    data = await sync_to_async(read)(
+        pk, params.validated_data['from'], params.validated_data['to']
+    )
+    if data is None:
+        raise exceptions.NotFound()
+    return _json(data)
+
+
+@api_view(['GET'], authenticated=False)
+async def availability(request, pk):
+    """``ListingViewSet.availability``"""
+    return await _listing_read(request, pk, views.listing_availability)
+
+
+@api_view(['GET'], authenticated=False)
+async def quote(request, pk):
+    """``ListingViewSet.quote``"""
+    return await _listing_read(request, pk, views.listing_quote)
+
+
+# The router's URLs and names, so reverse() and the metrics routes don't change
+LISTING = f'listings/(?P<pk>{views.ListingViewSet.lookup_value_regex})'
+
+urlpatterns = [
+    re_path(rf'^{LISTING}/availability/$', availability, name='listing-availability'),
+    re_path(rf'^{LISTING}/quote/$', quote, name='listing-quote'),
+    path('payments/<uuid:pk>/verify/', verify, name='payment-verify'),
+    path('payments/<uuid:pk>/initialize/', initialize, name='payment-initialize'),
+]
@@ -0,0 +1,126 @@
+"""
+Availability engine for listings.
+
+Overlap checks are a single range query on the
+``(property, status, start_date, end_date)`` index. Writers take a lock on the
+listing row for the duration of their transaction so two concurrent bookings
+can't both pass the overlap check. Overlap checks read the primary, as do
+the writers' reads under the lock, so a lagging replica can't let a
+double booking through.
+"""
+import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import FilteredRelation, Q
+
+from . import routing
+from .models import Booking, Listing
+
+# Bookings in these states hold their nights; canceled ones free them again
+BLOCKING_STATUSES = (Booking.BookingStatus.PENDING, Booking.BookingStatus.CONFIRMED)
+
+# Process-local fallback for backends without SELECT ... FOR UPDATE (SQLite)
+_fallback_locks = defaultdict(threading.Lock)
+_fallback_locks_guard = threading.Lock()
+
+
+def overlapping_bookings(listing_id, start_date, end_date, exclude=None):
+    """Bookings on the listing holding any night in ``[start_date, end_date)``"""
+    bookings = Booking.objects.filter(
+        property_id=listing_id,
+        status__in=BLOCKING_STATUSES,
+        start_date__lt=end_date,
+        end_date__gt=start_date,
+    )
+    if exclude is not None:
+        bookings = bookings.exclude(pk=exclude)
+    return bookings
+
+
+def is_available(listing_id, start_date, end_date, exclude=None):
+    """Whether every night in ``[start_date, end_date)`` is free"""
+    with routing.primary():
+        return not overlapping_bookings(listing_id, start_date, end_date, exclude).exists()
+
+
+@contextmanager
+def lock_listing(listing_id):
+    """
+    Open a transaction holding an exclusive lock on the listing row.
+
+    Anything that checks availability and then writes a booking must do both
+    inside this block.
+    """
+    with lock_listings([listing_id]):
+        yield
+
+
+@contextmanager
+def lock_listings(listing_ids):
+    """``lock_listing`` for several listings, locked in primary key order"""
+    listing_ids = sorted({str(listing_id) for listing_id in listing_ids})
+    with routing.primary():
+        with _locked(listing_ids):
+            yield
+
+
+@contextmanager
+def _locked(listing_ids):
+    if connection.features.has_select_for_update:
+        with transaction.atomic():
+            # A fixed order keeps two writers from deadlocking on each other
+            list(
+                Listing.objects.select_for_update().filter(pk__in=listing_ids)
+                .order_by("pk").values_list("pk", flat=True)
+            )
+            yield
+        return
+
+    # SQLite has no row locks, so serialise writers within this process
+    with _fallback_locks_guard:
+        locks = [_fallback_locks[listing_id] for listing_id in listing_ids]
+    with ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        with transaction.atomic():
+            yield
+
+
+def free_nights(listing_id, start_date, end_date):
+    """
+    Return the free nights in ``[start_date, end_date)`` for a listing.
+
+    Returns ``None`` if the listing doesn't exist. The listing and its
+    blocking bookings are read in one query: the booking conditions sit in the
+    join so a listing with no bookings still yields a single row.
+    """
+    rows = (
+        Listing.objects.filter(pk=listing_id)
+        .annotate(
+            held=FilteredRelation(
+                "bookings",
+                condition=Q(
+                    bookings__status__in=BLOCKING_STATUSES,
+                    bookings__start_date__lt=end_date,
+                    bookings__end_date__gt=start_date,
+                ),
+            )
+        )
+        .values_list("held__start_date", "held__end_date")
+    )
+    rows = list(rows)
+    if not rows:
+        return None
+
+    nights = (end_date - start_date).days
+    free = [True] * nights
+    for booked_from, booked_to in rows:
+        if booked_from is None:
+            continue
+        first = max((booked_from - start_date).days, 0)
+        last = min((booked_to - start_date).days, nights)
+        free[first:last] = [False] * (last - first)
+    return [start_date + timedelta(days=i) for i, is_free in enumerate(free) if is_free]
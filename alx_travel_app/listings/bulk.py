@@ -0,0 +1,145 @@
+"""
+Bulk import of listings and bookings.
+
+Rows arrive as a JSON array or an NDJSON stream and are handled
+``BULK_IMPORT_CHUNK_SIZE`` at a time: each chunk is validated with a
+``many=True`` serializer and its valid rows are inserted with one
+``bulk_create`` in a transaction of their own. Invalid rows are reported
+by their index in the input and don't stop the rest of the import.
+
+Bookings hold the locks of every listing in their chunk while the chunk is
+checked against stored bookings, and against earlier rows of the same
+import, so they can't overlap any more than bookings made one at a time.
+"""
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework.settings import api_settings
+
+from . import availability, cache, pricing
+from .models import Booking, Listing
+from .serializers import BookingSerializer, BulkBookingSerializer, BulkListSerializer, ListingSerializer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkResult:
+    created: int = 0
+    errors: list = field(default_factory=list)  # {'row': index, 'errors': ...}
+
+    def reject(self, index, errors):
+        if not isinstance(errors, dict):
+            errors = {api_settings.NON_FIELD_ERRORS_KEY: errors}
+        self.errors.append({'row': index, 'errors': errors})
+
+
+def import_listings(rows, host, context=None, chunk_size=None):
+    """Create a listing hosted by ``host`` for every valid row"""
+
+    def save(valid):
+        Listing.objects.bulk_create([Listing(host=host, **data) for _, data in valid])
+        return {}
+
+    result = _import(rows, ListingSerializer, save, context or {}, chunk_size)
+    if result.created:
+        # bulk_create sends no post_save, so the catalogue isn't invalidated by signals
+        transaction.on_commit(cache.invalidate_catalogue)
+    return result
+
+
+def import_bookings(rows, user, context=None, chunk_size=None):
+    """Book every valid row for ``user`` whose nights are still free"""
+
+    def save(valid):
+        return _save_bookings(valid, user)
+
+    result = _import(
+        rows, BulkBookingSerializer, save, context or {}, chunk_size, prepare=_load_listings
+    )
+    if result.created:
+        transaction.on_commit(cache.invalidate_catalogue)
+    return result
+
+
+def _import(rows, serializer_class, save, context, chunk_size=None, prepare=None):
+    chunk_size = chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+    result = BulkResult()
+    rows = iter(rows)
+    offset = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return result
+        chunk_context = {**context, **(prepare(chunk) if prepare else {})}
+        serializer = BulkListSerializer(
+            child=serializer_class(), data=chunk, context=chunk_context
+        )
+        serializer.is_valid()
+        valid = [(offset + index, data) for index, data in serializer.validated_data]
+        rejected = {}
+        if valid:
+            try:
+                with transaction.atomic():
+                    rejected = save(valid)
+            except DatabaseError as e:
+                logger.warning("Bulk import chunk at row %s failed: %s", offset, e)
+                rejected = {index: [str(e)] for index, _ in valid}
+        result.created += len(valid) - len(rejected)
+        for index, errors in serializer.row_errors.items():
+            rejected[offset + index] = errors
+        for index in sorted(rejected):
+            result.reject(index, rejected[index])
+        offset += len(chunk)
+
+
+def _load_listings(chunk):
+    """The listings a chunk of bookings refers to, in one query"""
+    ids = set()
+    for row in chunk:
+        try:
+            ids.add(uuid.UUID(str(row['property'])))
+        except (TypeError, KeyError, ValueError):
+            continue
+    listings = Listing.objects.only('pk', 'name', 'price_per_night').in_bulk(ids)
+    return {'listings': {str(pk): listing for pk, listing in listings.items()}}
+
+
+def _save_bookings(valid, user):
+    """Insert the rows of a chunk that don't overlap; return the ones that do"""
+    blocking = [
+        (index, data) for index, data in valid
+        if data.get('status', Booking.BookingStatus.PENDING) in availability.BLOCKING_STATUSES
+    ]
+    rejected = {}
+    with availability.lock_listings({data['property'].pk for _, data in valid}):
+        held = defaultdict(list)
+        if blocking:
+            for listing_id, start_date, end_date in Booking.objects.filter(
+                property__in={data['property'].pk for _, data in blocking},
+                status__in=availability.BLOCKING_STATUSES,
+                start_date__lt=max(data['end_date'] for _, data in blocking),
+                end_date__gt=min(data['start_date'] for _, data in blocking),
+            ).values_list('property_id', 'start_date', 'end_date'):
+                held[listing_id].append((start_date, end_date))
+
+        for index, data in blocking:
+            nights = held[data['property'].pk]
+            if any(start < data['end_date'] and end > data['start_date'] for start, end in nights):
+                rejected[index] = [BookingSerializer.UNAVAILABLE]
+            else:
+                nights.append((data['start_date'], data['end_date']))
+
+        accepted = [data for index, data in valid if index not in rejected]
+        totals = pricing.quote_stays(
+            [(data['property'], data['start_date'], data['end_date']) for data in accepted]
+        )
+        Booking.objects.bulk_create([
+            Booking(user=user, total_price=total, **data) for data, total in zip(accepted, totals)
+        ])
+    return rejected
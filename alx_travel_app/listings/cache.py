@@ -0,0 +1,130 @@
+"""
+Response cache for the listing catalogue.
+
+Cached entries hold the serialized data of ``ListingViewSet`` list and detail
+responses along with an ETag hashed from that data: reviews, availability
+and the rest of a page can change without ``Listing.updated_at`` moving, so
+neither it nor a Last-Modified date derived from it would notice. Keys
+embed a version number: one per listing for detail responses and one for
+the whole catalogue for list responses. Invalidation bumps the version, so
+stale entries are simply never read again and expire on their own.
+Entries are built from the primary database: built from a lagging replica
+just after an invalidation, they'd keep serving the old rows until they
+expire.
+"""
+import hashlib
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import routing
+
+CATALOGUE_VERSION_KEY = "listings:catalogue:version"
+
+
+def _listing_version_key(listing_id):
+    return f"listings:listing:{listing_id}:version"
+
+
+def _get_version(key):
+    # Start from a timestamp rather than 1 so an evicted version can't
+    # collide with keys written before the eviction.
+    cache.add(key, time.time_ns(), timeout=None)
+    return cache.get(key)
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_catalogue():
+    """Drop every cached list response"""
+    _bump_version(CATALOGUE_VERSION_KEY)
+
+
+def invalidate_listing(listing_id):
+    """Drop the cached detail response of a listing and every list response"""
+    _bump_version(_listing_version_key(listing_id))
+    invalidate_catalogue()
+
+
+def invalidate_listings(listing_ids):
+    """``invalidate_listing`` for several listings at once"""
+    for listing_id in listing_ids:
+        _bump_version(_listing_version_key(listing_id))
+    invalidate_catalogue()
+
+
+def cached_quote(listing_id, check_in, check_out, build):
+    """
+    Quote data for a stay, built with ``build`` on a miss. Quotes share the
+    listing's version, so saving the listing or one of its rates drops them.
+    """
+    if not settings.LISTING_CACHE_TIMEOUT:
+        return build()
+    version = _get_version(_listing_version_key(listing_id))
+    key = f"listings:quote:{listing_id}:{version}:{check_in}:{check_out}"
+    data = cache.get(key)
+    if data is None:
+        with routing.primary():
+            data = build()
+        if data is not None:
+            cache.set(key, data, settings.LISTING_CACHE_TIMEOUT)
+    return data
+
+
+def _digest(value):
+    return hashlib.sha1(value.encode()).hexdigest()
+
+
+def list_key(request):
+    """Cache key of a list response; ``None`` while the cache is off"""
+    if not settings.LISTING_CACHE_TIMEOUT:
+        return None
+    version = _get_version(CATALOGUE_VERSION_KEY)
+    # The absolute URI covers the query string and the host in pagination links
+    return f"listings:list:{version}:{_digest(request.build_absolute_uri())}"
+
+
+def detail_key(request, listing_id):
+    """Cache key of a detail response; ``None`` while the cache is off"""
+    if not settings.LISTING_CACHE_TIMEOUT:
+        return None
+    version = _get_version(_listing_version_key(listing_id))
+    return f"listings:detail:{listing_id}:{version}:{_digest(request.build_absolute_uri())}"
+
+
+def _etag(data):
+    """ETag of serialized listing data"""
+    return quote_etag(hashlib.sha1(JSONRenderer().render(data)).hexdigest())
+
+
+def cached_response(request, key, build):
+    """
+    Serve a listing response from the cache, building it with ``build`` on a
+    miss. Answers with 304 when the client's ETag still matches.
+    """
+    entry = cache.get(key) if settings.LISTING_CACHE_TIMEOUT else None
+    if entry is None:
+        with routing.primary() if settings.LISTING_CACHE_TIMEOUT else nullcontext():
+            response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        entry = {"data": response.data, "etag": _etag(response.data)}
+        if settings.LISTING_CACHE_TIMEOUT:
+            cache.set(key, entry, settings.LISTING_CACHE_TIMEOUT)
+    else:
+        response = Response(entry["data"])
+
+    response["ETag"] = entry["etag"]
+    return get_conditional_response(request, etag=entry["etag"], response=response)
@@ -0,0 +1,336 @@
+"""
+HTTP client for the Chapa payment API.
+
+All calls go through one pooled ``requests.Session`` per process, so
+connections (and their TLS sessions) are kept alive between payments. Every
+call has explicit connect/read timeouts, failed calls are retried a bounded
+number of times with jittered exponential backoff, and a circuit breaker stops
+calling Chapa for a while after repeated failures so workers fail fast instead
+of queueing behind a dead upstream.
+
+Async views use ``get_async_client()`` instead: the same calls as
+coroutines over ``httpx``, with one pool per event loop, counting against
+the same breaker.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from . import metrics
+
+
+class ChapaError(Exception):
+    """Chapa could not be reached or kept failing"""
+
+
+class ChapaUnavailable(ChapaError):
+    """The circuit breaker is open; Chapa is not being called"""
+
+
+@dataclass
+class ChapaResponse:
+    status_code: int
+    data: dict
+
+    @property
+    def ok(self):
+        return self.status_code == 200 and self.data.get('status') == 'success'
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive failures and rejects calls for
+    ``reset_timeout`` seconds, then lets a single trial call through.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= settings.CHAPA_BREAKER_RESET_TIMEOUT:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == 'open' or (state == 'half-open' and self._trial_in_flight):
+                raise ChapaUnavailable('Chapa circuit breaker is open')
+            if state == 'half-open':
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= settings.CHAPA_BREAKER_THRESHOLD:
+                self._opened_at = time.monotonic()
+
+
+class ChapaStats:
+    """Thread-safe latency and error counters, keyed by operation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def _bucket(self, operation):
+        return self._operations.setdefault(operation, {
+            'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0,
+            'latency_total': 0.0, 'latency_max': 0.0,
+        })
+
+    def record_call(self, operation, seconds, error):
+        with self._lock:
+            bucket = self._bucket(operation)
+            bucket['calls'] += 1
+            bucket['errors'] += int(error)
+            bucket['latency_total'] += seconds
+            bucket['latency_max'] = max(bucket['latency_max'], seconds)
+
+    def increment(self, operation, counter):
+        with self._lock:
+            self._bucket(operation)[counter] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: {
+                    **bucket,
+                    'latency_avg': bucket['latency_total'] / bucket['calls'] if bucket['calls'] else 0.0,
+                }
+                for operation, bucket in self._operations.items()
+            }
+
+
+# Responses worth retrying; anything else is the caller's problem
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class _ChapaCalls:
+    """What the sync and async clients share: requests, retries and results"""
+
+    def initialize(self, payload):
+        """Create a transaction and get its checkout URL"""
+        # Only retried when the request never reached Chapa, so a slow
+        # response can't create the transaction twice.
+        return self._request('initialize', 'POST', 'transaction/initialize',
+                             json=payload, retry_responses=False)
+
+    def verify(self, tx_ref):
+        """Look up the status of a transaction"""
+        return self._request('verify', 'GET', f'transaction/verify/{tx_ref}')
+
+    def _url(self, path):
+        return f"{settings.CHAPA_API_URL.rstrip('/')}/{settings.CHAPA_API_VERSION}/{path}"
+
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {settings.CHAPA_SECRET}',
+            'Content-Type': 'application/json',
+        }
+
+    def _before_attempt(self, operation):
+        try:
+            self.breaker.before_call()
+        except ChapaUnavailable:
+            self.stats.increment(operation, 'rejected')
+            raise
+
+    def _after_attempt(self, operation, started, response, error, retryable):
+        """Record an attempt; whether it failed in a way worth retrying"""
+        failed = error is not None or response.status_code >= 500
+        self.stats.record_call(operation, time.perf_counter() - started, failed)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return failed and retryable
+
+    @staticmethod
+    def _result(operation, response, error):
+        if error is not None:
+            raise ChapaError(f'Chapa {operation} request failed: {error}') from error
+        try:
+            data = response.json()
+        except ValueError:
+            data = {'status': 'failed', 'message': response.text[:500]}
+        return ChapaResponse(response.status_code, data)
+
+    @staticmethod
+    def _backoff(attempt):
+        # Full jitter: spreads out retries from many workers hitting the same outage
+        ceiling = min(settings.CHAPA_BACKOFF_MAX, settings.CHAPA_BACKOFF_BASE * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+
+class ChapaClient(_ChapaCalls):
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.CHAPA_POOL_SIZE,
+            max_retries=0,
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = CircuitBreaker()
+        self.stats = ChapaStats()
+
+    def _request(self, operation, method, path, retry_responses=True, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._send(operation, method, path, retry_responses, **kwargs)
+        finally:
+            # Retries and backoff included: it's how long the caller waited
+            metrics.record_chapa(time.perf_counter() - started)
+
+    def _send(self, operation, method, path, retry_responses, **kwargs):
+        attempts = settings.CHAPA_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            self._before_attempt(operation)
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = self.session.request(
+                    method,
+                    self._url(path),
+                    headers=self._headers(),
+                    timeout=(settings.CHAPA_CONNECT_TIMEOUT, settings.CHAPA_READ_TIMEOUT),
+                    **kwargs,
+                )
+            except requests.RequestException as e:
+                error, retryable = e, retry_responses or _never_sent(e)
+            else:
+                retryable = retry_responses and response.status_code in RETRY_STATUSES
+
+            if not self._after_attempt(operation, started, response, error, retryable) \
+                    or attempt == attempts - 1:
+                break
+            self.stats.increment(operation, 'retries')
+            time.sleep(self._backoff(attempt))
+
+        return self._result(operation, response, error)
+
+
+class AsyncChapaClient(_ChapaCalls):
+    """
+    The client for async views: ``initialize`` and ``verify`` are
+    coroutines, so waiting on Chapa holds no thread. Same timeouts, retries
+    and backoff, over an ``httpx.AsyncClient`` pool; the breaker and
+    counters are the sync client's, so both count against one Chapa.
+    """
+
+    def __init__(self, breaker, stats):
+        self.session = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.CHAPA_READ_TIMEOUT,
+                                  connect=settings.CHAPA_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=settings.CHAPA_POOL_SIZE,
+                                max_keepalive_connections=settings.CHAPA_POOL_SIZE),
+        )
+        self.breaker = breaker
+        self.stats = stats
+
+    async def _request(self, operation, method, path, retry_responses=True, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await self._send(operation, method, path, retry_responses, **kwargs)
+        finally:
+            metrics.record_chapa(time.perf_counter() - started)
+
+    async def _send(self, operation, method, path, retry_responses, **kwargs):
+        attempts = settings.CHAPA_MAX_RETRIES + 1
+        for attempt in range(attempts):
+            self._before_attempt(operation)
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = await self.session.request(
+                    method, self._url(path), headers=self._headers(), **kwargs
+                )
+            except httpx.RequestError as e:
+                never_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                error, retryable = e, retry_responses or never_sent
+            else:
+                retryable = retry_responses and response.status_code in RETRY_STATUSES
+
+            if not self._after_attempt(operation, started, response, error, retryable) \
+                    or attempt == attempts - 1:
+                break
+            self.stats.increment(operation, 'retries')
+            await asyncio.sleep(self._backoff(attempt))
+
+        return self._result(operation, response, error)
+
+
+def _never_sent(error):
+    """Whether the request failed before any of it reached Chapa"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+# One per event loop: an httpx pool can't be shared between loops
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """The process-wide client; a forked worker gets its own connection pool"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client, _client_pid = ChapaClient(), os.getpid()
+        return _client
+
+
+def get_async_client():
+    """The async client for the running event loop, sharing the process-wide breaker"""
+    client = get_client()
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        async_client = _async_clients.get(loop)
+        if async_client is None or async_client.breaker is not client.breaker:
+            async_client = AsyncChapaClient(client.breaker, client.stats)
+            _async_clients[loop] = async_client
+        return async_client
+
+
+def reset_client():
+    """Drop the process-wide client (its pool, breaker state and counters)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+        # Their pools belong to event loops this thread may not be running
+        _async_clients.clear()
@@ -0,0 +1,15 @@
+"""Database helpers shared by the background jobs"""
+from django.db import connection
+
+
+def skip_locked(queryset):
+    """
+    Lock the selected rows, skipping rows another transaction holds.
+
+    Lets several workers claim work from the same table without waiting on
+    each other. Falls back to a plain ``FOR UPDATE`` where ``SKIP LOCKED``
+    isn't supported (and to no lock at all on SQLite).
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    return queryset.select_for_update()
@@ -0,0 +1,96 @@
+"""
+Database connection reuse, and how often it happens.
+
+With ``CONN_MAX_AGE`` above 0 (``DB_CONN_MAX_AGE``), a process keeps its
+connection open between requests and tasks instead of connecting, and
+running the ``init_command``, for each one. Django closes it at the end of
+the first request after it got that old, or after an error; Celery's
+Django fixup does the same around every task. With ``CONN_HEALTH_CHECKS``
+a reused connection is checked before its first query in a request or
+task, and replaced if the server dropped it. Workers can keep connections
+for a different time than web processes: ``DB_WORKER_CONN_MAX_AGE``
+replaces ``CONN_MAX_AGE`` when a worker starts.
+
+Every process counts the connections it opens, and, for each request or
+task that queried a database, whether it did so on a connection it opened
+or on one it reused. They're served with the other metrics on
+``/metrics`` (and on ``TASK_METRICS_PORT`` for workers).
+"""
+from celery.signals import task_postrun, task_prerun, worker_init
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import Counter
+
+OPENED = Counter('db_connections_opened', 'Database connections opened', ['alias'])
+USES = Counter(
+    'db_connection_uses',
+    'Requests and tasks that queried a database, by whether the connection was new or reused',
+    ['alias', 'unit', 'connection'],
+)
+
+
+def mark_used(execute, sql, params, many, context):
+    """Execute wrapper noting that the connection ran a query in this request or task"""
+    context['connection'].stats_used = True
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    OPENED.labels(connection.alias).inc()
+    connection.stats_opened = True
+    if mark_used not in connection.execute_wrappers:
+        connection.execute_wrappers.append(mark_used)
+
+
+def _start():
+    for connection in connections.all(initialized_only=True):
+        connection.stats_opened = connection.stats_used = False
+
+
+def _finish(unit):
+    # Connections are per thread, so these are the ones this unit used
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, 'stats_used', False):
+            kind = 'new' if connection.stats_opened else 'reused'
+            USES.labels(connection.alias, unit, kind).inc()
+        connection.stats_opened = connection.stats_used = False
+
+
+@receiver(request_started)
+def request_began(**kwargs):
+    _start()
+
+
+@receiver(request_finished)
+def request_ended(**kwargs):
+    _finish('request')
+
+
+def _eager(task):
+    # An eager task runs inside the request or task that sent it
+    return getattr(task.request, 'is_eager', False)
+
+
+@task_prerun.connect
+def task_started(task=None, **kwargs):
+    if not _eager(task):
+        _start()
+
+
+@task_postrun.connect
+def task_finished(task=None, **kwargs):
+    if not _eager(task):
+        _finish('task')
+
+
+@worker_init.connect
+def use_worker_conn_max_age(**kwargs):
+    """Before the pool starts, so every child process connects with it"""
+    if settings.DB_WORKER_CONN_MAX_AGE is None:
+        return
+    for database in settings.DATABASES.values():
+        database['CONN_MAX_AGE'] = settings.DB_WORKER_CONN_MAX_AGE
@@ -0,0 +1,46 @@
+"""
+Rendering of transactional email.
+
+Every email is three templates under ``listings/email/``: ``<name>_subject.txt``,
+``<name>.txt`` and ``<name>.html``. They are loaded through the cached
+template loader, so a worker compiles each one once; ``render_many`` renders
+any number of messages against the same compiled templates and one context
+stack per part.
+"""
+from dataclasses import dataclass
+
+from django.template import Context
+from django.template.loader import get_template
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    body: str
+    html_body: str
+
+
+def render(name, context):
+    """Render one email"""
+    return render_many(name, [context])[0]
+
+
+def render_many(name, contexts):
+    """Render one email per context"""
+    subject, text, html = (
+        get_template(f'listings/email/{name}{suffix}').template
+        for suffix in ('_subject.txt', '.txt', '.html')
+    )
+    # Only the HTML part is escaped; the text parts are sent as they are
+    text_context = Context(autoescape=False)
+    html_context = Context(autoescape=True)
+    rendered = []
+    for values in contexts:
+        with text_context.push(values), html_context.push(values):
+            rendered.append(RenderedEmail(
+                # A header can't span lines
+                subject=' '.join(subject.render(text_context).split()),
+                body=text.render(text_context).strip() + '\n',
+                html_body=html.render(html_context).strip() + '\n',
+            ))
+    return rendered
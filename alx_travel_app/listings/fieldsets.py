@@ -0,0 +1,141 @@
+"""
+Sparse fieldsets for the API's list and detail endpoints.
+
+``?fields=name,price_per_night`` picks the fields of each object and
+``?expand=reviews`` adds expandable ones. Expandable fields, named in the
+serializer's ``Meta.expandable``, are the costly ones (a listing's reviews,
+a payment's raw Chapa response): lists leave them out unless asked for,
+details include them unless ``?fields=`` leaves them out.
+
+The queryset follows the selection: unselected columns are deferred with
+``only()``, and the prefetches in the view's ``field_prefetches`` run only
+for the fields that need them, so a lean list neither reads nor serializes
+what it doesn't return. Other actions, and writes, use every field.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDSET_ACTIONS = {'list', 'retrieve'}
+
+
+def _names(value):
+    return [name for name in (part.strip() for part in value.split(',')) if name]
+
+
+class Fieldset:
+    """The fields a request selected; ``lean`` leaves expandable fields out unless expanded"""
+
+    __slots__ = ('fields', 'expand', 'lean')
+
+    def __init__(self, fields=None, expand=(), lean=False):
+        self.fields = fields
+        self.expand = expand
+        self.lean = lean
+
+    @classmethod
+    def from_request(cls, request, lean=False):
+        fields = request.query_params.get('fields')
+        return cls(
+            fields=_names(fields) if fields is not None else None,
+            expand=_names(request.query_params.get('expand', '')),
+            lean=lean,
+        )
+
+    def select(self, available, expandable=()):
+        """The names in ``available`` to serialize, in their declared order"""
+        errors = {}
+        unknown = [name for name in self.fields or () if name not in available]
+        if unknown:
+            errors['fields'] = [f"Unknown field: {name}" for name in unknown]
+        unexpandable = [name for name in self.expand if name not in expandable]
+        if unexpandable:
+            errors['expand'] = [f"Not an expandable field: {name}" for name in unexpandable]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        if self.fields is not None:
+            selected = {*self.fields, *self.expand}
+        elif self.lean:
+            selected = {*(name for name in available if name not in expandable), *self.expand}
+        else:
+            selected = set(available)
+        return [name for name in available if name in selected]
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializes the fields ``fieldset`` selects, or all of them without one.
+    ``Meta.expandable`` names the fields lists leave out by default.
+    """
+
+    def __init__(self, *args, fieldset=None, **kwargs):
+        self.fieldset = fieldset
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.fieldset is None:
+            return fields
+        names = self.fieldset.select(list(fields), getattr(self.Meta, 'expandable', ()))
+        return {name: fields[name] for name in names}
+
+
+def selected_columns(model, fields, ordering=()):
+    """
+    Model fields to load for serializer ``fields`` and the ``ordering`` the
+    page is cut by; ``None`` if a field may read any column (a method or
+    property) and the whole row is needed.
+    """
+    opts = model._meta
+    columns = {opts.pk.name}
+    for name in (*(field.source_attrs[0] if field.source_attrs else None
+                   for field in fields.values()),
+                 *(term.lstrip('-') for term in ordering)):
+        if name is None:
+            return None
+        if name == 'pk':
+            continue
+        try:
+            model_field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        # Reverse relations come from prefetches
+        if model_field.concrete:
+            columns.add(name)
+    return sorted(columns)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Applies ``?fields=`` and ``?expand=`` to a view's list and detail
+    responses; lists are lean. ``field_prefetches`` maps fields to the
+    prefetch lookups they need.
+    """
+    field_prefetches = {}
+
+    def get_fieldset(self):
+        if self.action not in FIELDSET_ACTIONS:
+            return None
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = Fieldset.from_request(self.request, lean=self.action == 'list')
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fieldset', self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.get_serializer().fields if self.get_fieldset() is not None else None
+        for name, lookup in self.field_prefetches.items():
+            if fields is None or name in fields:
+                queryset = queryset.prefetch_related(lookup)
+        if fields is None:
+            return queryset
+
+        ordering = ()
+        if self.action == 'list' and hasattr(self.paginator, 'get_ordering'):
+            # The page is cut by these, read from its first and last rows
+            ordering = self.paginator.get_ordering(self.request, queryset, self)
+        columns = selected_columns(queryset.model, fields, ordering)
+        return queryset if columns is None else queryset.only(*columns)
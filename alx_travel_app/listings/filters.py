@@ -0,0 +1,75 @@
+from django.db import connections
+from django.db.models import Exists, FloatField, Func, OuterRef, Q, Value
+from rest_framework.filters import BaseFilterBackend
+
+from . import availability
+from .serializers import ListingSearchQuerySerializer
+
+
+class FullTextMatch(Func):
+    """
+    MySQL ``MATCH (...) AGAINST (... IN NATURAL LANGUAGE MODE)``.
+
+    Evaluates to the relevance score, which is positive for matching rows. The
+    columns must be exactly those of a FULLTEXT index.
+    """
+    output_field = FloatField()
+
+    def __init__(self, *columns, query):
+        super().__init__(*columns, Value(query))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        *columns, query = self.get_source_expressions()
+        column_sql, params = [], []
+        for column in columns:
+            sql, column_params = compiler.compile(column)
+            column_sql.append(sql)
+            params.extend(column_params)
+        query_sql, query_params = compiler.compile(query)
+        sql = f"MATCH ({', '.join(column_sql)}) AGAINST ({query_sql} IN NATURAL LANGUAGE MODE)"
+        return sql, [*params, *query_params]
+
+
+def search_listings(queryset, terms):
+    """Full-text search over listing names and descriptions"""
+    if connections[queryset.db].vendor == "mysql":
+        return queryset.alias(
+            relevance=FullTextMatch("name", "description", query=terms)
+        ).filter(relevance__gt=0)
+
+    # No FULLTEXT index elsewhere (SQLite in tests): every word must appear
+    condition = Q()
+    for word in terms.split():
+        condition &= Q(name__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition)
+
+
+def filter_listings(queryset, search=None, location=None, min_price=None,
+                    max_price=None, min_rating=None, available_from=None,
+                    available_to=None):
+    """Apply the catalogue filters to a listing queryset"""
+    if search:
+        queryset = search_listings(queryset, search)
+    if location:
+        # Prefix match so MySQL can use the location index
+        queryset = queryset.filter(location__istartswith=location)
+    if min_price is not None:
+        queryset = queryset.filter(price_per_night__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price_per_night__lte=max_price)
+    if min_rating is not None:
+        queryset = queryset.filter(avg_rating__gte=min_rating)
+    if available_from and available_to:
+        queryset = queryset.filter(~Exists(
+            availability.overlapping_bookings(OuterRef("pk"), available_from, available_to)
+        ))
+    return queryset
+
+
+class ListingCatalogueFilter(BaseFilterBackend):
+    """Filter backend exposing the catalogue filters as query parameters"""
+
+    def filter_queryset(self, request, queryset, view):
+        params = ListingSearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return filter_listings(queryset, **params.validated_data)
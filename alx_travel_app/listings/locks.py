@@ -0,0 +1,55 @@
+"""
+Cache locks for the periodic background jobs.
+
+A lock holds a random token for its owner, and is extended or released
+only while it still holds that token: a run that outlived its lock never
+touches the lock of the worker that took it since. On Redis the check and
+the write are one script; other backends check then write, which leaves a
+short window between the two.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+
+# KEYS[1] is the lock, ARGV[1] the owner's token as stored
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def acquire(key, timeout):
+    """Take the lock for ``timeout`` seconds; its token, or ``None`` if it's held"""
+    token = uuid.uuid4().hex
+    return token if cache.add(key, token, timeout=timeout) else None
+
+
+def extend(key, token, timeout):
+    """Hold the lock for another ``timeout`` seconds; whether it was still ours"""
+    if isinstance(cache, RedisCache):
+        return bool(_eval(EXTEND_SCRIPT, key, token, int(timeout * 1000)))
+    return cache.get(key) == token and cache.touch(key, timeout)
+
+
+def release(key, token):
+    """Delete the lock unless another worker holds it by now"""
+    if isinstance(cache, RedisCache):
+        _eval(RELEASE_SCRIPT, key, token)
+    elif cache.get(key) == token:
+        cache.delete(key)
+
+
+def _eval(script, key, token, *args):
+    key = cache.make_and_validate_key(key)
+    client = cache._cache.get_client(key, write=True)
+    # Compared with the stored value, so serialized the way the cache stores it
+    return client.eval(script, 1, key, cache._cache._serializer.dumps(token), *args)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from alx_travel_app.listings.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Recompute the review count and average rating stored on each listing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Listings recomputed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding listing ratings...")
+        fixed = rebuild_ratings(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings, {fixed} listings had drifted"))
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from alx_travel_app.listings.task_metrics import quantile, summarize
+
+TASK_PREFIX = "alx_travel_app.listings.tasks."
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+class Command(BaseCommand):
+    help = (
+        "Print a live summary of the listings tasks: runs, failures, retries, "
+        "queue wait and run time, read from a worker's task metrics"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Task metrics URL; http://localhost:TASK_METRICS_PORT/metrics by default",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5, help="Seconds between refreshes"
+        )
+        parser.add_argument("--once", action="store_true", help="Print one summary and exit")
+
+    def handle(self, *args, **options):
+        url = options["url"]
+        if not url:
+            if not settings.TASK_METRICS_PORT:
+                raise CommandError("Pass --url or set TASK_METRICS_PORT")
+            url = f"http://localhost:{settings.TASK_METRICS_PORT}/metrics"
+
+        previous = None
+        while True:
+            try:
+                with urlopen(url, timeout=10) as response:
+                    tasks = summarize(response.read().decode(), prefix=TASK_PREFIX)
+            except (URLError, OSError) as e:
+                raise CommandError(f"Couldn't read task metrics from {url}: {e}")
+            self.print_summary(tasks, previous, options["interval"])
+            if options["once"]:
+                return
+            previous = tasks
+            time.sleep(options["interval"])
+
+    def print_summary(self, tasks, previous, interval):
+        self.stdout.write(f"\n{datetime.now():%H:%M:%S}")
+        self.stdout.write(
+            f"{'task':<36} {'runs':>7} {'/s':>6} {'failed':>7} {'retried':>7} "
+            f"{'wait p50':>9} {'wait p95':>9} {'run p50':>9} {'run p95':>9}"
+        )
+        for name, summary in sorted(tasks.items()):
+            rate = "-"
+            if previous is not None:
+                before = previous[name].runs if name in previous else 0
+                rate = f"{(summary.runs - before) / interval:.1f}"
+            self.stdout.write(
+                f"{name:<36} {summary.runs:>7} {rate:>6} "
+                f"{summary.states.get('failure', 0):>7} {summary.states.get('retry', 0):>7} "
+                f"{_ms(quantile(summary.queue_wait, 0.5)):>9} "
+                f"{_ms(quantile(summary.queue_wait, 0.95)):>9} "
+                f"{_ms(quantile(summary.runtime, 0.5)):>9} "
+                f"{_ms(quantile(summary.runtime, 0.95)):>9}"
+            )
+        if not tasks:
+            self.stdout.write("No listings tasks have run yet")
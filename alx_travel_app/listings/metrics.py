@@ -0,0 +1,181 @@
+"""
+Per-request performance metrics.
+
+``RequestMetricsMiddleware`` times a sampled share of requests
+(``METRICS_SAMPLE_RATE``): wall time, the number and time of SQL queries,
+and the time spent waiting on Chapa, which the Chapa client reports here.
+Queries go through an execute wrapper installed on every connection as it
+opens; it finds the request being timed in a context variable, so queries
+run from ``sync_to_async`` threads under ASGI are counted too.
+Sampled requests get a ``Server-Timing`` header and are observed in
+per-route histograms; every request is counted. Unsampled requests cost a
+random number and a counter increment, so sampling can stay on in
+production. The body of a streamed response isn't included in its timings.
+
+Metrics are kept with prometheus_client and served in its text format at
+``/metrics``. Each process keeps its own values unless
+``PROMETHEUS_MULTIPROC_DIR`` is set before the workers start; they then
+share files in that directory and ``/metrics`` adds them all up.
+"""
+import os
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest,
+    multiprocess,
+)
+
+LABELS = ['route', 'method']
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 20, 50, 100, float('inf'))
+
+REQUESTS = Counter('http_requests', 'Requests handled', LABELS + ['status'])
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Wall time of sampled requests', LABELS
+)
+SQL_QUERIES = Histogram(
+    'http_request_sql_queries', 'SQL queries run by sampled requests', LABELS,
+    buckets=QUERY_BUCKETS,
+)
+SQL_DURATION = Histogram(
+    'http_request_sql_duration_seconds', 'Time sampled requests spent in SQL queries', LABELS
+)
+CHAPA_DURATION = Histogram(
+    'http_request_chapa_duration_seconds', 'Time sampled requests waited on Chapa', LABELS
+)
+
+
+class RequestTiming:
+    """What one request spent"""
+
+    __slots__ = ('queries', 'sql', 'chapa')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.chapa = 0.0
+
+    def server_timing(self, total):
+        return (
+            f'total;dur={total * 1000:.1f}, '
+            f'db;dur={self.sql * 1000:.1f};desc="{self.queries} queries", '
+            f'chapa;dur={self.chapa * 1000:.1f}'
+        )
+
+
+_current = ContextVar('request_timing', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the request being timed, if any"""
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.queries += 1
+        timing.sql += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def record_chapa(seconds):
+    """Add time spent calling Chapa to the request being timed, if any"""
+    timing = _current.get()
+    if timing is not None:
+        timing.chapa += seconds
+
+
+def route(request):
+    """The URL pattern name a request resolved to, so the labels stay few"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            response = self.get_response(request)
+            REQUESTS.labels(route(request), request.method, response.status_code).inc()
+            return response
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, timing, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.METRICS_SAMPLE_RATE:
+            response = await self.get_response(request)
+            REQUESTS.labels(route(request), request.method, response.status_code).inc()
+            return response
+
+        timing = RequestTiming()
+        token = _current.set(timing)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.observe(request, response, timing, time.perf_counter() - started)
+
+    @staticmethod
+    def observe(request, response, timing, total):
+        labels = (route(request), request.method)
+        REQUESTS.labels(*labels, response.status_code).inc()
+        REQUEST_DURATION.labels(*labels).observe(total)
+        SQL_QUERIES.labels(*labels).observe(timing.queries)
+        SQL_DURATION.labels(*labels).observe(timing.sql)
+        CHAPA_DURATION.labels(*labels).observe(timing.chapa)
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = timing.server_timing(total)
+        return response
+
+
+def registry():
+    """The registry to export: this process's, or every worker's in multiprocess mode"""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def metrics_view(request):
+    """Every metric in the Prometheus text format"""
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
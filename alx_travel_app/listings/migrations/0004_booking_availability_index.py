@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', 'status', 'start_date', 'end_date'], name='booking_availability_idx'),
+        ),
+    ]
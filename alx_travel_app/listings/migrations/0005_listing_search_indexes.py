@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-17 07:09
+
+from django.db import migrations, models
+
+
+def create_fulltext_index(apps, schema_editor):
+    # Only MySQL has FULLTEXT; other backends fall back to LIKE searches
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX listing_fulltext_idx ON listings_listing (name, description)'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX listing_fulltext_idx ON listings_listing')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_booking_availability_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['location', 'price_per_night'], name='listing_location_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['price_per_night'], name='listing_price_idx'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
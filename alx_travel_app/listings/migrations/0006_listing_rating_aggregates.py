@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-17 07:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_ratings(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Review = apps.get_model('listings', 'Review')
+    per_listing = Review.objects.filter(property=OuterRef('pk')).values('property')
+    Listing.objects.update(
+        review_count=Coalesce(Subquery(per_listing.annotate(n=Count('pk')).values('n')), 0),
+        rating_sum=Coalesce(Subquery(per_listing.annotate(s=Sum('rating')).values('s')), 0),
+    )
+    for listing in Listing.objects.filter(review_count__gt=0).only('review_count', 'rating_sum'):
+        listing.avg_rating = round(listing.rating_sum / listing.review_count, 2)
+        listing.save(update_fields=['avg_rating'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_listing_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listing',
+            name='avg_rating',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=3, null=True),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='listing',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['avg_rating', 'created_at'], name='listing_rating_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
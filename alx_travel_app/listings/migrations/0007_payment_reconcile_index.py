@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_listing_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'updated_at', 'id'], name='payment_reconcile_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_payment_reconcile_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChapaWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=50)),
+                ('tx_ref', models.CharField(max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='chapawebhookevent',
+            constraint=models.UniqueConstraint(fields=('event', 'tx_ref'), name='chapa_event_unique'),
+        ),
+    ]
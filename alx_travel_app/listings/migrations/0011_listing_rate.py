@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-17 07:40
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0010_outbound_email_html_body'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('weekdays', models.PositiveSmallIntegerField(default=127, help_text='Nights the rule applies to, as a bitmask: Monday = 1 ... Sunday = 64', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(127)])),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('multiplier', models.DecimalField(blank=True, decimal_places=3, max_digits=5, null=True)),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rates', to='listings.listing')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['listing', 'start_date', 'end_date'], name='listing_rate_range_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='listingrate',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gt', models.F('start_date'))), name='listing_rate_dates'),
+        ),
+        migrations.AddConstraint(
+            model_name='listingrate',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('multiplier__isnull', True), ('price__isnull', False)), models.Q(('multiplier__isnull', False), ('price__isnull', True)), _connector='OR'), name='listing_rate_price_or_multiplier'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0011_listing_rate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'start_date', 'end_date'], name='booking_status_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['location', 'created_at'], name='listing_location_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['currency', 'status', 'created_at'], name='payment_currency_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-17 09:02
+
+from django.db import migrations, models
+
+
+def zero_unrated(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Listing.objects.filter(avg_rating__isnull=True).update(avg_rating=0)
+
+
+def null_unrated(apps, schema_editor):
+    Listing = apps.get_model('listings', 'Listing')
+    Listing.objects.filter(review_count=0).update(avg_rating=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0012_admin_filter_indexes'),
+    ]
+
+    operations = [
+        # Unrated listings hold NULL from the 0006 backfill; the column can't
+        # become NOT NULL until they don't
+        migrations.RunPython(zero_unrated, null_unrated),
+        migrations.AlterField(
+            model_name='listing',
+            name='avg_rating',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+    ]
@@ -2,6 +2,7 @@ import uuid
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django_chapa.models import ChapaTransactionMixin
 
 User = get_user_model()
@@ -14,12 +15,76 @@ class Listing(models.Model):
     description = models.TextField()
     location = models.CharField(max_length=255)
     price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+    # Rating aggregates kept in step with the reviews (see listings.ratings)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    # 0 until the first review, so ordering and cursors by rating never meet
+    # NULL; the API shows it as null
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} - {self.location}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "property_id"], name="listing_created_idx"),
+            models.Index(fields=["location", "price_per_night"], name="listing_location_price_idx"),
+            # The admin's location and date filters
+            models.Index(fields=["location", "created_at"], name="listing_location_created_idx"),
+            models.Index(fields=["price_per_night"], name="listing_price_idx"),
+            models.Index(fields=["avg_rating", "created_at"], name="listing_rating_idx"),
+        ]
+
+class ListingRate(models.Model):
+    """
+    A nightly price rule for a listing over ``[start_date, end_date)``.
+
+    A rule either sets the nightly price or multiplies it, on the nights of
+    the week in ``weekdays``. Rules apply in ``priority`` order, so e.g. a
+    weekend multiplier can apply on top of a seasonal price (see
+    listings.pricing).
+    """
+    EVERY_NIGHT = 0b1111111
+    # Friday and Saturday nights
+    WEEKEND = 1 << 4 | 1 << 5
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='rates')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    weekdays = models.PositiveSmallIntegerField(
+        default=EVERY_NIGHT,
+        validators=[MinValueValidator(1), MaxValueValidator(EVERY_NIGHT)],
+        help_text="Nights the rule applies to, as a bitmask: Monday = 1 ... Sunday = 64",
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    multiplier = models.DecimalField(max_digits=5, decimal_places=3, null=True, blank=True)
+    priority = models.SmallIntegerField(default=0)
+
+    def __str__(self):
+        change = f"{self.price}" if self.price is not None else f"x{self.multiplier}"
+        return f"{self.listing_id} {self.start_date} - {self.end_date}: {change}"
+
+    class Meta:
+        indexes = [
+            # The rates overlapping a stay, read by every quote
+            models.Index(fields=["listing", "start_date", "end_date"], name="listing_rate_range_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(end_date__gt=models.F("start_date")),
+                name="listing_rate_dates",
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(price__isnull=False, multiplier__isnull=True)
+                    | models.Q(price__isnull=True, multiplier__isnull=False)
+                ),
+                name="listing_rate_price_or_multiplier",
+            ),
+        ]
+
 class Booking(models.Model):
     """Model representing a property booking"""
     class BookingStatus(models.TextChoices):
@@ -43,6 +108,18 @@ class Booking(models.Model):
     def __str__(self):
         return f"Booking {self.booking_id} - {self.property.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "booking_id"], name="booking_created_idx"),
+            models.Index(fields=["user", "created_at", "booking_id"], name="booking_user_created_idx"),
+            models.Index(
+                fields=["property", "status", "start_date", "end_date"],
+                name="booking_availability_idx",
+            ),
+            # The admin's status and stay date filters, across listings
+            models.Index(fields=["status", "start_date", "end_date"], name="booking_status_dates_idx"),
+        ]
+
 class Review(models.Model):
     """Model representing a property review"""
     review_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -57,8 +134,24 @@ class Review(models.Model):
     def __str__(self):
         return f"Review for {self.property.name} by {self.user.email}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Rows loaded with only() may leave these out; a save reads them
+        # before updating the row instead (see ratings.review_saving)
+        if "property_id" in field_names and "rating" in field_names:
+            instance.remember_rating()
+        return instance
+
+    def remember_rating(self):
+        """Record the stored rating so a later save can apply only the difference"""
+        self._stored_rating = (self.property_id, self.rating)
+
     class Meta:
         unique_together = ('property', 'user')
+        indexes = [
+            models.Index(fields=["created_at", "review_id"], name="review_created_idx"),
+        ]
 
 class Payment(ChapaTransactionMixin):
     """Model representing a payment transaction"""
@@ -85,3 +178,70 @@ class Payment(ChapaTransactionMixin):
 
     class Meta:
         swappable = 'CHAPA_TRANSACTION_MODEL'
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="payment_created_idx"),
+            # Stale pending payments, in the order they are reconciled
+            models.Index(fields=["status", "updated_at", "id"], name="payment_reconcile_idx"),
+            # The admin's currency, status and date filters; currency leads so
+            # the currency filter can list its choices from the index
+            models.Index(fields=["currency", "status", "created_at"], name="payment_currency_idx"),
+        ]
+
+
+class ChapaWebhookEvent(models.Model):
+    """
+    Raw webhook and callback deliveries from Chapa, stored as received.
+
+    Rows are only ever inserted. Chapa retries deliveries, so the unique
+    constraint on (event, tx_ref) is what turns a retry into a no-op.
+    """
+    event = models.CharField(max_length=50)
+    tx_ref = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event} {self.tx_ref}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["event", "tx_ref"], name="chapa_event_unique"),
+        ]
+
+
+class OutboundEmail(models.Model):
+    """
+    A rendered email waiting to be sent by ``drain_email_outbox``.
+
+    Failed sends stay pending with a later ``next_attempt_at`` until
+    ``EMAIL_OUTBOX_MAX_ATTEMPTS`` is reached, then the email is marked failed.
+    """
+    class EmailStatus(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        SENT = 'sent', 'Sent'
+        FAILED = 'failed', 'Failed'
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10,
+        choices=EmailStatus.choices,
+        default=EmailStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+    class Meta:
+        indexes = [
+            # The drain task's claim query
+            models.Index(fields=["status", "next_attempt_at", "id"], name="outbox_due_idx"),
+        ]
@@ -0,0 +1,140 @@
+"""
+Outbox for transactional email.
+
+Tasks store messages rendered by ``emails`` with ``queue_email`` instead of
+calling ``send_mail``. ``drain_email_outbox`` sends due messages in batches, each
+over a single SMTP connection, and keeps per-message retry state so one bad
+recipient doesn't hold up or resend the rest of the batch.
+"""
+import logging
+import smtplib
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .db import skip_locked
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DrainResult:
+    batches: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def queue_email(subject, body, to, from_email=None, html_body=''):
+    """Store a message for the next drain and return it"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    )
+
+
+def drain(batch_size=None, max_batches=None):
+    """Send due messages batch by batch until none are left"""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    result = DrainResult()
+    while max_batches is None or result.batches < max_batches:
+        emails = _claim(batch_size)
+        if not emails:
+            break
+        _send_batch(emails, result)
+        result.batches += 1
+    return result
+
+
+def _claim(batch_size):
+    """
+    Lease the next due batch to this worker.
+
+    Pushing ``next_attempt_at`` forward hides the batch from other workers
+    while it is being sent; if this worker dies the lease expires and the
+    messages are picked up again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(skip_locked(
+            OutboundEmail.objects.filter(
+                status=OutboundEmail.EmailStatus.PENDING, next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'id')
+        )[:batch_size])
+        if emails:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+            )
+    return emails
+
+
+def _connection_lost(error):
+    # SMTPException subclasses OSError, but e.g. a refused recipient leaves
+    # the session usable
+    return isinstance(error, smtplib.SMTPServerDisconnected) or (
+        isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+    )
+
+
+def _send_batch(emails, result):
+    connection = get_connection()
+    sent, failed = [], []
+    try:
+        connection.open()
+        for email in emails:
+            message = EmailMultiAlternatives(
+                email.subject, email.body, email.from_email, email.to, connection=connection
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, 'text/html')
+            try:
+                # One message per call, over the connection opened above, so
+                # a failure is recorded against the right message
+                connection.send_messages([message])
+            except Exception as e:
+                logger.warning("Could not send email %s: %s", email.pk, e)
+                email.last_error = str(e)
+                failed.append(email)
+                if _connection_lost(e):
+                    connection.close()
+                    connection.open()
+            else:
+                sent.append(email)
+    except Exception as e:
+        # Couldn't (re)connect: everything not sent yet goes back to the queue
+        logger.warning("Email connection failed: %s", e)
+        done = {email.pk for email in sent + failed}
+        for email in emails:
+            if email.pk not in done:
+                email.last_error = str(e)
+                failed.append(email)
+    finally:
+        connection.close()
+
+    now = timezone.now()
+    for email in sent:
+        email.status = OutboundEmail.EmailStatus.SENT
+        email.sent_at = now
+        email.attempts += 1
+    for email in failed:
+        email.attempts += 1
+        if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            email.status = OutboundEmail.EmailStatus.FAILED
+            result.failed += 1
+        else:
+            delay = settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2 ** (email.attempts - 1)
+            email.next_attempt_at = now + timedelta(seconds=delay)
+            result.retried += 1
+    OutboundEmail.objects.bulk_update(
+        sent + failed,
+        ['status', 'sent_at', 'attempts', 'last_error', 'next_attempt_at'],
+    )
+    result.sent += len(sent)
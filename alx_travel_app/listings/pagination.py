@@ -0,0 +1,125 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first by ``created_at`` or by a client-chosen
+    ``?ordering=`` with the default keys as tie-breakers.
+
+    The cursor carries every ordering key of the row it points at, ending
+    with the primary key, and the next page is the rows after it:
+    ``WHERE (key, ..., pk) < (x, ..., y)``, a range scan on the indexes that
+    start with the first key. DRF's own cursor positions on the first key
+    only and steps over its ties with an OFFSET, which grows with the ties
+    of keys like ``price_per_night``; here deep pages cost the same as page
+    one whatever the ordering.
+    """
+
+    ordering = ("-created_at", "-pk")
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        # A client-chosen ordering (e.g. ?ordering=-avg_rating) has many ties;
+        # fall back to the default keys so every row has a unique position.
+        fields = {field.lstrip("-") for field in ordering}
+        return ordering + tuple(f for f in self.ordering if f.lstrip("-") not in fields)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor_position(queryset.model)
+
+        if reverse:
+            queryset = queryset.order_by(*(
+                term[1:] if term.startswith("-") else f"-{term}" for term in self.ordering
+            ))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        # One extra row tells whether there is a page beyond this one
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_following
+        else:
+            self.has_next, self.has_previous = has_following, position is not None
+
+        if self.page:
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position if self.cursor else None
+            self.previous_position = self.next_position = position
+        return self.page
+
+    def cursor_position(self, model):
+        """The ordering key values of the cursor, converted to their fields' types"""
+        if self.cursor is None or self.cursor.position is None:
+            return None
+        try:
+            values = json.loads(self.cursor.position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                self._field(model, term).to_python(value)
+                for term, value in zip(self.ordering, values)
+            ]
+        except (ValueError, ValidationError):
+            # Also a cursor from another ?ordering=
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _field(model, term):
+        name = term.lstrip("-")
+        return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+    def after(self, position, reverse):
+        """Rows after ``position`` in the order being read"""
+        terms = []
+        for term, value in zip(self.ordering, position):
+            descending = term.startswith("-") != reverse
+            terms.append((term.lstrip("-"), "lt" if descending else "gt", value))
+
+        # (a, b, c) > (x, y, z): a > x, or a = x and b > y, or ...
+        alternatives = []
+        for i, (name, lookup, value) in enumerate(terms):
+            equal = {prior: prior_value for prior, _, prior_value in terms[:i]}
+            alternatives.append(Q(**equal, **{f"{name}__{lookup}": value}))
+        # The bound on the first key alone lets the database seek the index
+        name, lookup, value = terms[0]
+        return Q(**{f"{name}__{lookup}e": value}) & reduce(or_, alternatives)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([
+            str(getattr(instance, term.lstrip("-"))) for term in ordering
+        ])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
@@ -0,0 +1,40 @@
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class InvalidLine:
+    """Stands in for an NDJSON line that isn't valid JSON"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one object per line.
+
+    The body is parsed lazily: ``request.data`` is a generator that reads the
+    stream a line at a time, so an import is never held in memory whole. A
+    line that isn't JSON becomes an ``InvalidLine`` rather than failing the
+    request, so it can be reported as a row error.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self._rows(stream, encoding)
+
+    def _rows(self, stream, encoding):
+        if stream is None:
+            return
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line.decode(encoding))
+            except ValueError as e:
+                yield InvalidLine(f"Invalid JSON: {e}")
@@ -0,0 +1,127 @@
+"""
+Payment initialization with Chapa.
+
+Shared by the synchronous ``PaymentViewSet.initialize`` path and the
+``initialize_payment_checkout`` Celery task; async views use
+``ainitialize_payment``.
+"""
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http.request import validate_host
+from django.utils import timezone
+
+from . import chapa
+from .models import Payment
+
+
+class PaymentInitializationError(Exception):
+    """Chapa answered but refused to create the transaction"""
+
+
+def check_notify_url(url):
+    """
+    Raise ``ValueError`` unless ``url`` is an https URL on one of
+    ``PAYMENT_NOTIFY_ALLOWED_HOSTS`` whose every address is public. The
+    result webhook is POSTed from inside our network, where any other URL
+    could reach internal services, loopback or the cloud metadata endpoint.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'https':
+        raise ValueError('notify_url must be an https URL')
+    host = parts.hostname
+    if not host or not validate_host(host, settings.PAYMENT_NOTIFY_ALLOWED_HOSTS):
+        raise ValueError(f'notify_url host {host!r} is not allowed')
+    try:
+        addresses = socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise ValueError(f"notify_url host {host!r} doesn't resolve")
+    for *_, sockaddr in addresses:
+        # IPv6 addresses may carry a scope, e.g. fe80::1%eth0
+        address = ipaddress.ip_address(sockaddr[0].split('%')[0])
+        if not address.is_global:
+            raise ValueError(f'notify_url host {host!r} resolves to a non-public address')
+
+
+def prepare_payment(payment):
+    """Fill in the customer details Chapa needs from the booking's user"""
+    booking = payment.booking
+    user = booking.user
+    payment.email = user.email
+    payment.first_name = user.first_name or 'Guest'
+    payment.last_name = user.last_name or 'User'
+    payment.payment_title = 'Booking Payment'
+    payment.description = f'Booking from {booking.start_date} to {booking.end_date}'
+
+
+def initialize_payment(payment, callback_url, return_url):
+    """
+    Create the Chapa transaction and store its checkout URL in one write.
+
+    Raises ``chapa.ChapaError`` if Chapa couldn't be reached, and
+    ``PaymentInitializationError`` (after marking the payment failed) if it
+    rejected the request. A payment another call initialized meanwhile
+    keeps that call's checkout URL.
+    """
+    response = chapa.get_client().initialize(_payload(payment, callback_url, return_url))
+    return _store_checkout(payment, response)
+
+
+async def ainitialize_payment(payment, callback_url, return_url):
+    """``initialize_payment`` for async views; only the write runs in a thread"""
+    response = await chapa.get_async_client().initialize(
+        _payload(payment, callback_url, return_url)
+    )
+    return await sync_to_async(_store_checkout)(payment, response)
+
+
+def _payload(payment, callback_url, return_url):
+    return {
+        'amount': str(payment.amount),
+        'currency': payment.currency,
+        'email': payment.email,
+        'first_name': payment.first_name,
+        'last_name': payment.last_name,
+        'phone_number': payment.phone_number,
+        'tx_ref': str(payment.id),
+        'callback_url': callback_url,
+        'return_url': return_url,
+        'customization': {
+            'title': 'Booking Payment',
+            'description': payment.description
+        }
+    }
+
+
+def fail_initialization(payment, **fields):
+    """
+    Mark ``payment`` failed, along with ``fields``, unless it has a checkout
+    URL by now; whether it was marked. A concurrent initialization may have
+    stored one since ``payment`` was read, and that payment isn't failed.
+    """
+    fields = {'status': Payment.PaymentStatus.FAILED, 'updated_at': timezone.now(), **fields}
+    if not Payment.objects.filter(pk=payment.pk, checkout_url__isnull=True).update(**fields):
+        return False
+    for name, value in fields.items():
+        setattr(payment, name, value)
+    return True
+
+
+def _store_checkout(payment, response):
+    if response.status_code != 200:
+        if not fail_initialization(payment, response_dump=response.data):
+            # Chapa refuses a tx_ref it has seen, e.g. from the call that
+            # stored the checkout URL
+            payment.refresh_from_db(fields=['status', 'checkout_url', 'response_dump', 'updated_at'])
+            return payment.checkout_url
+        raise PaymentInitializationError(
+            f"Chapa API error: {response.data.get('message', str(response.data))}"
+        )
+
+    payment.response_dump = response.data
+    payment.checkout_url = response.data['data']['checkout_url']
+    payment.save(update_fields=['checkout_url', 'response_dump', 'updated_at'])
+    return payment.checkout_url
@@ -0,0 +1,119 @@
+"""
+Pricing engine for listings.
+
+A night costs the listing's ``price_per_night`` unless a ``ListingRate``
+covers it. Rates are date ranges, optionally limited to some nights of the
+week, that either set the nightly price or multiply it, applied in
+``priority`` order.
+
+A quote reads the listing and the rates overlapping the stay in one query
+on the ``(listing, start_date, end_date)`` index. Each rate is then applied
+to the whole stay with a slice assignment per weekday, so the work grows
+with the number of rates rather than with a query or loop per night.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db.models import FilteredRelation, Q
+
+from .models import Listing, ListingRate
+
+CENT = Decimal('0.01')
+
+
+@dataclass(frozen=True)
+class Quote:
+    check_in: date
+    check_out: date
+    nightly: list  # price of each night from check_in
+    total: Decimal
+
+    def nights(self):
+        """``(date, price)`` for each night of the stay"""
+        return [(self.check_in + timedelta(days=i), price) for i, price in enumerate(self.nightly)]
+
+
+def quote(listing_id, check_in, check_out):
+    """Price the nights in ``[check_in, check_out)``; ``None`` if there is no such listing"""
+    rows = list(
+        Listing.objects.filter(pk=listing_id)
+        .annotate(
+            rate=FilteredRelation(
+                'rates',
+                condition=Q(rates__start_date__lt=check_out, rates__end_date__gt=check_in),
+            )
+        )
+        .order_by('rate__priority', 'rate__id')
+        .values_list(
+            'price_per_night', 'rate__start_date', 'rate__end_date',
+            'rate__weekdays', 'rate__price', 'rate__multiplier',
+        )
+    )
+    if not rows:
+        return None
+    # The rate columns are all NULL for a listing without matching rates
+    rates = [row[1:] for row in rows if row[1] is not None]
+    nightly = price_nights(rows[0][0], rates, check_in, check_out)
+    return Quote(check_in, check_out, nightly, sum(nightly, Decimal('0.00')))
+
+
+def quote_stays(stays):
+    """
+    Totals for many ``(listing, check_in, check_out)`` stays, e.g. a bulk
+    import, reading the rates of all their listings in one query.
+    """
+    if not stays:
+        return []
+    rates = defaultdict(list)
+    for listing_id, *rate in (
+        ListingRate.objects.filter(
+            listing__in={listing.pk for listing, _, _ in stays},
+            start_date__lt=max(check_out for _, _, check_out in stays),
+            end_date__gt=min(check_in for _, check_in, _ in stays),
+        )
+        .order_by('priority', 'id')
+        .values_list('listing_id', 'start_date', 'end_date', 'weekdays', 'price', 'multiplier')
+    ):
+        rates[listing_id].append(rate)
+    return [
+        sum(price_nights(listing.price_per_night, rates[listing.pk], check_in, check_out),
+            Decimal('0.00'))
+        for listing, check_in, check_out in stays
+    ]
+
+
+def price_nights(base_price, rates, check_in, check_out):
+    """
+    Nightly prices for ``[check_in, check_out)``.
+
+    ``rates`` are ``(start_date, end_date, weekdays, price, multiplier)``
+    tuples in the order they apply.
+    """
+    count = (check_out - check_in).days
+    prices = [base_price] * count
+    for start_date, end_date, weekdays, price, multiplier in rates:
+        first = max((start_date - check_in).days, 0)
+        last = min((end_date - check_in).days, count)
+        for nights in _slices(check_in, first, last, weekdays):
+            if price is not None:
+                prices[nights] = [price] * len(range(*nights.indices(count)))
+            else:
+                prices[nights] = [
+                    (night * multiplier).quantize(CENT, ROUND_HALF_UP) for night in prices[nights]
+                ]
+    return prices
+
+
+def _slices(check_in, first, last, weekdays):
+    """Slices of the night list covering ``weekdays`` between ``first`` and ``last``"""
+    if first >= last:
+        return
+    if weekdays == ListingRate.EVERY_NIGHT:
+        yield slice(first, last)
+        return
+    first_weekday = (check_in + timedelta(days=first)).weekday()
+    for weekday in range(7):
+        if weekdays & 1 << weekday:
+            yield slice(first + (weekday - first_weekday) % 7, last, 7)
@@ -0,0 +1,111 @@
+"""
+Denormalized rating aggregates on ``Listing``.
+
+``review_count`` and ``rating_sum`` are adjusted with ``F()`` expressions as
+reviews are created, edited and deleted, and ``avg_rating`` is derived from
+them in the same transaction; it is 0 for a listing without reviews.
+Writes that bypass model signals (``bulk_create``, ``QuerySet.update``, raw
+SQL) can leave them stale; ``rebuild_ratings`` and the ``rebuild_ratings``
+management command recompute them from the reviews.
+"""
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from . import cache
+from .models import Listing, Review
+
+AVERAGE = ExpressionWrapper(
+    Coalesce(Cast("rating_sum", FloatField()) / NullIf("review_count", 0), 0.0),
+    output_field=DecimalField(max_digits=3, decimal_places=2),
+)
+
+
+def adjust_rating(listing_id, count_delta, sum_delta):
+    """Add a change in review count and rating total to a listing"""
+    listing = Listing.objects.filter(pk=listing_id)
+    with transaction.atomic():
+        # Two statements: MySQL evaluates SET clauses left to right, so the
+        # average can't reliably be computed in the same UPDATE.
+        listing.update(
+            review_count=F("review_count") + count_delta,
+            rating_sum=F("rating_sum") + sum_delta,
+        )
+        # The embedded reviews changed, so the listing counts as modified
+        listing.update(avg_rating=AVERAGE, updated_at=timezone.now())
+
+
+def review_saving(review):
+    """
+    Read the stored listing and rating of a review about to be updated, if
+    they weren't remembered when it was loaded (e.g. with ``only()``). After
+    the save the row already holds the new values.
+    """
+    if not review._state.adding and getattr(review, "_stored_rating", None) is None:
+        review._stored_rating = (
+            Review.objects.values_list("property_id", "rating").filter(pk=review.pk).first()
+        )
+
+
+def review_saved(review, created):
+    if created:
+        adjust_rating(review.property_id, 1, review.rating)
+    else:
+        previous = getattr(review, "_stored_rating", None)
+        if previous is not None and previous != (review.property_id, review.rating):
+            with transaction.atomic():
+                adjust_rating(previous[0], -1, -previous[1])
+                adjust_rating(review.property_id, 1, review.rating)
+    review.remember_rating()
+
+
+def review_deleted(review):
+    adjust_rating(review.property_id, -1, -review.rating)
+
+
+def rebuild_ratings(listings=None, batch_size=1000):
+    """
+    Recompute the aggregates from the reviews table in batches.
+
+    Returns the number of listings whose stored values were wrong.
+    """
+    if listings is None:
+        listings = Listing.objects.all()
+    listing_ids = listings.order_by("pk").values_list("pk", flat=True)
+
+    fixed = 0
+    batch = []
+    for listing_id in listing_ids.iterator(chunk_size=batch_size):
+        batch.append(listing_id)
+        if len(batch) == batch_size:
+            fixed += _rebuild_batch(batch)
+            batch = []
+    if batch:
+        fixed += _rebuild_batch(batch)
+    return fixed
+
+
+def _rebuild_batch(listing_ids):
+    totals = {
+        row["property_id"]: (row["count"], row["total"])
+        for row in Review.objects.filter(property_id__in=listing_ids)
+        .values("property_id")
+        .annotate(count=Count("pk"), total=Sum("rating"))
+    }
+    with transaction.atomic():
+        listings = Listing.objects.select_for_update().filter(pk__in=listing_ids)
+        stale = []
+        for listing in listings.only("pk", "review_count", "rating_sum"):
+            actual = totals.get(listing.pk, (0, 0))
+            if (listing.review_count, listing.rating_sum) != actual:
+                listing.review_count, listing.rating_sum = actual
+                stale.append(listing)
+        Listing.objects.bulk_update(stale, ["review_count", "rating_sum"])
+        # Derive every average with the same expression used by adjust_rating
+        listings.update(avg_rating=AVERAGE)
+        if stale:
+            # Cached responses would show the drifted values until they expire
+            stale_ids = [listing.pk for listing in stale]
+            transaction.on_commit(lambda: cache.invalidate_listings(stale_ids))
+    return len(stale)
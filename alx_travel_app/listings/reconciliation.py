@@ -0,0 +1,154 @@
+"""
+Background verification of pending Chapa payments.
+
+Checkouts that are still pending ``PAYMENT_RECONCILE_STALE_AFTER`` seconds
+after their last update are verified with Chapa in chunks, instead of
+waiting for the client to call ``PaymentViewSet.verify``. Each chunk is
+verified concurrently and its results are written in one transaction.
+
+Several workers may run this at once: the write locks the payments with
+``SKIP LOCKED`` where the database supports it and only touches rows that
+are still pending, so a payment is completed (and emailed about) once.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import chapa
+from .db import skip_locked
+from .models import Booking, Payment
+
+logger = logging.getLogger(__name__)
+
+# Chapa's verify endpoint reports the transaction state in data.status
+CHAPA_STATUSES = {
+    'success': Payment.PaymentStatus.COMPLETED,
+    'failed': Payment.PaymentStatus.FAILED,
+}
+
+
+@dataclass
+class ReconciliationResult:
+    checked: int = 0
+    completed: list = field(default_factory=list)  # (payment id, email)
+    failed: int = 0
+    unchanged: int = 0
+    errors: int = 0
+
+
+def stale_payments(now=None):
+    """Initialized payments that have been pending for too long"""
+    now = now or timezone.now()
+    return Payment.objects.filter(
+        status=Payment.PaymentStatus.PENDING,
+        updated_at__lt=now - timedelta(seconds=settings.PAYMENT_RECONCILE_STALE_AFTER),
+        created_at__gte=now - timedelta(seconds=settings.PAYMENT_RECONCILE_MAX_AGE),
+        checkout_url__isnull=False,
+    )
+
+
+def reconcile_pending_payments(chunk_size=None, now=None, before_chunk=None):
+    """
+    Verify every stale payment with Chapa and store the outcome.
+
+    ``before_chunk`` is called before each chunk is verified; the run stops
+    early when it returns false.
+    """
+    now = now or timezone.now()
+    chunk_size = chunk_size or settings.PAYMENT_RECONCILE_CHUNK_SIZE
+    result = ReconciliationResult()
+    for ids in _chunks(stale_payments(now), chunk_size):
+        if before_chunk is not None and not before_chunk():
+            break
+        responses = verify_payments(ids)
+        result.errors += len(ids) - len(responses)
+        apply_verifications(responses, now, result)
+    return result
+
+
+def _chunks(queryset, size):
+    """Yield primary keys in (updated_at, id) order, one index range at a time"""
+    queryset = queryset.order_by('updated_at', 'id').values_list('updated_at', 'id')
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            page = page.filter(
+                Q(updated_at__gt=last[0]) | Q(updated_at=last[0], id__gt=last[1])
+            )
+        rows = list(page[:size])
+        if not rows:
+            return
+        yield [pk for _, pk in rows]
+        last = rows[-1]
+
+
+def verify_payments(ids):
+    """Verify payments in parallel; failed calls are left out of the result"""
+    client = chapa.get_client()
+
+    def verify(pk):
+        try:
+            return pk, client.verify(pk)
+        except chapa.ChapaError as e:
+            logger.warning("Could not verify payment %s: %s", pk, e)
+            return pk, None
+
+    workers = max(1, min(settings.PAYMENT_RECONCILE_CONCURRENCY, len(ids)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return {
+            pk: response for pk, response in pool.map(verify, ids)
+            # A 5xx says nothing about the payment; try again next run
+            if response is not None and response.status_code < 500
+        }
+
+
+def _outcome(response):
+    if not response.ok:
+        # e.g. "Payment not paid yet"
+        return Payment.PaymentStatus.PENDING
+    data = response.data.get('data') or {}
+    return CHAPA_STATUSES.get(data.get('status'), Payment.PaymentStatus.PENDING)
+
+
+def apply_verifications(responses, now=None, result=None):
+    """Write the verified statuses of one chunk in a single transaction"""
+    now = now or timezone.now()
+    if result is None:
+        result = ReconciliationResult()
+    if not responses:
+        return result
+    with transaction.atomic():
+        payments = list(skip_locked(
+            Payment.objects.filter(pk__in=responses, status=Payment.PaymentStatus.PENDING)
+            .select_related('booking')
+        ))
+        bookings = []
+        for payment in payments:
+            response = responses[payment.pk]
+            status = _outcome(response)
+            # Bumping updated_at also pushes still-pending payments to the
+            # back of the queue until they are stale again
+            payment.updated_at = now
+            if status == Payment.PaymentStatus.PENDING:
+                result.unchanged += 1
+                continue
+            payment.status = status
+            payment.response_dump = response.data
+            if status == Payment.PaymentStatus.COMPLETED:
+                payment.booking.status = Booking.BookingStatus.CONFIRMED
+                bookings.append(payment.booking)
+                result.completed.append((str(payment.pk), payment.email))
+            else:
+                result.failed += 1
+
+        Payment.objects.bulk_update(payments, ['status', 'response_dump', 'updated_at'])
+        Booking.objects.bulk_update(bookings, ['status'])
+    result.checked += len(payments)
+    return result
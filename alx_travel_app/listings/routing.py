@@ -0,0 +1,141 @@
+"""
+Read replica routing.
+
+``ReplicaRouter`` sends the reads of safe requests (GET, HEAD, OPTIONS) for
+the listings app's models to one of ``REPLICA_DATABASES``, chosen once per
+request so a request never mixes replicas that lag by different amounts.
+Everything else reads from the primary:
+
+- requests that may write (POST, PUT, PATCH, DELETE), including the
+  overlap checks that guard booking writes;
+- reads after the request has written, or inside a transaction;
+- requests from a client that wrote less than ``REPLICA_STICKY_SECONDS``
+  ago, so users see their own writes despite replication lag; a request
+  that writes sets a cookie that pins its client for that long;
+- anything outside a request: Celery tasks usually run just after the
+  write that queued them, and management commands read what they wrote;
+- code in a ``primary()`` block.
+
+All writes go to the primary, and replicas are never migrated.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+# Apps whose models replicas serve; sessions and the Celery tables stay on the primary
+REPLICA_APPS = {'listings'}
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class RequestRouting:
+    """How the current request reads"""
+
+    __slots__ = ('replicas', 'replica', 'wrote')
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.replica = None
+        self.wrote = False
+
+
+_request = ContextVar('replica_routing', default=None)
+_pinned = ContextVar('primary_pinned', default=False)
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block, e.g. for checks a write depends on"""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def request_routing(request):
+    """Route the reads made inside the block as ``request``'s"""
+    replicas = (
+        bool(settings.REPLICA_DATABASES)
+        and request.method in SAFE_METHODS
+        and PIN_COOKIE not in request.COOKIES
+    )
+    token = _request.set(RequestRouting(replicas))
+    try:
+        yield _request.get()
+    finally:
+        _request.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related objects come from where the object did
+            return instance._state.db
+        routing = _request.get()
+        if (
+            routing is None
+            or not routing.replicas
+            or _pinned.get()
+            or model._meta.app_label not in REPLICA_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        if routing.replica is None:
+            routing.replica = random.choice(settings.REPLICA_DATABASES)
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _request.get()
+        if routing is not None:
+            # The rest of the request reads what it wrote
+            routing.wrote = True
+            routing.replicas = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.REPLICA_DATABASES
+
+
+class ReplicaRoutingMiddleware:
+    """Routes each request's reads; pins a client that wrote to the primary for a while"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with request_routing(request) as routing:
+            response = self.get_response(request)
+        return self.pin(routing, response)
+
+    async def __acall__(self, request):
+        with request_routing(request) as routing:
+            response = await self.get_response(request)
+        return self.pin(routing, response)
+
+    @staticmethod
+    def pin(routing, response):
+        if routing.wrote and settings.REPLICA_DATABASES and settings.REPLICA_STICKY_SECONDS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
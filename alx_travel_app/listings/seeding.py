@@ -0,0 +1,225 @@
+"""
+Deterministic bulk generation of sample data for the ``seed`` command.
+
+Rows are generated in blocks of ``batch_size``, each from its own random
+generator seeded with ``(seed, kind, block)``. The data therefore depends
+only on the options, not on how many processes generate it, so blocks can
+be built by a pool of workers while this process inserts them with
+``bulk_create``. Primary keys are derived the same way, which makes a
+second run with the same options a no-op.
+
+Bookings never overlap: the k-th booking of a listing falls inside the
+k-th ``SLOT_DAYS``-day slot after ``start``.
+"""
+import multiprocessing
+import random
+import time
+import uuid
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from faker import Faker
+
+from . import cache, ratings
+from .models import Booking, Listing, Review
+
+User = get_user_model()
+
+PASSWORD = "password123"
+SLOT_DAYS = 14
+MAX_NIGHTS = 7
+NAMESPACE = uuid.UUID("4b6f3c52-3f43-4a57-9d0e-2f8d6c1e7a90")
+CITIES = [
+    "Addis Ababa", "Adama", "Bahir Dar", "Bishoftu", "Dire Dawa",
+    "Gondar", "Hawassa", "Jimma", "Lalibela", "Mekelle",
+]
+STATUSES = [
+    (Booking.BookingStatus.CONFIRMED, 6),
+    (Booking.BookingStatus.PENDING, 3),
+    (Booking.BookingStatus.CANCELED, 1),
+]
+
+# One per process; reseeded for every block
+fake = Faker()
+
+
+@dataclass(frozen=True)
+class SeedOptions:
+    users: int
+    listings: int
+    bookings: int
+    seed: int = 42
+    start: date = None
+    batch_size: int = 1000
+
+    def blocks(self, count):
+        return range((count + self.batch_size - 1) // self.batch_size)
+
+    def indexes(self, count, block):
+        return range(block * self.batch_size, min(count, (block + 1) * self.batch_size))
+
+
+def _rng(options, kind, block):
+    rng = random.Random(f"{options.seed}:{kind}:{block}")
+    fake.seed_instance(rng.getrandbits(64))
+    return rng
+
+
+def _key(options, kind, index):
+    return uuid.uuid5(NAMESPACE, f"{options.seed}:{kind}:{index}")
+
+
+def username(options, index):
+    return f"seed{options.seed}_user{index}"
+
+
+def host_index(options, listing):
+    return listing % options.users
+
+
+def listing_price(options, listing):
+    return random.Random(f"{options.seed}:price:{listing}").randint(50, 500)
+
+
+def generate_users(options, block):
+    _rng(options, "users", block)
+    return [
+        (index, fake.first_name(), fake.last_name(), fake.email())
+        for index in options.indexes(options.users, block)
+    ]
+
+
+def generate_listings(options, block):
+    rng = _rng(options, "listings", block)
+    return [
+        (index, fake.company(), fake.sentence(nb_words=12),
+         f"{rng.choice(CITIES)}, {fake.street_address()}")
+        for index in options.indexes(options.listings, block)
+    ]
+
+
+def generate_bookings(options, block):
+    """Bookings of a block, and a review for about half of the confirmed ones"""
+    rng = _rng(options, "bookings", block)
+    statuses, weights = zip(*STATUSES)
+    bookings, reviews = [], []
+    for index in options.indexes(options.bookings, block):
+        listing, slot = index % options.listings, index // options.listings
+        nights = rng.randint(1, MAX_NIGHTS)
+        start = options.start + timedelta(
+            days=slot * SLOT_DAYS + rng.randint(0, SLOT_DAYS - nights)
+        )
+        guest = rng.randrange(options.users)
+        if guest == host_index(options, listing) and options.users > 1:
+            guest = (guest + 1) % options.users
+        status = rng.choices(statuses, weights)[0]
+        bookings.append((index, listing, guest, start, nights, status))
+        if status == Booking.BookingStatus.CONFIRMED and rng.random() < 0.5:
+            reviews.append((index, listing, guest, rng.randint(1, 5), fake.sentence()))
+    return bookings, reviews
+
+
+def seed(options, workers=1, log=print):
+    """Insert the users, listings and bookings described by ``options``"""
+    if options.start is None:
+        options = replace(options, start=date.today())
+    steps = [
+        ("users", options.users, generate_users, _insert_users),
+        ("listings", options.listings, generate_listings, _insert_listings),
+        ("bookings", options.bookings, generate_bookings, _insert_bookings),
+    ]
+    pool = None
+    if workers > 1:
+        # Workers only compute rows and never touch the inherited connections
+        pool = multiprocessing.get_context("fork").Pool(workers)
+    try:
+        state = {"password": make_password(PASSWORD)}
+        for kind, count, generate, insert in steps:
+            started = time.perf_counter()
+            blocks = options.blocks(count)
+            work = partial(generate, options)
+            for rows in (pool.imap(work, blocks) if pool else map(work, blocks)):
+                with transaction.atomic():
+                    insert(options, rows, state)
+            log(f"Created {count} {kind} in {time.perf_counter() - started:.1f}s")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    if options.bookings:
+        # bulk_create skips the signals that maintain the rating aggregates
+        ratings.rebuild_ratings()
+    cache.invalidate_catalogue()
+
+
+def _insert_users(options, rows, state):
+    User.objects.bulk_create([
+        User(
+            username=username(options, index),
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            password=state["password"],
+            # Every tenth user is staff
+            is_staff=index % 10 == 0,
+        )
+        for index, first_name, last_name, email in rows
+    ], ignore_conflicts=True)
+
+
+def _user_ids(options, state):
+    """Primary keys of the seeded users by index, read once"""
+    if "user_ids" not in state:
+        prefix = username(options, "")
+        ids = dict(User.objects.filter(username__startswith=prefix).values_list("username", "pk"))
+        state["user_ids"] = [ids[username(options, index)] for index in range(options.users)]
+    return state["user_ids"]
+
+
+def _insert_listings(options, rows, state):
+    user_ids = _user_ids(options, state)
+    Listing.objects.bulk_create([
+        Listing(
+            property_id=_key(options, "listing", index),
+            host_id=user_ids[host_index(options, index)],
+            name=name,
+            description=description,
+            location=location,
+            price_per_night=listing_price(options, index),
+        )
+        for index, name, description, location in rows
+    ], ignore_conflicts=True)
+
+
+def _insert_bookings(options, rows, state):
+    bookings, reviews = rows
+    user_ids = _user_ids(options, state)
+    Booking.objects.bulk_create([
+        Booking(
+            booking_id=_key(options, "booking", index),
+            property_id=_key(options, "listing", listing),
+            user_id=user_ids[guest],
+            start_date=start,
+            end_date=start + timedelta(days=nights),
+            # Seeded listings have no rates, so every night costs the base price
+            total_price=listing_price(options, listing) * nights,
+            status=status,
+        )
+        for index, listing, guest, start, nights, status in bookings
+    ], ignore_conflicts=True)
+    # A guest reviews a listing once, however often they stayed
+    Review.objects.bulk_create([
+        Review(
+            review_id=_key(options, "review", index),
+            property_id=_key(options, "listing", listing),
+            user_id=user_ids[guest],
+            rating=rating,
+            comment=comment,
+        )
+        for index, listing, guest, rating, comment in reviews
+    ], ignore_conflicts=True)
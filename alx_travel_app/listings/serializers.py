@@ -1,16 +1,30 @@
+import uuid
+
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from . import availability, payments, pricing
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import Listing, Booking, Review, Payment
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ["review_id", "property", "user", "rating", "comment", "created_at"]
         read_only_fields = ["review_id", "created_at"]
 
 
-class ListingSerializer(serializers.ModelSerializer):
+class AverageRatingField(serializers.DecimalField):
+    """``Listing.avg_rating``, stored as 0 until the first review and shown as null"""
+
+    def to_representation(self, value):
+        return super().to_representation(value) if value else None
+
+
+class ListingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     reviews = ReviewSerializer(many=True, read_only=True)
+    avg_rating = AverageRatingField(max_digits=3, decimal_places=2, read_only=True)
 
     class Meta:
         model = Listing
@@ -21,14 +35,22 @@ class ListingSerializer(serializers.ModelSerializer):
             "description",
             "location",
             "price_per_night",
+            "review_count",
+            "avg_rating",
             "created_at",
             "updated_at",
             "reviews",
         ]
-        read_only_fields = ["property_id", "host", "created_at", "updated_at"]
+        read_only_fields = [
+            "property_id", "host", "review_count", "avg_rating", "created_at", "updated_at"
+        ]
+        # Left out of list responses unless asked for with ?expand=
+        expandable = ["reviews"]
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    UNAVAILABLE = "The listing is already booked for some of these dates"
+
     class Meta:
         model = Booking
         fields = [
@@ -41,16 +63,187 @@ class BookingSerializer(serializers.ModelSerializer):
             "status",
             "created_at",
         ]
-        read_only_fields = ["booking_id", "user", "created_at"]
+        # Priced on the server from the listing's rates, never by the client
+        read_only_fields = ["booking_id", "user", "total_price", "created_at"]
+
+    def validate(self, data):
+        """Validate booking dates and that the listing is free for them"""
+        booking = self.merged(data)
+        if booking["start_date"] >= booking["end_date"]:
+            raise serializers.ValidationError("End date must be after start date")
+        self.check_available(booking)
+        if self.instance is None or data.keys() & {"property", "start_date", "end_date"}:
+            data["total_price"] = pricing.quote(
+                booking["property"].pk, booking["start_date"], booking["end_date"]
+            ).total
+        return data
+
+    def create(self, validated_data):
+        # Re-check under the listing lock; validate() only saw a snapshot
+        with availability.lock_listing(validated_data["property"].pk):
+            self.check_available(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        booking = self.merged(validated_data)
+        with availability.lock_listing(booking["property"].pk):
+            self.check_available(booking)
+            return super().update(instance, validated_data)
+
+    def merged(self, data):
+        """Incoming values layered over the instance being updated, if any"""
+        booking = {}
+        if self.instance is not None:
+            booking = {
+                "property": self.instance.property,
+                "start_date": self.instance.start_date,
+                "end_date": self.instance.end_date,
+                "status": self.instance.status,
+            }
+        booking.update(data)
+        return booking
+
+    def check_available(self, booking):
+        status = booking.get("status", Booking.BookingStatus.PENDING)
+        if status not in availability.BLOCKING_STATUSES:
+            return
+        if not availability.is_available(
+            booking["property"].pk,
+            booking["start_date"],
+            booking["end_date"],
+            exclude=getattr(self.instance, "pk", None),
+        ):
+            raise serializers.ValidationError(self.UNAVAILABLE)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates a chunk of a bulk import row by row and keeps the valid rows,
+    instead of rejecting the whole list when one of them is invalid.
+    ``validated_data`` holds ``(index, data)`` pairs and ``row_errors`` maps
+    the index of each invalid row to its errors.
+    """
+
+    def to_internal_value(self, data):
+        self.row_errors = {}
+        rows = []
+        for index, item in enumerate(data):
+            if not isinstance(item, dict):
+                self.row_errors[index] = {
+                    api_settings.NON_FIELD_ERRORS_KEY: [getattr(item, "error", "Expected an object")]
+                }
+                continue
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as e:
+                self.row_errors[index] = e.detail
+        return rows
+
+
+class PreloadedListingField(serializers.PrimaryKeyRelatedField):
+    """A listing looked up in ``context["listings"]`` rather than by a query per row"""
+
+    def to_internal_value(self, data):
+        try:
+            listing = self.context["listings"].get(str(uuid.UUID(str(data))))
+        except ValueError:
+            listing = None
+        if listing is None:
+            self.fail("does_not_exist", pk_value=data)
+        return listing
+
+
+class BulkBookingSerializer(BookingSerializer):
+    """
+    A row of a bulk booking import. Listings are loaded, and availability and
+    prices checked, once per chunk by ``listings.bulk`` instead of per row.
+    """
+    property = PreloadedListingField(queryset=Listing.objects.all())
 
     def validate(self, data):
-        """Validate booking dates"""
         if data["start_date"] >= data["end_date"]:
             raise serializers.ValidationError("End date must be after start date")
         return data
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+def validate_date_range(start_date, end_date, start_name="from", end_name="to"):
+    """Check a ``[start, end)`` night range is ordered and not too long"""
+    if start_date >= end_date:
+        raise serializers.ValidationError(f"'{end_name}' must be after '{start_name}'")
+    if (end_date - start_date).days > settings.AVAILABILITY_MAX_NIGHTS:
+        raise serializers.ValidationError(
+            f"Date range can't exceed {settings.AVAILABILITY_MAX_NIGHTS} nights"
+        )
+
+
+class DateRangeQuerySerializer(serializers.Serializer):
+    """Validates ``?from=&to=`` query parameters; ``to`` is the check-out day"""
+
+    def get_fields(self):
+        # ``from`` is a keyword, so the fields can't be declared as attributes
+        return {
+            "from": serializers.DateField(),
+            "to": serializers.DateField(),
+        }
+
+    def validate(self, data):
+        validate_date_range(data["from"], data["to"])
+        return data
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Validates the ``?as=&status=&from=&to=`` parameters of the export
+    actions; ``from`` and ``to`` bound the creation day, ``to`` exclusive.
+    """
+
+    def __init__(self, *args, statuses=(), **kwargs):
+        self.statuses = statuses
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        # ``as`` and ``from`` are keywords, so the fields can't be declared as attributes
+        return {
+            "as": serializers.ChoiceField(choices=["csv", "ndjson"], default="csv"),
+            "status": serializers.ChoiceField(choices=self.statuses, required=False),
+            "from": serializers.DateField(required=False),
+            "to": serializers.DateField(required=False),
+        }
+
+    def validate(self, data):
+        if "from" in data and "to" in data and data["from"] >= data["to"]:
+            raise serializers.ValidationError("'to' must be after 'from'")
+        return data
+
+
+class ListingSearchQuerySerializer(serializers.Serializer):
+    """Validates the catalogue search and filter query parameters"""
+    search = serializers.CharField(required=False, max_length=255)
+    location = serializers.CharField(required=False, max_length=255)
+    min_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    max_price = serializers.DecimalField(required=False, max_digits=10, decimal_places=2)
+    min_rating = serializers.DecimalField(
+        required=False, max_digits=3, decimal_places=2, min_value=1, max_value=5
+    )
+    available_from = serializers.DateField(required=False)
+    available_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        min_price, max_price = data.get("min_price"), data.get("max_price")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise serializers.ValidationError("'max_price' must not be below 'min_price'")
+
+        dates = [data.get("available_from"), data.get("available_to")]
+        if any(dates) and not all(dates):
+            raise serializers.ValidationError(
+                "'available_from' and 'available_to' must be given together"
+            )
+        if all(dates):
+            validate_date_range(*dates, "available_from", "available_to")
+        return data
+
+
+class PaymentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Payment
         fields = [
@@ -64,3 +257,21 @@ class PaymentSerializer(serializers.ModelSerializer):
             'id', 'response_dump', 'checkout_url',
             'status', 'created_at', 'updated_at'
         ]
+        # Left out of list responses unless asked for with ?expand=
+        expandable = ['response_dump']
+
+
+class PaymentInitializeSerializer(serializers.Serializer):
+    """Options for ``POST /api/payments/{id}/initialize/``"""
+    notify_url = serializers.URLField(
+        required=False,
+        help_text="Webhook that receives the initialization result; https, "
+                  "on a host in PAYMENT_NOTIFY_ALLOWED_HOSTS",
+    )
+
+    def validate_notify_url(self, value):
+        try:
+            payments.check_notify_url(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
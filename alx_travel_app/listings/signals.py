@@ -0,0 +1,51 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache, ratings
+from .models import Booking, Listing, ListingRate, Review
+
+
+@receiver(pre_save, sender=Review)
+def remember_rating_before_save(sender, instance, raw, **kwargs):
+    if not raw:
+        ratings.review_saving(instance)
+
+
+@receiver(post_save, sender=Review)
+def update_listing_rating_on_save(sender, instance, created, raw, **kwargs):
+    # Fixtures carry their own listing aggregates
+    if not raw:
+        ratings.review_saved(instance, created)
+
+
+@receiver(post_delete, sender=Review)
+def update_listing_rating_on_delete(sender, instance, **kwargs):
+    ratings.review_deleted(instance)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_cache(sender, instance, **kwargs):
+    # After commit, so a concurrent read can't re-cache the old rows
+    transaction.on_commit(lambda: cache.invalidate_listing(instance.pk))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviewed_listing_cache(sender, instance, **kwargs):
+    transaction.on_commit(lambda: cache.invalidate_listing(instance.property_id))
+
+
+@receiver(post_save, sender=ListingRate)
+@receiver(post_delete, sender=ListingRate)
+def invalidate_rated_listing_cache(sender, instance, **kwargs):
+    # Rates change the listing's quotes
+    transaction.on_commit(lambda: cache.invalidate_listing(instance.listing_id))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_catalogue_cache(sender, instance, **kwargs):
+    # Bookings change the results of the availability filter
+    transaction.on_commit(cache.invalidate_catalogue)
@@ -0,0 +1,155 @@
+"""
+Celery task metrics, in the same Prometheus format as the request metrics.
+
+Every published task is stamped with the time it was sent. When a worker
+starts it, the wait since then (or since its ETA, for a countdown or a
+retry) is observed as queue wait; when it finishes, its run time and
+outcome (success, failure or retry) are recorded per task name, and
+failures are counted by exception type.
+
+A worker serves these on ``TASK_METRICS_PORT``. A prefork worker runs tasks
+in child processes, so set ``PROMETHEUS_MULTIPROC_DIR`` for it: the port
+then serves the values of every child, and a web process using the same
+directory includes them in ``/metrics``. ``manage.py task_metrics`` prints
+a live summary from that port.
+"""
+import logging
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from celery.signals import (
+    before_task_publish, task_failure, task_postrun, task_prerun, worker_ready,
+)
+from django.conf import settings
+from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client.parser import text_string_to_metric_families
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+WAIT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+    float('inf'),
+)
+
+QUEUE_WAIT = Histogram(
+    'celery_task_queue_wait_seconds', 'Time tasks waited between being sent and starting',
+    ['task'], buckets=WAIT_BUCKETS,
+)
+RUNTIME = Histogram('celery_task_runtime_seconds', 'Time tasks took to run', ['task'])
+FINISHED = Counter('celery_tasks', 'Task runs by outcome', ['task', 'state'])
+FAILURES = Counter('celery_task_failures', 'Failed task runs by exception', ['task', 'exception'])
+
+
+@before_task_publish.connect
+def stamp_sent_at(headers=None, **kwargs):
+    headers['sent_at'] = time.time()
+
+
+def _sent_at(request):
+    """When the running task was sent, or became due if it had an ETA"""
+    # A worker turns message headers into request attributes; apply() doesn't
+    sent_at = getattr(request, 'sent_at', None) or (request.headers or {}).get('sent_at')
+    if sent_at is None:
+        return None
+    if request.eta:
+        eta = request.eta
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        sent_at = max(sent_at, eta.timestamp())
+    return sent_at
+
+
+@task_prerun.connect
+def task_started(task=None, **kwargs):
+    sent_at = _sent_at(task.request)
+    if sent_at is not None:
+        QUEUE_WAIT.labels(task.name).observe(max(time.time() - sent_at, 0))
+    task.request.metrics_started = time.perf_counter()
+
+
+@task_postrun.connect
+def task_finished(task=None, state=None, **kwargs):
+    started = getattr(task.request, 'metrics_started', None)
+    if started is not None:
+        RUNTIME.labels(task.name).observe(time.perf_counter() - started)
+    FINISHED.labels(task.name, (state or 'unknown').lower()).inc()
+
+
+@task_failure.connect
+def task_failed(sender=None, exception=None, **kwargs):
+    FAILURES.labels(sender.name, type(exception).__name__).inc()
+
+
+@worker_ready.connect
+def serve_metrics(**kwargs):
+    if not settings.TASK_METRICS_PORT:
+        return
+    try:
+        start_http_server(settings.TASK_METRICS_PORT, registry=registry())
+    except OSError as e:
+        # Taken, e.g. by another worker on this host
+        logger.warning("Task metrics not served on port %s: %s", settings.TASK_METRICS_PORT, e)
+
+
+@dataclass
+class TaskSummary:
+    """One task's metrics; histograms as cumulative ``(upper bound, count)`` buckets"""
+    states: dict = field(default_factory=lambda: defaultdict(int))
+    failures: dict = field(default_factory=dict)
+    queue_wait: list = field(default_factory=list)
+    runtime: list = field(default_factory=list)
+
+    @property
+    def runs(self):
+        return sum(self.states.values())
+
+
+def summarize(text, prefix=''):
+    """Per-task summaries of the task metrics in a ``/metrics`` page, for tasks named ``prefix...``"""
+    tasks = defaultdict(TaskSummary)
+    histograms = {
+        'celery_task_queue_wait_seconds_bucket': 'queue_wait',
+        'celery_task_runtime_seconds_bucket': 'runtime',
+    }
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            name = sample.labels.get('task', '')
+            if not name.startswith(prefix):
+                continue
+            summary = tasks[name[len(prefix):]]
+            if sample.name == 'celery_tasks_total':
+                summary.states[sample.labels['state']] += int(sample.value)
+            elif sample.name == 'celery_task_failures_total':
+                summary.failures[sample.labels['exception']] = int(sample.value)
+            elif sample.name in histograms:
+                getattr(summary, histograms[sample.name]).append(
+                    (float(sample.labels['le']), sample.value)
+                )
+    for summary in tasks.values():
+        summary.queue_wait.sort()
+        summary.runtime.sort()
+    return dict(tasks)
+
+
+def quantile(buckets, q):
+    """
+    Estimate a quantile from cumulative buckets, interpolating within the
+    bucket it falls in as Prometheus' ``histogram_quantile`` does; ``None``
+    without observations.
+    """
+    if not buckets or not buckets[-1][1]:
+        return None
+    rank = q * buckets[-1][1]
+    lower, below = 0.0, 0
+    for bound, count in buckets:
+        if count >= rank and count > below:
+            if math.isinf(bound):
+                return lower
+            return lower + (bound - lower) * (rank - below) / (count - below)
+        lower, below = bound, count
+    return lower
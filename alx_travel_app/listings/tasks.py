@@ -1,67 +1,74 @@
+import math
+import uuid
+
+import requests
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.cache import cache
 from django.conf import settings
-from .models import Payment
+from django.db import transaction
+from . import chapa, emails, locks, outbox, payments, reconciliation
+from .models import ChapaWebhookEvent, Payment
+from .payments import initialize_payment, PaymentInitializationError
+
+# Set while a drain is scheduled, so a burst of emails triggers one drain
+DRAIN_SCHEDULED_KEY = 'email:outbox:drain-scheduled'
+
+
+def queue_email(message, to):
+    """Add a rendered message to the outbox and make sure a drain is on its way"""
+    outbox.queue_email(message.subject, message.body, to, html_body=message.html_body)
+    if cache.add(DRAIN_SCHEDULED_KEY, True, timeout=settings.EMAIL_OUTBOX_FLUSH_DELAY * 10):
+        drain_email_outbox.apply_async(countdown=settings.EMAIL_OUTBOX_FLUSH_DELAY)
+
+
+@shared_task
+def drain_email_outbox():
+    """Send every due outbox message in batches over one SMTP connection each"""
+    # Cleared before claiming, so anything queued from now on schedules a new drain
+    cache.delete(DRAIN_SCHEDULED_KEY)
+    result = outbox.drain()
+    return (
+        f"Sent {result.sent} emails in {result.batches} batches, "
+        f"{result.retried} to retry, {result.failed} failed"
+    )
+
 
 @shared_task
 def send_booking_confirmation_email(booking_id, user_email, listing_title):
     """
     Send a booking confirmation email to the user.
     """
-    subject = f'Booking Confirmation - {listing_title}'
-    message = f'''
-    Thank you for your booking!
-    
-    Your booking (ID: {booking_id}) for {listing_title} has been confirmed.
-    
-    Thank you for choosing our service!
-    '''
-    
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user_email],
-        fail_silently=False,
-    )
-    
-    return f"Confirmation email sent for booking {booking_id}"
+    message = emails.render('booking_confirmation', {
+        'booking_id': booking_id,
+        'listing_title': listing_title,
+    })
+    queue_email(message, [user_email])
+    return f"Confirmation email queued for booking {booking_id}"
 
-@shared_task
-def send_payment_confirmation_email(payment_id: str, user_email: str):
-    """Send payment confirmation email to user"""
-    try:
-        payment = Payment.objects.get(id=payment_id)
-        booking = payment.booking
-        
-        subject = f'Payment Confirmation - {booking.property.name}'
-        message = f"""
-        Dear {booking.user.get_full_name() or 'Guest'},
 
-        Your payment of {payment.currency} {payment.amount} for booking {booking.booking_id} has been confirmed.
+def _payment_for_email(payment_id):
+    """The payment with the booking, listing and guest its emails mention, in one query"""
+    return Payment.objects.select_related('booking__property', 'booking__user').get(id=payment_id)
 
-        Booking Details:
-        - Property: {booking.property.name}
-        - Check-in: {booking.start_date}
-        - Check-out: {booking.end_date}
-        - Total Amount: {payment.currency} {payment.amount}
-        - Transaction Reference: {payment.chapa_transaction_ref}
 
-        Thank you for choosing our service!
+def _payment_context(payment, **extra):
+    booking = payment.booking
+    return {
+        'payment': payment,
+        'booking': booking,
+        'guest_name': booking.user.get_full_name() or 'Guest',
+        **extra,
+    }
 
-        Best regards,
-        ALX Travel Team
-        """
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_email],
-            fail_silently=False,
-        )
-        
-        return f"Payment confirmation email sent to {user_email}"
+
+@shared_task
+def send_payment_confirmation_email(payment_id: str, user_email: str):
+    """Send payment confirmation email to user"""
+    try:
+        payment = _payment_for_email(payment_id)
+        message = emails.render('payment_confirmation', _payment_context(payment))
+        queue_email(message, [user_email])
+        return f"Payment confirmation email queued for {user_email}"
         
     except Payment.DoesNotExist:
         return f"Payment {payment_id} not found"
@@ -72,41 +79,155 @@ def send_payment_confirmation_email(payment_id: str, user_email: str):
 def send_payment_checkout_email(payment_id: str, user_email: str, checkout_url: str):
     """Send payment checkout link to user"""
     try:
-        payment = Payment.objects.get(id=payment_id)
-        booking = payment.booking
+        payment = _payment_for_email(payment_id)
+        message = emails.render(
+            'payment_checkout', _payment_context(payment, checkout_url=checkout_url)
+        )
+        queue_email(message, [user_email])
+        return f"Payment checkout email queued for {user_email}"
         
-        subject = f'Complete Your Payment - {booking.property.name}'
-        message = f"""
-        Dear {booking.user.get_full_name() or 'Guest'},
+    except Payment.DoesNotExist:
+        return f"Payment {payment_id} not found"
+    except Exception as e:
+        return f"Error sending payment checkout email: {str(e)}"
 
-        Please complete your payment for booking {booking.booking_id}.
 
-        Booking Details:
-        - Property: {booking.property.name}
-        - Check-in: {booking.start_date}
-        - Check-out: {booking.end_date}
-        - Total Amount: {payment.currency} {payment.amount}
+@shared_task(bind=True, max_retries=3)
+def initialize_payment_checkout(self, payment_id: str, callback_url: str, return_url: str,
+                                notify_url: str = None):
+    """Create the Chapa transaction for a payment, then email the checkout link"""
+    # The row stays locked until the checkout URL is stored, so a second task
+    # for the payment (a redelivery, or a repeated initialize) waits here and
+    # then finds it initialized
+    with transaction.atomic():
+        try:
+            payment = (
+                Payment.objects.select_for_update(of=('self',)).select_related('booking')
+                .get(id=payment_id)
+            )
+        except Payment.DoesNotExist:
+            return f"Payment {payment_id} not found"
 
-        Click the link below to complete your payment:
-        {checkout_url}
+        # A redelivered task must not create a second transaction or email
+        if payment.checkout_url:
+            return f"Payment {payment_id} already initialized"
 
-        This payment link will expire in 24 hours.
+        try:
+            initialize_payment(payment, callback_url, return_url)
+        except chapa.ChapaError as e:
+            if self.request.retries < self.max_retries:
+                raise self.retry(
+                    exc=e, countdown=settings.CHAPA_BACKOFF_MAX * 2 ** self.request.retries
+                )
+            payments.fail_initialization(payment)
+        except PaymentInitializationError:
+            pass
 
-        Best regards,
-        ALX Travel Team
-        """
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_email],
-            fail_silently=False,
+    if payment.checkout_url:
+        send_payment_checkout_email.delay(
+            payment_id=str(payment.id),
+            user_email=payment.email,
+            checkout_url=payment.checkout_url
         )
-        
-        return f"Payment checkout email sent to {user_email}"
-        
-    except Payment.DoesNotExist:
-        return f"Payment {payment_id} not found"
-    except Exception as e:
-        return f"Error sending payment checkout email: {str(e)}" 
\ No newline at end of file
+
+    if notify_url:
+        notify_payment_webhook.delay(notify_url, {
+            'transaction_ref': str(payment.id),
+            'status': payment.status,
+            'checkout_url': payment.checkout_url,
+        })
+
+    return f"Payment {payment_id} initialization finished with status {payment.status}"
+
+
+@shared_task(autoretry_for=(requests.RequestException,), retry_backoff=True, max_retries=5)
+def notify_payment_webhook(notify_url: str, payload: dict):
+    """POST the outcome of a payment initialization to the client's webhook"""
+    # Checked again here: the host may resolve elsewhere than when it was accepted
+    try:
+        payments.check_notify_url(notify_url)
+    except ValueError as e:
+        return f"Not notifying {notify_url}: {e}"
+    response = requests.post(
+        notify_url,
+        json=payload,
+        timeout=(settings.CHAPA_CONNECT_TIMEOUT, settings.CHAPA_READ_TIMEOUT),
+        # A redirect could point anywhere, including at internal hosts
+        allow_redirects=False,
+    )
+    response.raise_for_status()
+    return f"Notified {notify_url} ({response.status_code})"
+
+
+# Held while a reconciliation run is in progress so overlapping beat ticks
+# don't verify the same payments twice; the database write is safe either way.
+RECONCILE_LOCK_KEY = 'payments:reconcile:lock'
+
+
+def reconcile_lock_timeout():
+    """
+    Seconds the reconcile lock is held for at a time: the longest one chunk
+    can take, every verify call timing out through its retries. The lock is
+    extended by as much before each chunk, so a slow run keeps it and a
+    worker that dies mid-run holds it for one chunk at most.
+    """
+    rounds = math.ceil(
+        settings.PAYMENT_RECONCILE_CHUNK_SIZE / max(1, settings.PAYMENT_RECONCILE_CONCURRENCY)
+    )
+    call = (settings.CHAPA_MAX_RETRIES + 1) * (
+        settings.CHAPA_CONNECT_TIMEOUT + settings.CHAPA_READ_TIMEOUT + settings.CHAPA_BACKOFF_MAX
+    )
+    return math.ceil(rounds * call)
+
+
+@shared_task
+def reconcile_pending_payments():
+    """Verify stale pending payments with Chapa and confirm the paid ones"""
+    timeout = reconcile_lock_timeout()
+    token = locks.acquire(RECONCILE_LOCK_KEY, timeout)
+    if token is None:
+        return "Payment reconciliation already running"
+    try:
+        # Stops if the lock was lost anyway and another run took over
+        result = reconciliation.reconcile_pending_payments(
+            before_chunk=lambda: locks.extend(RECONCILE_LOCK_KEY, token, timeout)
+        )
+    finally:
+        locks.release(RECONCILE_LOCK_KEY, token)
+
+    _send_payment_confirmations(result)
+    return (
+        f"Checked {result.checked} payments: {len(result.completed)} completed, "
+        f"{result.failed} failed, {result.unchanged} pending, {result.errors} errors"
+    )
+
+
+@shared_task(bind=True, max_retries=5)
+def process_chapa_event(self, event_id: int):
+    """Confirm the payment a stored Chapa webhook event refers to"""
+    try:
+        event = ChapaWebhookEvent.objects.get(pk=event_id)
+    except ChapaWebhookEvent.DoesNotExist:
+        return f"Webhook event {event_id} not found"
+
+    try:
+        payment_id = uuid.UUID(event.tx_ref)
+    except ValueError:
+        return f"Webhook event {event_id} has an unknown tx_ref"
+
+    if not Payment.objects.filter(pk=payment_id, status=Payment.PaymentStatus.PENDING).exists():
+        return f"Payment {payment_id} is not pending"
+
+    # The event body is only a hint; the status is always taken from Chapa
+    responses = reconciliation.verify_payments([payment_id])
+    if not responses:
+        raise self.retry(countdown=settings.CHAPA_BACKOFF_MAX * 2 ** self.request.retries)
+    result = reconciliation.apply_verifications(responses)
+    _send_payment_confirmations(result)
+    return f"Webhook event {event_id} processed: {len(result.completed)} completed"
+
+
+def _send_payment_confirmations(result):
+    """Email the guests of payments a reconciliation result completed"""
+    for payment_id, email in result.completed:
+        send_payment_confirmation_email.delay(payment_id=payment_id, user_email=email)
@@ -0,0 +1,138 @@
+"""
+Local HTTP server standing in for the Chapa API.
+
+Point ``CHAPA_API_URL`` at ``stub.url``. By default every initialize and
+verify call succeeds; queue responses to script failures and slow replies.
+"""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import override_settings
+
+from alx_travel_app.listings import chapa
+
+# Fail fast in tests: no backoff sleeps, short read timeout
+FAST_RETRIES = {
+    "CHAPA_MAX_RETRIES": 2,
+    "CHAPA_BACKOFF_BASE": 0,
+    "CHAPA_READ_TIMEOUT": 0.5,
+    "CHAPA_BREAKER_THRESHOLD": 100,
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.stub.lock:
+            self.server.stub.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        with stub.lock:
+            stub.requests.append((self.command, self.path, body))
+            scripted = stub.responses.popleft() if stub.responses else None
+
+        status, payload, delay = scripted or (200, None, stub.delay)
+        if delay:
+            time.sleep(delay)
+        if status is None:
+            # Simulate a connection dropped before any response
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        if payload is None:
+            payload = stub.default_payload(self.command, self.path, body)
+
+        encoded = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (read timeout)
+            self.close_connection = True
+
+
+class ChapaStub:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.responses = deque()
+        self.requests = []
+        self.connections = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def queue(self, status=200, payload=None, delay=0):
+        """Script the next response; ``status=None`` drops the connection"""
+        self.responses.append((status, payload, delay))
+
+    def default_payload(self, method, path, body):
+        if path.endswith("/transaction/initialize"):
+            return {
+                "status": "success",
+                "message": "Hosted Link",
+                "data": {"checkout_url": f"https://checkout.chapa.co/checkout/payment/{body['tx_ref']}"},
+            }
+        tx_ref = path.rstrip("/").rsplit("/", 1)[-1]
+        return {
+            "status": "success",
+            "message": "Payment details",
+            "data": {"tx_ref": tx_ref, "status": "success"},
+        }
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class ChapaStubMixin:
+    """Run a stub per test with ``CHAPA_API_URL`` pointing at it"""
+
+    def setUp(self):
+        super().setUp()
+        self.stub = ChapaStub().start()
+        self.addCleanup(self.stub.stop)
+        settings_override = override_settings(CHAPA_API_URL=self.stub.url, **FAST_RETRIES)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        chapa.reset_client()
+        self.addCleanup(chapa.reset_client)
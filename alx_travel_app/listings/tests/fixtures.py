@@ -0,0 +1,45 @@
+"""Object factories shared by the payment and booking tests"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
+
+from alx_travel_app.listings.models import Booking, Listing, Payment
+
+User = get_user_model()
+
+
+def create_listing(host=None, **fields):
+    if host is None:
+        host, _ = User.objects.get_or_create(username="host")
+    return Listing.objects.create(**{
+        "host": host,
+        "name": "Lake House",
+        "description": "A nice place",
+        "location": "Bishoftu",
+        "price_per_night": 100,
+        **fields,
+    })
+
+
+def create_booking(user, listing=None, **fields):
+    return Booking.objects.create(**{
+        "property": listing or create_listing(),
+        "user": user,
+        "start_date": date(2030, 1, 1),
+        "end_date": date(2030, 1, 3),
+        "total_price": 200,
+        **fields,
+    })
+
+
+def create_payment(booking, **fields):
+    return Payment.objects.create(**{
+        "booking": booking,
+        "amount": booking.total_price,
+        "email": booking.user.email,
+        "phone_number": "0911000000",
+        "first_name": "Guest",
+        "last_name": "User",
+        "description": "Booking payment",
+        **fields,
+    })
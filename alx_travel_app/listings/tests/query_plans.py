@@ -0,0 +1,69 @@
+"""
+Query plan checks.
+
+``QueryPlanMixin.assertNoFullScans`` captures the SELECTs run inside the
+block, EXPLAINs each one and fails if any reads a table without an index:
+on SQLite a ``SCAN <table>`` step that uses no index, on MySQL a row of
+type ``ALL``. Scans of a whole index (e.g. to read rows in index order for
+a page) pass; they stop at the page size. Where a filter should narrow an
+index rather than walk one, ``assertUsesIndex`` names the index.
+
+SQLite plans without ``ANALYZE`` statistics as if every table were large,
+so on the test database a full scan means no index fits the query.
+"""
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SQLITE_SCAN = re.compile(r"^SCAN (?P<table>\w+)$")
+SQLITE_INDEX = re.compile(r"USING (?:COVERING )?INDEX (?P<index>\w+)")
+
+
+def explain(sql, params=()):
+    """The plan of ``sql``: detail strings on SQLite, rows as dicts on MySQL"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN {sql}", params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def full_scans(sql):
+    """Tables ``sql`` reads in full"""
+    if connection.vendor == "sqlite":
+        return [match["table"] for match in map(SQLITE_SCAN.match, explain(sql)) if match]
+    return [row["table"] for row in explain(sql) if row["type"] == "ALL"]
+
+
+def indexes_used(sql, params=()):
+    """Names of the indexes ``sql`` reads"""
+    plan = explain(sql, params)
+    if connection.vendor == "sqlite":
+        return [match["index"] for match in map(SQLITE_INDEX.search, plan) if match]
+    return [row["key"] for row in plan if row["key"]]
+
+
+class QueryPlanMixin:
+    @contextmanager
+    def assertNoFullScans(self, ignore=()):
+        """Fail if a SELECT in the block scans a table other than those in ``ignore``"""
+        with CaptureQueriesContext(connection) as queries:
+            yield
+        failures = []
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT"):
+                continue
+            scans = [table for table in full_scans(sql) if table not in ignore]
+            if scans:
+                failures.append(f"{', '.join(scans)}: {sql}")
+        self.assertFalse(failures, "Full table scans:\n" + "\n".join(failures))
+
+    def assertUsesIndex(self, queryset, name):
+        """Fail unless reading ``queryset`` reads the index ``name``"""
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn(name, indexes_used(sql, params), sql)
@@ -0,0 +1,43 @@
+"""
+Query counting for Celery tasks.
+
+``TaskQueriesMixin.assertTaskNumQueries`` runs one task body in-process and
+counts its SQL. Tasks it queues are recorded rather than run, so the count
+covers that task alone, and savepoints from the test transaction are left
+out so the number matches what a worker sends to the database.
+"""
+from contextlib import contextmanager
+from unittest import mock
+
+from celery import Task
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def statements(queries):
+    return [query["sql"] for query in queries if "SAVEPOINT" not in query["sql"]]
+
+
+@contextmanager
+def queued_tasks():
+    """Record ``delay``/``apply_async`` calls instead of running the tasks"""
+    queued = []
+
+    def record(task, args=None, kwargs=None, **options):
+        queued.append((task.name, tuple(args or ()), dict(kwargs or {})))
+
+    with mock.patch.object(Task, "apply_async", autospec=True, side_effect=record):
+        yield queued
+
+
+class TaskQueriesMixin:
+    def assertTaskNumQueries(self, num, task, *args, **kwargs):
+        """Run ``task`` with ``args`` and assert it ran ``num`` queries"""
+        with queued_tasks() as queued, CaptureQueriesContext(connection) as queries:
+            result = task(*args, **kwargs)
+        executed = statements(queries)
+        self.assertEqual(
+            len(executed), num,
+            f"{task.name} ran {len(executed)} queries, expected {num}:\n" + "\n".join(executed),
+        )
+        return result, queued
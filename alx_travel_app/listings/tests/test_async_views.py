@@ -0,0 +1,159 @@
+import asyncio
+import time
+from datetime import date
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import include, path, reverse
+
+from alx_travel_app.listings import async_views, chapa
+from alx_travel_app.listings.models import Booking, Payment
+
+from .chapa_stub import ChapaStubMixin
+from .fixtures import create_booking, create_listing, create_payment
+
+User = get_user_model()
+
+# The project's URLs with ASYNC_VIEWS on
+urlpatterns = [
+    path("api/", include(async_views.urlpatterns)),
+    path("", include("alx_travel_app.urls")),
+]
+
+
+def send(client, method, *args, **kwargs):
+    """Make a request through the ASGI handler and wait for the response"""
+    async def request():
+        return await getattr(client, method)(*args, **kwargs)
+    return async_to_sync(request)()
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncPaymentViewTests(ChapaStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.payment = create_payment(create_booking(self.guest))
+        self.async_client.force_login(self.guest)
+        self.verify_url = reverse("payment-verify", args=[self.payment.pk])
+        self.initialize_url = reverse("payment-initialize", args=[self.payment.pk])
+
+    def test_verify_completes_the_payment_and_confirms_the_booking(self):
+        response = send(self.async_client, "get", self.verify_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], Payment.PaymentStatus.COMPLETED)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.COMPLETED)
+        self.assertEqual(self.payment.booking.status, Booking.BookingStatus.CONFIRMED)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_verify_answers_as_the_sync_view(self):
+        response = send(self.async_client, "get", self.verify_url)
+        with override_settings(ROOT_URLCONF="alx_travel_app.urls"):
+            self.client.force_login(self.guest)
+            expected = self.client.get(self.verify_url).json()
+        # Only the time of the second save differs
+        self.assertEqual(response.json(), {**expected, "updated_at": response.json()["updated_at"]})
+
+    def test_verify_hides_other_users_payments(self):
+        self.async_client.force_login(User.objects.create_user(username="other"))
+        response = send(self.async_client, "get", self.verify_url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"detail": "Not found."})
+
+    def test_anonymous_requests_are_refused(self):
+        response = send(AsyncClient(), "get", self.verify_url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json(),
+                         {"detail": "Authentication credentials were not provided."})
+
+    def test_session_posts_need_a_csrf_token(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        client.force_login(self.guest)
+        response = send(client, "post", self.initialize_url)
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(response.json()["detail"].startswith("CSRF Failed"))
+
+    def test_unreachable_chapa_is_a_500(self):
+        for _ in range(3):
+            self.stub.queue(status=None)
+        response = send(self.async_client, "get", self.verify_url)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_initialize_is_queued_by_default(self):
+        response = send(self.async_client, "post", self.initialize_url)
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.json()["status_url"].endswith(
+            reverse("payment-status", args=[self.payment.pk])
+        ))
+
+    @override_settings(CHAPA_INITIALIZE_ASYNC=False)
+    def test_initialize_waits_on_chapa_when_not_queued(self):
+        response = send(self.async_client, "post", self.initialize_url)
+        self.assertEqual(response.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(response.json()["checkout_url"], self.payment.checkout_url)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_waits_on_chapa_overlap(self):
+        payments = [self.payment] + [
+            create_payment(create_booking(self.guest, start_date=date(2030, 2, day),
+                                          end_date=date(2030, 2, day + 1)))
+            for day in range(1, 5)
+        ]
+        self.stub.delay = 0.2
+
+        async def verify_all():
+            return await asyncio.gather(*[
+                self.async_client.get(reverse("payment-verify", args=[payment.pk]))
+                for payment in payments
+            ])
+
+        started = time.perf_counter()
+        responses = async_to_sync(verify_all)()
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertLess(time.perf_counter() - started, 0.2 * len(payments) / 2)
+
+    def test_the_async_client_shares_the_breaker(self):
+        async def clients():
+            return chapa.get_async_client(), chapa.get_async_client()
+
+        first, second = async_to_sync(clients)()
+        self.assertIs(first, second)
+        self.assertIs(first.breaker, chapa.get_client().breaker)
+        self.assertIs(first.stats, chapa.get_client().stats)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncListingViewTests(TestCase):
+    def setUp(self):
+        self.listing = create_listing()
+        create_booking(User.objects.create_user(username="guest"), self.listing)
+
+    def assert_same_as_sync(self, url, params):
+        response = send(self.async_client, "get", url, params)
+        with override_settings(ROOT_URLCONF="alx_travel_app.urls"):
+            expected = self.client.get(url, params)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        return response
+
+    def test_availability(self):
+        url = reverse("listing-availability", args=[self.listing.pk])
+        response = self.assert_same_as_sync(url, {"from": "2030-01-01", "to": "2030-01-05"})
+        self.assertEqual(response.json()["free_nights"], ["2030-01-03", "2030-01-04"])
+
+    def test_quote(self):
+        url = reverse("listing-quote", args=[self.listing.pk])
+        response = self.assert_same_as_sync(url, {"from": "2030-02-01", "to": "2030-02-03"})
+        self.assertEqual(len(response.json()["nights"]), 2)
+
+    def test_errors(self):
+        url = reverse("listing-quote", args=[self.listing.pk])
+        self.assertEqual(self.assert_same_as_sync(url, {"from": "2030-02-03"}).status_code, 400)
+        missing = reverse("listing-availability", args=["0" * 32])
+        response = self.assert_same_as_sync(missing, {"from": "2030-01-01", "to": "2030-01-05"})
+        self.assertEqual(response.status_code, 404)
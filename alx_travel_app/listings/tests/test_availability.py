@@ -0,0 +1,163 @@
+import threading
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from alx_travel_app.listings import availability
+from alx_travel_app.listings.models import Booking, Listing
+
+User = get_user_model()
+
+
+def make_listing(host):
+    return Listing.objects.create(
+        host=host,
+        name="Lake House",
+        description="A nice place",
+        location="Bishoftu",
+        price_per_night=100,
+    )
+
+
+class BookingOverlapTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guest = User.objects.create_user(username="guest", password="password123")
+        self.listing = make_listing(self.host)
+        Booking.objects.create(
+            property=self.listing,
+            user=self.host,
+            start_date=date(2030, 1, 10),
+            end_date=date(2030, 1, 15),
+            total_price=500,
+            status=Booking.BookingStatus.CONFIRMED,
+        )
+        self.client.force_authenticate(self.guest)
+
+    def book(self, start, end, **extra):
+        return self.client.post(reverse("booking-list"), {
+            "property": str(self.listing.pk),
+            "start_date": start,
+            "end_date": end,
+            "total_price": "100.00",
+            **extra,
+        })
+
+    def test_overlapping_booking_is_rejected(self):
+        for start, end in [
+            ("2030-01-08", "2030-01-11"),
+            ("2030-01-12", "2030-01-13"),
+            ("2030-01-14", "2030-01-20"),
+            ("2030-01-01", "2030-01-31"),
+        ]:
+            response = self.book(start, end)
+            self.assertEqual(response.status_code, 400, (start, end))
+
+    def test_adjacent_booking_is_accepted(self):
+        self.assertEqual(self.book("2030-01-05", "2030-01-10").status_code, 201)
+        self.assertEqual(self.book("2030-01-15", "2030-01-18").status_code, 201)
+
+    def test_canceled_bookings_do_not_block(self):
+        Booking.objects.update(status=Booking.BookingStatus.CANCELED)
+        self.assertEqual(self.book("2030-01-11", "2030-01-12").status_code, 201)
+
+    def test_updating_a_booking_ignores_itself(self):
+        booking = Booking.objects.get()
+        self.client.force_authenticate(self.host)
+        response = self.client.patch(
+            reverse("booking-detail", args=[booking.pk]), {"end_date": "2030-01-16"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_overlap_query_uses_one_statement(self):
+        with self.assertNumQueries(1):
+            availability.is_available(self.listing.pk, date(2030, 1, 1), date(2030, 1, 31))
+
+
+class AvailabilityEndpointTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.listing = make_listing(self.host)
+
+    def url(self, listing_id=None):
+        return reverse("listing-availability", args=[listing_id or self.listing.pk])
+
+    def test_free_nights_exclude_booked_ones(self):
+        Booking.objects.create(
+            property=self.listing,
+            user=self.host,
+            start_date=date(2030, 1, 2),
+            end_date=date(2030, 1, 4),
+            total_price=200,
+        )
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url(), {"from": "2030-01-01", "to": "2030-01-06"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["available"])
+        self.assertEqual(
+            response.data["free_nights"],
+            [date(2030, 1, 1), date(2030, 1, 4), date(2030, 1, 5)],
+        )
+
+    def test_listing_without_bookings_is_fully_available(self):
+        response = self.client.get(self.url(), {"from": "2030-01-01", "to": "2030-01-03"})
+        self.assertTrue(response.data["available"])
+        self.assertEqual(len(response.data["free_nights"]), 2)
+
+    def test_unknown_listing_returns_404(self):
+        response = self.client.get(
+            self.url("00000000-0000-0000-0000-000000000000"),
+            {"from": "2030-01-01", "to": "2030-01-03"},
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_range_returns_400(self):
+        for params in [{}, {"from": "2030-01-05", "to": "2030-01-01"},
+                       {"from": "2030-01-01", "to": "2032-01-01"}]:
+            self.assertEqual(self.client.get(self.url(), params).status_code, 400)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Parallel attempts to book the same nights must yield one booking"""
+
+    ATTEMPTS = 8
+
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guests = [
+            User.objects.create_user(username=f"guest{i}", password="password123")
+            for i in range(self.ATTEMPTS)
+        ]
+        self.listing = make_listing(self.host)
+
+    def test_parallel_bookings_cannot_double_book(self):
+        barrier = threading.Barrier(self.ATTEMPTS)
+        statuses = []
+
+        def attempt(guest):
+            try:
+                client = APIClient()
+                client.force_authenticate(guest)
+                barrier.wait()
+                response = client.post(reverse("booking-list"), {
+                    "property": str(self.listing.pk),
+                    "start_date": "2030-03-01",
+                    "end_date": "2030-03-05",
+                    "total_price": "400.00",
+                })
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(guest,)) for guest in self.guests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201] + [400] * (self.ATTEMPTS - 1))
+        self.assertEqual(Booking.objects.filter(property=self.listing).count(), 1)
@@ -0,0 +1,134 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.models import Booking, Listing, ListingRate
+from alx_travel_app.listings.serializers import BookingSerializer
+
+from .fixtures import create_booking, create_listing
+from .task_queries import statements
+
+User = get_user_model()
+
+
+def listing_row(i, **fields):
+    return {"name": f"Listing {i}", "description": "Nice", "location": "Adama",
+            "price_per_night": "100.00", **fields}
+
+
+def ndjson(rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+
+
+@override_settings(BULK_IMPORT_CHUNK_SIZE=2)
+class BulkListingImportTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host")
+        self.client.force_authenticate(self.host)
+        self.url = reverse("listing-bulk")
+
+    def test_json_array_with_invalid_rows(self):
+        rows = [listing_row(0), listing_row(1, name=""), listing_row(2, price_per_night="x")]
+        rows += [listing_row(i) for i in range(3, 6)]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual((response.data["created"], response.data["failed"]), (4, 2))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("name", response.data["errors"][0]["errors"])
+        self.assertEqual(Listing.objects.filter(host=self.host).count(), 4)
+
+    def test_ndjson_stream(self):
+        body = ndjson([listing_row(0), "{not json", "", listing_row(1), "[]"])
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [1, 3])
+        self.assertIn("Invalid JSON", str(response.data["errors"][0]["errors"]))
+
+    def test_one_insert_per_chunk(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, [listing_row(i) for i in range(5)], format="json")
+        self.assertEqual(response.status_code, 201)
+        inserts = [sql for sql in statements(queries) if sql.startswith("INSERT")]
+        self.assertEqual(len(inserts), 3)
+
+    def test_body_must_be_a_list(self):
+        response = self.client.post(self.url, listing_row(0), format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, [listing_row(0, name="")], format="json")
+        self.assertEqual((response.status_code, response.data["created"]), (400, 0))
+
+    def test_anonymous_users_cannot_import(self):
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, [listing_row(0)], format="json")
+        self.assertIn(response.status_code, (401, 403))
+
+
+@override_settings(BULK_IMPORT_CHUNK_SIZE=3)
+class BulkBookingImportTests(APITestCase):
+    def setUp(self):
+        self.guest = User.objects.create_user(username="guest")
+        self.lake = create_listing(name="Lake", price_per_night=100)
+        self.hill = create_listing(name="Hill", price_per_night=80)
+        create_booking(self.guest, self.lake, start_date="2030-01-10", end_date="2030-01-15",
+                       status=Booking.BookingStatus.CONFIRMED)
+        self.client.force_authenticate(self.guest)
+        self.url = reverse("booking-bulk")
+
+    def row(self, listing, start, end, **fields):
+        return {"property": str(listing.pk), "start_date": start, "end_date": end, **fields}
+
+    def test_overlaps_are_rejected(self):
+        rows = [
+            self.row(self.lake, "2030-01-12", "2030-01-16"),  # overlaps a stored booking
+            self.row(self.lake, "2030-01-15", "2030-01-18"),
+            self.row(self.lake, "2030-01-17", "2030-01-19"),  # overlaps row 1
+            self.row(self.hill, "2030-01-17", "2030-01-19"),
+            # Overlaps row 3 in an earlier chunk
+            self.row(self.hill, "2030-01-18", "2030-01-20"),
+            self.row(self.hill, "2030-01-18", "2030-01-20", status=Booking.BookingStatus.CANCELED),
+        ]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(
+            response.data["errors"],
+            [{"row": row, "errors": {"non_field_errors": [BookingSerializer.UNAVAILABLE]}}
+             for row in (0, 2, 4)],
+        )
+        self.assertEqual(Booking.objects.filter(property=self.hill).count(), 2)
+
+    def test_rows_are_priced_on_the_server(self):
+        ListingRate.objects.create(listing=self.hill, start_date="2030-02-01",
+                                   end_date="2030-03-01", price=120)
+        rows = [self.row(self.hill, "2030-01-30", "2030-02-02", total_price="1.00")]
+        self.client.post(self.url, rows, format="json")
+        self.assertEqual(Booking.objects.get(property=self.hill).total_price, 280)
+
+    def test_invalid_rows(self):
+        rows = [
+            self.row(self.lake, "2030-02-02", "2030-02-01"),
+            {"property": "00000000-0000-0000-0000-000000000000",
+             "start_date": "2030-02-01", "end_date": "2030-02-02"},
+            {"property": "nope", "start_date": "2030-02-01", "end_date": "2030-02-02"},
+        ]
+        response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("property", response.data["errors"][1]["errors"])
+        self.assertIn("property", response.data["errors"][2]["errors"])
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        rows = [self.row(self.hill, f"2030-03-{day:02}", f"2030-03-{day + 1:02}")
+                for day in range(1, 7)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, rows, format="json")
+        self.assertEqual(response.data["created"], 6)
+        # Per chunk: listings, stored bookings, rates, insert
+        self.assertEqual(
+            [sql.split()[0] for sql in statements(queries)],
+            ["SELECT", "SELECT", "SELECT", "INSERT"] * 2,
+        )
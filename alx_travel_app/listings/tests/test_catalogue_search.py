@@ -0,0 +1,100 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.filters import FullTextMatch
+from alx_travel_app.listings.models import Booking, Listing, Review
+
+User = get_user_model()
+
+
+class CatalogueSearchTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guests = [
+            User.objects.create_user(username=f"guest{i}", password="password123")
+            for i in range(3)
+        ]
+        self.cabin = self.listing("Mountain Cabin", "Wood stove and a lake view", "Bale, Oromia", 80)
+        self.loft = self.listing("City Loft", "Rooftop terrace downtown", "Addis Ababa, Bole", 150)
+        self.villa = self.listing("Lake Villa", "Private pool by the lake", "Bishoftu", 400)
+
+    def listing(self, name, description, location, price):
+        return Listing.objects.create(
+            host=self.host,
+            name=name,
+            description=description,
+            location=location,
+            price_per_night=price,
+        )
+
+    def names(self, **params):
+        response = self.client.get(reverse("listing-list"), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(item["name"] for item in response.data["results"])
+
+    def test_no_filters_returns_everything(self):
+        self.assertEqual(self.names(), ["City Loft", "Lake Villa", "Mountain Cabin"])
+
+    def test_search_matches_name_and_description(self):
+        self.assertEqual(self.names(search="lake"), ["Lake Villa", "Mountain Cabin"])
+        self.assertEqual(self.names(search="lake pool"), ["Lake Villa"])
+
+    def test_location_is_a_case_insensitive_prefix(self):
+        self.assertEqual(self.names(location="addis"), ["City Loft"])
+        self.assertEqual(self.names(location="Bole"), [])
+
+    def test_price_range(self):
+        self.assertEqual(self.names(min_price=100), ["City Loft", "Lake Villa"])
+        self.assertEqual(self.names(min_price=100, max_price=200), ["City Loft"])
+
+    def test_min_rating(self):
+        for guest, rating in zip(self.guests, [5, 4, 3]):
+            Review.objects.create(property=self.cabin, user=guest, rating=rating, comment="ok")
+        Review.objects.create(property=self.loft, user=self.guests[0], rating=2, comment="meh")
+        self.assertEqual(self.names(min_rating=4), ["Mountain Cabin"])
+        self.assertEqual(self.names(min_rating="1.5"), ["City Loft", "Mountain Cabin"])
+
+    def test_availability_window(self):
+        Booking.objects.create(
+            property=self.villa,
+            user=self.guests[0],
+            start_date=date(2030, 6, 1),
+            end_date=date(2030, 6, 5),
+            total_price=1600,
+            status=Booking.BookingStatus.CONFIRMED,
+        )
+        self.assertEqual(
+            self.names(available_from="2030-06-04", available_to="2030-06-06"),
+            ["City Loft", "Mountain Cabin"],
+        )
+        self.assertEqual(
+            self.names(available_from="2030-06-05", available_to="2030-06-06"),
+            ["City Loft", "Lake Villa", "Mountain Cabin"],
+        )
+
+    def test_filters_combine(self):
+        self.assertEqual(self.names(search="lake", max_price=100), ["Mountain Cabin"])
+
+    def test_invalid_parameters_are_rejected(self):
+        url = reverse("listing-list")
+        for params in [
+            {"min_price": "cheap"},
+            {"min_price": 200, "max_price": 100},
+            {"min_rating": 6},
+            {"available_from": "2030-01-01"},
+            {"available_from": "2030-01-05", "available_to": "2030-01-01"},
+        ]:
+            self.assertEqual(self.client.get(url, params).status_code, 400, params)
+
+
+class FullTextMatchTests(APITestCase):
+    def test_compiles_to_match_against(self):
+        queryset = Listing.objects.alias(
+            relevance=FullTextMatch("name", "description", query="lake")
+        ).filter(relevance__gt=0)
+        sql = str(queryset.query)
+        self.assertIn("MATCH (", sql)
+        self.assertIn("AGAINST (lake IN NATURAL LANGUAGE MODE)", sql)
@@ -0,0 +1,170 @@
+import socket
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings import chapa
+from alx_travel_app.listings.models import Booking, Listing, Payment
+
+from .chapa_stub import ChapaStubMixin
+
+User = get_user_model()
+
+class ChapaClientTests(ChapaStubMixin, SimpleTestCase):
+    def test_verify_success(self):
+        response = chapa.get_client().verify("tx-1")
+        self.assertTrue(response.ok)
+        self.assertEqual(self.stub.requests, [("GET", "/v1/transaction/verify/tx-1", None)])
+
+    def test_connections_are_reused(self):
+        client = chapa.get_client()
+        for i in range(5):
+            client.verify(f"tx-{i}")
+        client.initialize({"tx_ref": "tx-9", "amount": "10"})
+        self.assertEqual(self.stub.connections, 1)
+
+    def test_client_is_shared_per_process(self):
+        self.assertIs(chapa.get_client(), chapa.get_client())
+
+    def test_server_errors_are_retried(self):
+        self.stub.queue(503)
+        self.stub.queue(502)
+        response = chapa.get_client().verify("tx-1")
+        self.assertTrue(response.ok)
+        self.assertEqual(len(self.stub.requests), 3)
+        self.assertEqual(chapa.get_client().stats.snapshot()["verify"]["retries"], 2)
+
+    def test_retries_are_bounded(self):
+        for _ in range(5):
+            self.stub.queue(500, {"status": "failed"})
+        response = chapa.get_client().verify("tx-1")
+        self.assertFalse(response.ok)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_read_timeout_is_enforced(self):
+        for _ in range(3):
+            self.stub.queue(200, delay=1)
+        with self.assertRaises(chapa.ChapaError):
+            chapa.get_client().verify("tx-1")
+        stats = chapa.get_client().stats.snapshot()["verify"]
+        self.assertEqual((stats["calls"], stats["errors"]), (3, 3))
+        self.assertLess(stats["latency_max"], 1)
+
+    def test_initialize_is_not_retried_once_sent(self):
+        self.stub.queue(503)
+        response = chapa.get_client().initialize({"tx_ref": "tx-1"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_initialize_is_retried_when_it_never_connected(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed_port = sock.getsockname()[1]
+        with override_settings(CHAPA_API_URL=f"http://127.0.0.1:{closed_port}"):
+            with self.assertRaises(chapa.ChapaError):
+                chapa.get_client().initialize({"tx_ref": "tx-1"})
+        self.assertEqual(chapa.get_client().stats.snapshot()["initialize"]["calls"], 3)
+
+    @override_settings(CHAPA_BREAKER_THRESHOLD=2, CHAPA_MAX_RETRIES=0,
+                       CHAPA_BREAKER_RESET_TIMEOUT=60)
+    def test_circuit_breaker_opens_after_repeated_failures(self):
+        client = chapa.get_client()
+        self.stub.queue(500)
+        self.stub.queue(500)
+        client.verify("tx-1")
+        client.verify("tx-2")
+        self.assertEqual(client.breaker.state, "open")
+        with self.assertRaises(chapa.ChapaUnavailable):
+            client.verify("tx-3")
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(client.stats.snapshot()["verify"]["rejected"], 1)
+
+    @override_settings(CHAPA_BREAKER_THRESHOLD=1, CHAPA_MAX_RETRIES=0,
+                       CHAPA_BREAKER_RESET_TIMEOUT=0)
+    def test_circuit_breaker_closes_after_successful_trial(self):
+        client = chapa.get_client()
+        self.stub.queue(500)
+        client.verify("tx-1")
+        self.assertEqual(client.breaker.state, "half-open")
+        self.assertTrue(client.verify("tx-2").ok)
+        self.assertEqual(client.breaker.state, "closed")
+
+
+class PaymentChapaViewTests(ChapaStubMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.guest = User.objects.create_user(
+            username="guest", email="guest@example.com", password="password123"
+        )
+        listing = Listing.objects.create(
+            host=User.objects.create_user(username="host", password="password123"),
+            name="Lake House",
+            description="A nice place",
+            location="Bishoftu",
+            price_per_night=100,
+        )
+        self.booking = Booking.objects.create(
+            property=listing,
+            user=self.guest,
+            start_date=date(2030, 1, 1),
+            end_date=date(2030, 1, 3),
+            total_price=200,
+        )
+        self.payment = Payment.objects.create(
+            booking=self.booking,
+            amount=200,
+            email="guest@example.com",
+            phone_number="0911000000",
+            first_name="Guest",
+            last_name="User",
+            description="Booking payment",
+        )
+        self.client.force_authenticate(self.guest)
+
+    def test_verify_completes_payment_and_booking(self):
+        response = self.client.get(reverse("payment-verify", args=[self.payment.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.payment.refresh_from_db()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.COMPLETED)
+        self.assertEqual(self.booking.status, Booking.BookingStatus.CONFIRMED)
+
+    @override_settings(CHAPA_INITIALIZE_ASYNC=False)
+    def test_initialize_stores_checkout_url(self):
+        response = self.client.post(reverse("payment-initialize", args=[self.payment.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(
+            self.payment.checkout_url,
+            f"https://checkout.chapa.co/checkout/payment/{self.payment.pk}",
+        )
+        method, path, body = self.stub.requests[0]
+        self.assertEqual((method, path, body["tx_ref"]), ("POST", "/v1/transaction/initialize", str(self.payment.pk)))
+
+    @override_settings(CHAPA_BREAKER_THRESHOLD=1, CHAPA_MAX_RETRIES=0,
+                       CHAPA_BREAKER_RESET_TIMEOUT=60, CHAPA_INITIALIZE_ASYNC=False)
+    def test_open_circuit_returns_503(self):
+        self.stub.queue(500)
+        self.client.get(reverse("payment-verify", args=[self.payment.pk]))
+        response = self.client.get(reverse("payment-verify", args=[self.payment.pk]))
+        self.assertEqual(response.status_code, 503)
+
+        response = self.client.post(reverse("payment-initialize", args=[self.payment.pk]))
+        self.assertEqual(response.status_code, 503)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.PENDING)
+
+    def test_stats_are_staff_only(self):
+        self.client.get(reverse("payment-verify", args=[self.payment.pk]))
+        url = reverse("payment-chapa-stats")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(username="staff", is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["circuit_breaker"], "closed")
+        self.assertEqual(response.data["operations"]["verify"]["calls"], 1)
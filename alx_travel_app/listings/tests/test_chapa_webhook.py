@@ -0,0 +1,116 @@
+import hashlib
+import hmac
+import json
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.models import Booking, ChapaWebhookEvent, Payment
+
+from .chapa_stub import ChapaStubMixin
+from .fixtures import create_booking, create_listing, create_payment
+
+User = get_user_model()
+
+
+class ChapaWebhookTests(ChapaStubMixin, APITestCase):
+    url = reverse("chapa-webhook")
+
+    def setUp(self):
+        super().setUp()
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.listing = create_listing()
+        self.payment = self.create_payment()
+
+    def create_payment(self):
+        return create_payment(create_booking(self.guest, self.listing))
+
+    def deliver(self, payload, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url, json.dumps(payload), content_type="application/json", headers=headers
+            )
+
+    def charge_success(self, payment):
+        return {"event": "charge.success", "tx_ref": str(payment.pk), "status": "success"}
+
+    def verify_calls(self):
+        return [path for method, path, _ in self.stub.requests if method == "GET"]
+
+    def test_webhook_confirms_payment_and_booking(self):
+        response = self.deliver(self.charge_success(self.payment))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"received": True, "duplicate": False})
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.COMPLETED)
+        self.assertEqual(self.payment.booking.status, Booking.BookingStatus.CONFIRMED)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(ChapaWebhookEvent.objects.get().payload["event"], "charge.success")
+
+    def test_duplicate_deliveries_are_acknowledged_once(self):
+        payments = [self.payment] + [self.create_payment() for _ in range(9)]
+        for _ in range(20):
+            for payment in payments:
+                response = self.deliver(self.charge_success(payment))
+                self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(ChapaWebhookEvent.objects.count(), 10)
+        self.assertEqual(len(self.verify_calls()), 10)
+        self.assertEqual(len(mail.outbox), 10)
+        self.assertEqual(
+            Payment.objects.filter(status=Payment.PaymentStatus.COMPLETED).count(), 10
+        )
+
+    def test_duplicate_delivery_is_a_single_insert(self):
+        self.deliver(self.charge_success(self.payment))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.deliver(self.charge_success(self.payment))
+        self.assertTrue(response.data["duplicate"])
+        statements = [q["sql"].split()[0] for q in queries if "SAVEPOINT" not in q["sql"]]
+        self.assertEqual(statements, ["INSERT"])
+
+    def test_callback_after_webhook_does_not_confirm_twice(self):
+        self.deliver(self.charge_success(self.payment))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(self.url, {"trx_ref": str(self.payment.pk), "status": "success"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ChapaWebhookEvent.objects.count(), 2)
+        self.assertEqual(len(self.verify_calls()), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_event_body_is_not_trusted(self):
+        self.stub.queue(400, {"status": "failed", "message": "Payment not paid yet", "data": None})
+        self.deliver(self.charge_success(self.payment))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.PENDING)
+        self.assertEqual(mail.outbox, [])
+
+    def test_unknown_tx_ref_is_stored_but_not_verified(self):
+        response = self.deliver({"event": "charge.success", "tx_ref": "not-a-payment"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(ChapaWebhookEvent.objects.filter(tx_ref="not-a-payment").exists())
+        self.assertEqual(self.verify_calls(), [])
+
+    def test_invalid_deliveries_are_rejected(self):
+        response = self.client.post(self.url, "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        response = self.deliver({"event": "charge.success"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ChapaWebhookEvent.objects.exists())
+
+    @override_settings(CHAPA_WEBHOOK_SECRET="whsec")
+    def test_signature_is_checked_when_a_secret_is_set(self):
+        payload = self.charge_success(self.payment)
+        response = self.deliver(payload, **{"X-Chapa-Signature": "forged"})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ChapaWebhookEvent.objects.exists())
+
+        signature = hmac.new(b"whsec", json.dumps(payload).encode(), hashlib.sha256).hexdigest()
+        response = self.deliver(payload, **{"X-Chapa-Signature": signature})
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,80 @@
+from celery.signals import task_postrun, task_prerun
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from alx_travel_app.celery import app
+from alx_travel_app.listings import db_connections
+from alx_travel_app.listings.models import Listing
+
+from .fixtures import create_listing
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def uses(unit, kind):
+    return sample("db_connection_uses_total", alias="default", unit=unit, connection=kind)
+
+
+@app.task(name="tests.db_connections.count_listings")
+def count_listings():
+    return Listing.objects.count()
+
+
+class ConnectionStatsTests(TestCase):
+    def setUp(self):
+        create_listing()
+
+    def open_connection(self):
+        # The test case's connection is already open; announce it as new
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+    def test_opened_connections_are_counted(self):
+        before = sample("db_connections_opened_total", alias="default")
+        self.open_connection()
+        self.assertEqual(sample("db_connections_opened_total", alias="default") - before, 1)
+        self.assertEqual(connection.execute_wrappers.count(db_connections.mark_used), 1)
+
+    def test_requests_on_an_open_connection_reuse_it(self):
+        before = uses("request", "reused"), uses("request", "new")
+        self.client.get(reverse("listing-list"))
+        after = uses("request", "reused"), uses("request", "new")
+        self.assertEqual((after[0] - before[0], after[1] - before[1]), (1, 0))
+
+    def test_requests_that_connect_count_as_new(self):
+        before = uses("request", "new")
+        db_connections.request_began()
+        self.open_connection()
+        Listing.objects.count()
+        db_connections.request_ended()
+        self.assertEqual(uses("request", "new") - before, 1)
+
+    def test_requests_without_queries_are_not_counted(self):
+        before = uses("request", "reused") + uses("request", "new")
+        db_connections.request_began()
+        db_connections.request_ended()
+        self.assertEqual(uses("request", "reused") + uses("request", "new"), before)
+
+    def test_worker_tasks_are_counted(self):
+        before = uses("task", "reused")
+        task_prerun.send(sender=count_listings, task_id="t-1", task=count_listings)
+        count_listings()
+        task_postrun.send(sender=count_listings, task_id="t-1", task=count_listings,
+                          state="SUCCESS")
+        self.assertEqual(uses("task", "reused") - before, 1)
+
+    def test_eager_tasks_are_left_to_their_caller(self):
+        before = uses("task", "reused") + uses("task", "new")
+        count_listings.apply()
+        self.assertEqual(uses("task", "reused") + uses("task", "new"), before)
+
+    @override_settings(DB_WORKER_CONN_MAX_AGE=5)
+    def test_workers_can_keep_connections_for_longer(self):
+        self.addCleanup(connection.settings_dict.__setitem__, "CONN_MAX_AGE",
+                        connection.settings_dict["CONN_MAX_AGE"])
+        db_connections.use_worker_conn_max_age()
+        self.assertEqual(connection.settings_dict["CONN_MAX_AGE"], 5)
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from alx_travel_app.listings import outbox
+from alx_travel_app.listings.models import OutboundEmail
+from alx_travel_app.listings.tasks import send_booking_confirmation_email
+
+from .smtp_stub import SMTPStub
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tasks_queue_and_drain_emails(self):
+        send_booking_confirmation_email("b-1", "guest@example.com", "Lake House")
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.status, OutboundEmail.EmailStatus.SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(mail.outbox[0].subject, "Booking Confirmation - Lake House")
+        self.assertEqual(mail.outbox[0].to, ["guest@example.com"])
+
+    def test_sent_emails_are_not_sent_again(self):
+        outbox.queue_email("Hi", "Body", ["a@example.com"])
+        outbox.drain()
+        outbox.drain()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_messages_are_drained_in_batches(self):
+        for i in range(7):
+            outbox.queue_email("Hi", "Body", [f"guest{i}@example.com"])
+        result = outbox.drain(batch_size=3)
+        self.assertEqual((result.batches, result.sent), (3, 7))
+
+    def test_messages_not_due_are_left_alone(self):
+        outbox.queue_email("Hi", "Body", ["a@example.com"])
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(outbox.drain().sent, 0)
+
+
+@override_settings(EMAIL_OUTBOX_RETRY_BACKOFF=60, EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+class SMTPOutboxTests(TestCase):
+    def setUp(self):
+        self.smtp = SMTPStub().start()
+        self.addCleanup(self.smtp.stop)
+        smtp_settings = self.smtp.settings()
+        smtp_settings.enable()
+        self.addCleanup(smtp_settings.disable)
+
+    def test_batch_uses_one_connection(self):
+        for i in range(10):
+            outbox.queue_email("Hi", "Body", [f"guest{i}@example.com"])
+        result = outbox.drain(batch_size=10)
+        self.assertEqual(result.sent, 10)
+        self.assertEqual(len(self.smtp.messages), 10)
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_refused_recipient_is_retried_without_resending_the_rest(self):
+        self.smtp.reject.add("bounce@example.com")
+        for address in ["a@example.com", "bounce@example.com", "b@example.com"]:
+            outbox.queue_email("Hi", "Body", [address])
+
+        result = outbox.drain()
+        self.assertEqual((result.sent, result.retried), (2, 1))
+        self.assertEqual(self.smtp.connections, 1)
+        bounced = OutboundEmail.objects.get(to=["bounce@example.com"])
+        self.assertEqual(bounced.status, OutboundEmail.EmailStatus.PENDING)
+        self.assertEqual(bounced.attempts, 1)
+        self.assertIn("No such user", bounced.last_error)
+        self.assertGreater(bounced.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        # Due again: the retry goes out alone and, at the attempt limit, gives up
+        OutboundEmail.objects.filter(pk=bounced.pk).update(next_attempt_at=timezone.now())
+        result = outbox.drain()
+        self.assertEqual((result.sent, result.failed), (0, 1))
+        bounced.refresh_from_db()
+        self.assertEqual(bounced.status, OutboundEmail.EmailStatus.FAILED)
+        self.assertEqual(len(self.smtp.messages), 2)
+
+    def test_unreachable_server_leaves_messages_queued(self):
+        outbox.queue_email("Hi", "Body", ["a@example.com"])
+        self.smtp.stop()
+        result = outbox.drain()
+        self.assertEqual(result.retried, 1)
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (OutboundEmail.EmailStatus.PENDING, 1))
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase
+
+from alx_travel_app.listings import emails, outbox
+from alx_travel_app.listings.tasks import send_payment_checkout_email
+
+from .fixtures import create_booking, create_listing, create_payment
+
+User = get_user_model()
+
+
+class EmailRenderingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest = User.objects.create_user(
+            username="guest", email="guest@example.com", first_name="Abebe"
+        )
+        self.listing = create_listing(name="Lake <House>")
+        self.payment = create_payment(create_booking(self.guest, self.listing))
+
+    def test_payment_emails_are_sent_as_text_and_html(self):
+        send_payment_checkout_email(str(self.payment.pk), "guest@example.com", "http://pay?a=1&b=2")
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, "Complete Your Payment - Lake <House>")
+        self.assertIn("Dear Abebe,", message.body)
+        self.assertIn("- Property: Lake <House>\n- Check-in: 2030-01-01", message.body)
+        self.assertIn("http://pay?a=1&b=2", message.body)
+        html, mimetype = message.alternatives[0]
+        self.assertEqual(mimetype, "text/html")
+        self.assertIn("Property: Lake &lt;House&gt;", html)
+        self.assertIn('href="http://pay?a=1&amp;b=2"', html)
+
+    def test_plain_text_outbox_messages_have_no_html_part(self):
+        outbox.queue_email("Hi", "Body", ["a@example.com"])
+        outbox.drain()
+        self.assertEqual(mail.outbox[0].alternatives, [])
+
+    def test_render_many_renders_one_message_per_context(self):
+        rendered = emails.render_many("booking_confirmation", [
+            {"booking_id": i, "listing_title": f"Listing {i}"} for i in range(3)
+        ])
+        self.assertEqual([message.subject for message in rendered], [
+            "Booking Confirmation - Listing 0",
+            "Booking Confirmation - Listing 1",
+            "Booking Confirmation - Listing 2",
+        ])
+        self.assertIn("(ID: 2) for Listing 2", rendered[2].body)
+        self.assertEqual(rendered[0], emails.render(
+            "booking_confirmation", {"booking_id": 0, "listing_title": "Listing 0"}
+        ))
+
+    def test_templates_are_compiled_once(self):
+        loader = engines["django"].engine.template_loaders[0]
+        self.assertIsInstance(loader, CachedLoader)
+        emails.render("booking_confirmation", {"booking_id": 1, "listing_title": "A"})
+        compiled = loader.get_template("listings/email/booking_confirmation.txt")
+        emails.render_many("booking_confirmation", [{"booking_id": 2, "listing_title": "B"}] * 5)
+        self.assertIs(loader.get_template("listings/email/booking_confirmation.txt"), compiled)
@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import resource
+import sys
+from datetime import datetime, timezone
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings import exports
+from alx_travel_app.listings.models import Booking, Payment
+
+from .fixtures import create_booking, create_listing, create_payment
+from .task_queries import statements
+
+User = get_user_model()
+
+
+def body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.other = User.objects.create_user(username="other", email="other@example.com")
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        self.listing = create_listing()
+        self.bookings = [create_booking(self.guest, self.listing) for _ in range(3)]
+        self.bookings.append(create_booking(self.other, self.listing))
+        Booking.objects.filter(pk=self.bookings[0].pk).update(
+            status=Booking.BookingStatus.CONFIRMED,
+            created_at=datetime(2030, 1, 1, 12, tzinfo=timezone.utc),
+        )
+        self.client.force_authenticate(self.guest)
+
+    def export(self, name, **params):
+        return self.client.get(reverse(f"{name}-export"), params)
+
+    def test_bookings_csv(self):
+        response = self.export("booking")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="bookings.csv"', response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(body(response))))
+        # Only the user's own bookings, oldest first
+        self.assertEqual([row["booking_id"] for row in rows],
+                         [str(booking.pk) for booking in self.bookings[1:3] + self.bookings[:1]])
+        self.assertEqual(rows[1]["property_name"], "Lake House")
+        self.assertEqual(rows[1]["user_email"], "guest@example.com")
+        self.assertEqual(rows[1]["total_price"], "200.00")
+
+    def test_filters(self):
+        self.client.force_authenticate(self.staff)
+        response = self.export("booking", status="pending", **{"as": "ndjson"})
+        rows = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["start_date"], "2030-01-01")
+
+        response = self.export("booking", **{"from": "2030-01-01", "to": "2030-01-02"})
+        rows = list(csv.DictReader(io.StringIO(body(response))))
+        self.assertEqual([row["booking_id"] for row in rows], [str(self.bookings[0].pk)])
+
+    def test_payments_ndjson(self):
+        payment = create_payment(self.bookings[1])
+        create_payment(self.bookings[3])
+        response = self.export("payment", **{"as": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], str(payment.pk))
+        self.assertEqual(rows[0]["amount"], "200.00")
+        self.assertEqual(rows[0]["status"], Payment.PaymentStatus.PENDING)
+
+    def test_empty_csv_has_a_header(self):
+        response = self.export("payment")
+        self.assertEqual(body(response).splitlines(), [",".join(n for n, _ in exports.PAYMENT_COLUMNS)])
+
+    def test_invalid_parameters(self):
+        for params in [{"as": "xml"}, {"status": "lost"}, {"from": "2030-01-02", "to": "2030-01-01"}]:
+            self.assertEqual(self.export("booking", **params).status_code, 400, params)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_rows_are_read_in_keyset_pages(self):
+        self.client.force_authenticate(self.staff)
+        Booking.objects.update(created_at=datetime(2030, 1, 1, tzinfo=timezone.utc))
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(csv.DictReader(io.StringIO(body(self.export("booking")))))
+        self.assertEqual(len({row["booking_id"] for row in rows}), 4)
+        # Two full pages and an empty one
+        self.assertEqual(len(statements(queries)), 3)
+
+
+@tag("slow")
+@skipUnless(connection.vendor == "sqlite", "Fixture rows are generated with SQLite SQL")
+class ExportMemoryTests(TestCase):
+    ROWS = 1_000_000
+
+    @classmethod
+    def setUpTestData(cls):
+        guest = User.objects.create_user(username="guest", email="guest@example.com")
+        listing = create_listing()
+        # Generated in the database: a million ORM objects would dwarf the export itself
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < %s)
+                INSERT INTO {Booking._meta.db_table}
+                    (booking_id, property_id, user_id, start_date, end_date, total_price,
+                     status, created_at)
+                SELECT printf('%%032x', i), %s, %s, '2030-01-01', '2030-01-03', 200,
+                       'confirmed', datetime('2029-01-01', '+' || (i / 10) || ' seconds')
+                FROM n
+            """, [cls.ROWS - 1, listing.pk.hex, guest.pk])
+
+    def test_peak_memory_stays_flat(self):
+        response = exports.export_response(
+            Booking.objects.all(), exports.BOOKING_COLUMNS, "csv", "bookings"
+        )
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        unit = 1 if sys.platform == "darwin" else 1024
+        peak_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+        size = lines = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit - peak_before
+
+        self.assertEqual(lines, self.ROWS + 1)
+        self.assertGreater(size, 150 * 2**20)
+        # The whole export would need several hundred MB in memory
+        self.assertLess(growth, 50 * 2**20)
@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.models import Review
+
+from .fixtures import create_booking, create_listing, create_payment
+
+User = get_user_model()
+
+
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.listing = create_listing(description="A long description " * 50)
+        Review.objects.create(property=self.listing, user=self.guest, rating=4, comment="Lovely")
+        self.booking = create_booking(self.guest, self.listing)
+        self.payment = create_payment(self.booking, response_dump={"data": "x" * 1000})
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, " ".join(query["sql"] for query in queries.captured_queries)
+
+    def test_lists_leave_expandable_fields_out(self):
+        response, _ = self.get(reverse("listing-list"))
+        self.assertNotIn("reviews", response.data["results"][0])
+        self.client.force_authenticate(self.guest)
+        response, sql = self.get(reverse("payment-list"))
+        self.assertNotIn("response_dump", response.data["results"][0])
+        self.assertNotIn("response_dump", sql)
+
+    def test_expand_adds_them_back(self):
+        response, _ = self.get(reverse("listing-list"), expand="reviews")
+        self.assertEqual(response.data["results"][0]["reviews"][0]["comment"], "Lovely")
+        self.client.force_authenticate(self.guest)
+        response, _ = self.get(reverse("payment-list"), expand="response_dump")
+        self.assertEqual(response.data["results"][0]["response_dump"], {"data": "x" * 1000})
+
+    def test_details_include_expandable_fields(self):
+        response, _ = self.get(reverse("listing-detail", args=[self.listing.pk]))
+        self.assertEqual(len(response.data["reviews"]), 1)
+        response, _ = self.get(reverse("listing-detail", args=[self.listing.pk]), fields="name")
+        self.assertEqual(response.data, {"name": "Lake House"})
+
+    def test_fields_select_the_columns_read(self):
+        response, sql = self.get(reverse("listing-list"), fields="name,price_per_night")
+        self.assertEqual(list(response.data["results"][0]), ["name", "price_per_night"])
+        self.assertNotIn("description", sql)
+
+        self.client.force_authenticate(self.guest)
+        response, sql = self.get(reverse("booking-list"), fields="booking_id,status")
+        self.assertEqual(dict(response.data["results"][0]),
+                         {"booking_id": str(self.booking.pk), "status": "pending"})
+        self.assertNotIn("total_price", sql)
+
+    def test_deferred_columns_are_not_loaded_per_row(self):
+        for i in range(3):
+            guest = User.objects.create_user(username=f"reviewer{i}")
+            Review.objects.create(property=self.listing, user=guest, rating=5, comment="Great")
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("review-list"), {"fields": "comment"})
+        self.assertEqual(len(response.data["results"]), 4)
+
+    def test_pages_link_on_with_a_sparse_fieldset(self):
+        for i in range(3):
+            create_listing(name=f"Listing {i}")
+        response, _ = self.get(reverse("listing-list"), fields="name", page_size=2)
+        with self.assertNumQueries(1):
+            response = self.client.get(response.data["next"])
+        self.assertEqual([row["name"] for row in response.data["results"]],
+                         ["Listing 0", "Lake House"])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse("listing-list"), {"fields": "name,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"fields": ["Unknown field: secret"]})
+        response = self.client.get(reverse("listing-list"), {"expand": "name"})
+        self.assertEqual(response.data, {"expand": ["Not an expandable field: name"]})
+
+    def test_writes_answer_with_every_field(self):
+        self.client.force_authenticate(self.guest)
+        response = self.client.post(reverse("listing-list") + "?fields=name", {
+            "name": "Loft", "description": "Bright", "location": "Addis Ababa",
+            "price_per_night": 80,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("reviews", response.data)
+
+    @override_settings(LISTING_CACHE_TIMEOUT=60)
+    def test_cached_sparse_responses_are_revalidated(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        url = reverse("listing-list")
+        response, _ = self.get(url, fields="name")
+        response = self.client.get(url, {"fields": "name"}, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
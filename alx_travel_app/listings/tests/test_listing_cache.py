@@ -0,0 +1,125 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.cache import CATALOGUE_VERSION_KEY
+from alx_travel_app.listings.models import Booking, Listing, Review
+
+User = get_user_model()
+
+
+@override_settings(LISTING_CACHE_TIMEOUT=60)
+class ListingResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guest = User.objects.create_user(username="guest", password="password123")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing = Listing.objects.create(
+                host=self.host,
+                name="Lake House",
+                description="A nice place",
+                location="Bishoftu",
+                price_per_night=100,
+            )
+        self.list_url = reverse("listing-list")
+        self.detail_url = reverse("listing-detail", args=[self.listing.pk])
+
+    def test_repeated_reads_skip_the_database(self):
+        for url in [self.list_url, self.detail_url]:
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(first.data, second.data)
+
+    def test_query_strings_are_cached_separately(self):
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url, {"min_price": 500})
+        self.assertEqual(response.data["results"], [])
+
+    def test_saving_a_listing_invalidates_its_responses(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(self.host)
+            self.client.patch(self.detail_url, {"name": "Lake Villa"})
+        self.assertEqual(self.client.get(self.detail_url).data["name"], "Lake Villa")
+        self.assertEqual(self.client.get(self.list_url).data["results"][0]["name"], "Lake Villa")
+
+    def test_reviews_invalidate_the_listing(self):
+        self.client.get(self.detail_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(
+                property=self.listing, user=self.guest, rating=4, comment="Nice"
+            )
+        self.assertEqual(len(self.client.get(self.detail_url).data["reviews"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        self.assertEqual(self.client.get(self.detail_url).data["reviews"], [])
+
+    def test_bookings_invalidate_the_availability_filter(self):
+        params = {"available_from": "2030-01-01", "available_to": "2030-01-03"}
+        self.assertEqual(len(self.client.get(self.list_url, params).data["results"]), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                property=self.listing,
+                user=self.guest,
+                start_date=date(2030, 1, 1),
+                end_date=date(2030, 1, 5),
+                total_price=400,
+            )
+        self.assertEqual(self.client.get(self.list_url, params).data["results"], [])
+
+    def test_etag_revalidation_returns_304(self):
+        for url in [self.list_url, self.detail_url]:
+            response = self.client.get(url)
+            self.assertIn("ETag", response)
+            # A page can change without any listing's updated_at moving
+            self.assertNotIn("Last-Modified", response)
+
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated.content, b"")
+
+    def test_etag_changes_when_a_review_comment_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(
+                property=self.listing, user=self.guest, rating=5, comment="Great"
+            )
+        etag = self.client.get(self.detail_url)["ETag"]
+        updated_at = Listing.objects.get(pk=self.listing.pk).updated_at
+
+        # Editing only the comment leaves the listing's updated_at alone
+        self.client.force_authenticate(self.guest)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("review-detail", args=[review.pk]), {"comment": "Meh"})
+        self.assertEqual(Listing.objects.get(pk=self.listing.pk).updated_at, updated_at)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["reviews"][0]["comment"], "Meh")
+
+    def test_etag_changes_when_listing_changes(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(property=self.listing, user=self.guest, rating=5, comment="Great")
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @override_settings(LISTING_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_caching(self):
+        cache.clear()
+        self.client.get(self.list_url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url)
+        self.assertIn("ETag", response)
+        self.client.get(self.detail_url)
+        # Not even the version keys are read or written
+        self.assertIsNone(cache.get(CATALOGUE_VERSION_KEY))
+        self.assertIsNone(cache.get(f"listings:listing:{self.listing.pk}:version"))
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.models import Listing, Review
+
+User = get_user_model()
+
+
+class ListingQueryCountTests(APITestCase):
+    """The listing read path must not issue a query per listing or review"""
+
+    # One query for the listings, one prefetch for their reviews; lists
+    # leave the reviews out unless expanded
+    LIST_QUERIES = 1
+    EXPANDED_LIST_QUERIES = 2
+    RETRIEVE_QUERIES = 2
+
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guests = [
+            User.objects.create_user(username=f"guest{i}", password="password123")
+            for i in range(5)
+        ]
+
+    def create_listings(self, count, reviews_per_listing):
+        listings = []
+        for i in range(count):
+            listing = Listing.objects.create(
+                host=self.host,
+                name=f"Listing {i}",
+                description="A nice place",
+                location="Addis Ababa",
+                price_per_night=100,
+            )
+            for guest in self.guests[:reviews_per_listing]:
+                Review.objects.create(
+                    property=listing, user=guest, rating=4, comment="Lovely"
+                )
+            listings.append(listing)
+        return listings
+
+    def test_list_query_count_is_constant(self):
+        for count, reviews in [(1, 0), (3, 2), (10, 5)]:
+            Listing.objects.all().delete()
+            self.create_listings(count, reviews)
+            with self.assertNumQueries(self.LIST_QUERIES):
+                response = self.client.get(reverse("listing-list"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), count)
+            with self.assertNumQueries(self.EXPANDED_LIST_QUERIES):
+                self.client.get(reverse("listing-list"), {"expand": "reviews"})
+
+    def test_retrieve_query_count_is_constant(self):
+        listing = self.create_listings(1, 5)[0]
+        with self.assertNumQueries(self.RETRIEVE_QUERIES):
+            response = self.client.get(reverse("listing-detail", args=[listing.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["reviews"]), 5)
+
+    def test_expanded_list_includes_prefetched_reviews(self):
+        self.create_listings(2, 3)
+        response = self.client.get(reverse("listing-list"), {"expand": "reviews"})
+        for item in response.data["results"]:
+            self.assertEqual(len(item["reviews"]), 3)
+        response = self.client.get(reverse("listing-list"))
+        self.assertNotIn("reviews", response.data["results"][0])
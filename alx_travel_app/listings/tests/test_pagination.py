@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from alx_travel_app.listings.models import Booking, Listing
+from alx_travel_app.listings.pagination import CreatedAtCursorPagination
+
+User = get_user_model()
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guest = User.objects.create_user(username="guest", password="password123")
+        self.listings = [
+            Listing.objects.create(
+                host=self.host,
+                name=f"Listing {i}",
+                description="A nice place",
+                location="Addis Ababa",
+                price_per_night=100,
+            )
+            for i in range(12)
+        ]
+
+    def walk(self, url):
+        pages = []
+        params = {"page_size": 5}
+        while url:
+            response = self.client.get(url, params)
+            params = None
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data["results"])
+            url = response.data["next"]
+        return pages
+
+    def test_listing_pages_cover_every_row_once(self):
+        pages = self.walk(reverse("listing-list"))
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        ids = [item["property_id"] for page in pages for item in page]
+        self.assertEqual(len(set(ids)), 12)
+
+    def test_newest_listing_comes_first(self):
+        response = self.client.get(reverse("listing-list"))
+        self.assertEqual(
+            response.data["results"][0]["property_id"], str(self.listings[-1].pk)
+        )
+
+    def test_page_size_is_capped(self):
+        paginator = CreatedAtCursorPagination()
+        paginator.max_page_size = 3
+        request = Request(APIRequestFactory().get("/", {"page_size": 50}))
+        self.assertEqual(paginator.get_page_size(request), 3)
+
+    def test_deep_pages_use_a_range_filter_not_offset(self):
+        first = self.client.get(reverse("listing-list"), {"page_size": 5})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data["next"])
+        sql = queries.captured_queries[0]["sql"]
+        self.assertIn("created_at", sql.split("WHERE", 1)[1])
+        self.assertNotIn("OFFSET", sql)
+
+    def test_tied_orderings_page_by_key_not_offset(self):
+        # Every listing has the same price: the pages are cut within the ties
+        url = reverse("listing-list") + "?ordering=price_per_night"
+        with CaptureQueriesContext(connection) as queries:
+            pages = self.walk(url)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        ids = [item["property_id"] for page in pages for item in page]
+        self.assertEqual(ids, [str(listing.pk) for listing in reversed(self.listings)])
+        self.assertFalse([q for q in queries.captured_queries if "OFFSET" in q["sql"]])
+
+    def test_previous_links_walk_back_through_the_same_pages(self):
+        url = reverse("listing-list") + "?ordering=-price_per_night&page_size=5"
+        first = self.client.get(url).data
+        second = self.client.get(first["next"]).data
+        third = self.client.get(second["next"]).data
+        self.assertIsNone(third["next"])
+        back = self.client.get(third["previous"]).data
+        self.assertEqual(back["results"], second["results"])
+        back = self.client.get(back["previous"]).data
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(back["previous"])
+
+    def test_malformed_cursors_are_not_found(self):
+        first = self.client.get(reverse("listing-list"), {"page_size": 5})
+        # A cursor is only valid for the ordering it was made with
+        response = self.client.get(first.data["next"] + "&ordering=price_per_night")
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse("listing-list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_bookings_are_paginated_per_user(self):
+        for i in range(7):
+            Booking.objects.create(
+                property=self.listings[i],
+                user=self.guest,
+                start_date=date(2030, 1, 1) + timedelta(days=i * 10),
+                end_date=date(2030, 1, 3) + timedelta(days=i * 10),
+                total_price=200,
+            )
+        self.client.force_authenticate(self.guest)
+        pages = self.walk(reverse("booking-list"))
+        self.assertEqual([len(page) for page in pages], [5, 2])
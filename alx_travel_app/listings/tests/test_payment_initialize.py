@@ -0,0 +1,154 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings import payments
+from alx_travel_app.listings.models import Payment
+from alx_travel_app.listings.tasks import initialize_payment_checkout, notify_payment_webhook
+
+from .chapa_stub import ChapaStubMixin
+from .fixtures import create_booking, create_payment
+
+User = get_user_model()
+
+
+class AsyncPaymentInitializeTests(ChapaStubMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.guest = User.objects.create_user(
+            username="guest", email="guest@example.com", password="password123"
+        )
+        self.payment = create_payment(create_booking(self.guest))
+        self.client.force_authenticate(self.guest)
+        self.url = reverse("payment-initialize", args=[self.payment.pk])
+
+    def test_initialize_returns_202_with_status_url(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["transaction_ref"], str(self.payment.pk))
+        self.assertTrue(response.data["status_url"].endswith(
+            reverse("payment-status", args=[self.payment.pk])
+        ))
+
+    def test_task_stores_checkout_url_and_emails_it(self):
+        self.client.post(self.url)
+        self.payment.refresh_from_db()
+        self.assertEqual(
+            self.payment.checkout_url,
+            f"https://checkout.chapa.co/checkout/payment/{self.payment.pk}",
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(self.payment.checkout_url, mail.outbox[0].body)
+
+    def test_status_endpoint_reports_progress(self):
+        status_url = reverse("payment-status", args=[self.payment.pk])
+        before = self.client.get(status_url)
+        self.assertEqual(before.status_code, 200)
+        self.assertFalse(before.data["initialized"])
+
+        self.client.post(self.url)
+        with self.assertNumQueries(1):
+            after = self.client.get(status_url)
+        self.assertTrue(after.data["initialized"])
+        self.assertEqual(after.data["status"], Payment.PaymentStatus.PENDING)
+
+    def test_status_endpoint_hides_other_users_payments(self):
+        self.client.force_authenticate(User.objects.create_user(username="other"))
+        response = self.client.get(reverse("payment-status", args=[self.payment.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_status_endpoint_404s_for_a_malformed_id(self):
+        response = self.client.get(reverse("payment-status", args=["not-a-uuid"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_redelivered_task_does_not_call_chapa_twice(self):
+        self.client.post(self.url)
+        initialize_payment_checkout(str(self.payment.pk), "http://cb", "http://ret")
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_a_refused_repeat_keeps_the_stored_checkout_url(self):
+        # Read before the first call stored its checkout URL, as a second
+        # initialize running alongside it would have
+        stale = Payment.objects.get(pk=self.payment.pk)
+        self.client.post(self.url)
+        self.stub.queue(400, {
+            "status": "failed", "message": "Transaction reference has been used before",
+        })
+
+        checkout_url = payments.initialize_payment(stale, "http://cb", "http://ret")
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.PENDING)
+        self.assertEqual(checkout_url, self.payment.checkout_url)
+        self.assertEqual(self.payment.response_dump["status"], "success")
+
+    def test_rejected_initialization_marks_payment_failed(self):
+        self.stub.queue(400, {"status": "failed", "message": "Invalid currency"})
+        self.client.post(self.url)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.PaymentStatus.FAILED)
+        self.assertEqual(self.payment.response_dump["message"], "Invalid currency")
+        self.assertEqual(mail.outbox, [])
+
+    def test_result_is_posted_to_notify_url(self):
+        notify_url = f"{self.stub.url}/hooks/payments"
+        # The stub listens on plain http on loopback, which the check refuses
+        with mock.patch.object(payments, "check_notify_url"):
+            self.client.post(self.url, {"notify_url": notify_url})
+        method, path, body = self.stub.requests[-1]
+        self.assertEqual((method, path), ("POST", "/hooks/payments"))
+        self.assertEqual(body["transaction_ref"], str(self.payment.pk))
+        self.assertTrue(body["checkout_url"])
+
+    def test_invalid_notify_url_is_rejected(self):
+        response = self.client.post(self.url, {"notify_url": "not a url"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stub.requests, [])
+
+    @override_settings(PAYMENT_NOTIFY_ALLOWED_HOSTS=[
+        "hooks.example.com", "localhost", "127.0.0.1", "10.0.0.5", "169.254.169.254", "[::1]",
+    ])
+    def test_notify_urls_that_could_reach_internal_hosts_are_rejected(self):
+        for notify_url in [
+            "http://hooks.example.com/payments",  # not https
+            "https://other.example.com/payments",  # not allowed
+            "https://localhost/payments",
+            "https://127.0.0.1:8000/payments",
+            "https://10.0.0.5/payments",
+            "https://169.254.169.254/latest/meta-data/",
+            "https://[::1]/payments",
+        ]:
+            response = self.client.post(self.url, {"notify_url": notify_url})
+            self.assertEqual(response.status_code, 400, notify_url)
+            self.assertIn("notify_url", response.data)
+        self.assertEqual(self.stub.requests, [])
+
+    @override_settings(PAYMENT_NOTIFY_ALLOWED_HOSTS=[".example.com", "8.8.8.8"])
+    def test_notify_urls_on_allowed_public_hosts_pass(self):
+        payments.check_notify_url("https://8.8.8.8/payments")
+        with self.assertRaisesMessage(ValueError, "is not allowed"):
+            payments.check_notify_url("https://8.8.4.4/payments")
+
+    @override_settings(PAYMENT_NOTIFY_ALLOWED_HOSTS=[])
+    def test_notify_url_is_refused_without_allowed_hosts(self):
+        response = self.client.post(self.url, {"notify_url": "https://8.8.8.8/payments"})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PAYMENT_NOTIFY_ALLOWED_HOSTS=["127.0.0.1"])
+    def test_notification_is_checked_again_when_sent(self):
+        result = notify_payment_webhook(f"{self.stub.url}/hooks/payments", {})
+        self.assertIn("Not notifying", result)
+        self.assertEqual(self.stub.requests, [])
+
+    @override_settings(CHAPA_INITIALIZE_ASYNC=False)
+    def test_synchronous_mode_returns_checkout_url(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["checkout_url"],
+            f"https://checkout.chapa.co/checkout/payment/{self.payment.pk}",
+        )
@@ -0,0 +1,174 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from alx_travel_app.celery import app
+from alx_travel_app.listings import reconciliation
+from alx_travel_app.listings.models import Booking, Payment
+from alx_travel_app.listings.tasks import (
+    RECONCILE_LOCK_KEY, reconcile_lock_timeout, reconcile_pending_payments,
+)
+
+from .chapa_stub import ChapaStubMixin
+from .fixtures import create_booking, create_listing, create_payment
+
+User = get_user_model()
+
+
+@override_settings(PAYMENT_RECONCILE_STALE_AFTER=600, PAYMENT_RECONCILE_CONCURRENCY=4)
+class PaymentReconciliationTests(ChapaStubMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.listing = create_listing()
+
+    def pending_payment(self, minutes_ago=30, **fields):
+        fields.setdefault("checkout_url", "https://checkout.chapa.co/checkout/payment/x")
+        payment = create_payment(create_booking(self.guest, self.listing), **fields)
+        Payment.objects.filter(pk=payment.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=minutes_ago)
+        )
+        return payment
+
+    def test_paid_payments_are_completed_and_confirmed(self):
+        payments = [self.pending_payment() for _ in range(5)]
+        result = reconcile_pending_payments()
+        self.assertIn("5 completed", result)
+        for payment in payments:
+            payment.refresh_from_db()
+            self.assertEqual(payment.status, Payment.PaymentStatus.COMPLETED)
+            self.assertEqual(payment.booking.status, Booking.BookingStatus.CONFIRMED)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_only_stale_initialized_payments_are_checked(self):
+        stale = self.pending_payment()
+        self.pending_payment(minutes_ago=1)
+        self.pending_payment(checkout_url=None)
+        self.pending_payment(status=Payment.PaymentStatus.FAILED)
+        expired = self.pending_payment()
+        Payment.objects.filter(pk=expired.pk).update(created_at=timezone.now() - timedelta(days=2))
+
+        reconcile_pending_payments()
+        self.assertEqual(
+            [path for _, path, _ in self.stub.requests],
+            [f"/v1/transaction/verify/{stale.pk}"],
+        )
+
+    def test_chunks_are_written_with_bulk_updates(self):
+        for _ in range(6):
+            self.pending_payment()
+        with CaptureQueriesContext(connection) as queries:
+            result = reconciliation.reconcile_pending_payments(chunk_size=3)
+        statements = [q["sql"].split()[0] for q in queries
+                      if "SAVEPOINT" not in q["sql"]]
+        # Per chunk of three: fetch ids, lock payments, bulk update payments
+        # and bookings; plus the final empty fetch
+        self.assertEqual(statements, ["SELECT", "SELECT", "UPDATE", "UPDATE"] * 2 + ["SELECT"])
+        self.assertEqual(len(result.completed), 6)
+        self.assertEqual(len(self.stub.requests), 6)
+
+    def test_unpaid_payments_stay_pending_until_stale_again(self):
+        payment = self.pending_payment()
+        self.stub.queue(400, {"status": "failed", "message": "Payment not paid yet", "data": None})
+        reconcile_pending_payments()
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.PaymentStatus.PENDING)
+        self.assertFalse(reconciliation.stale_payments().exists())
+
+    def test_declined_payments_are_marked_failed(self):
+        payment = self.pending_payment()
+        self.stub.queue(200, {"status": "success", "data": {"status": "failed"}})
+        reconcile_pending_payments()
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, Payment.PaymentStatus.FAILED)
+        self.assertEqual(payment.booking.status, Booking.BookingStatus.PENDING)
+        self.assertEqual(mail.outbox, [])
+
+    def test_chapa_errors_are_retried_next_run(self):
+        payment = self.pending_payment()
+        for _ in range(3):
+            self.stub.queue(503)
+        result = reconciliation.reconcile_pending_payments()
+        self.assertEqual(result.errors, 1)
+        self.assertTrue(reconciliation.stale_payments().filter(pk=payment.pk).exists())
+
+    def test_repeated_runs_confirm_once(self):
+        self.pending_payment()
+        reconcile_pending_payments()
+        Payment.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        reconcile_pending_payments()
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_payment_completed_elsewhere_is_not_overwritten(self):
+        payment = self.pending_payment()
+        responses = reconciliation.verify_payments([payment.pk])
+        # A concurrent run or the verify endpoint got there first
+        Payment.objects.filter(pk=payment.pk).update(status=Payment.PaymentStatus.COMPLETED)
+        result = reconciliation.apply_verifications(responses)
+        self.assertEqual((result.checked, result.completed), (0, []))
+
+    def test_overlapping_runs_are_skipped(self):
+        self.pending_payment()
+        cache.add(RECONCILE_LOCK_KEY, True)
+        self.assertEqual(reconcile_pending_payments(), "Payment reconciliation already running")
+        self.assertEqual(self.stub.requests, [])
+
+    def test_a_run_releases_its_lock(self):
+        reconcile_pending_payments()
+        self.assertIsNone(cache.get(RECONCILE_LOCK_KEY))
+
+    def test_a_run_that_outlived_its_lock_leaves_the_next_one(self):
+        run = reconciliation.reconcile_pending_payments
+
+        def slow_run(**kwargs):
+            # The lock expires mid-run and the next tick's worker takes it
+            cache.delete(RECONCILE_LOCK_KEY)
+            self.assertTrue(cache.add(RECONCILE_LOCK_KEY, "next-run"))
+            return run(**kwargs)
+
+        with mock.patch.object(reconciliation, "reconcile_pending_payments", slow_run):
+            reconcile_pending_payments()
+        self.assertEqual(cache.get(RECONCILE_LOCK_KEY), "next-run")
+
+    @override_settings(PAYMENT_RECONCILE_CHUNK_SIZE=1)
+    def test_a_run_that_lost_its_lock_stops_between_chunks(self):
+        self.pending_payment(minutes_ago=40)
+        self.pending_payment(minutes_ago=30)
+        verify = reconciliation.verify_payments
+
+        def slow_verify(ids):
+            cache.set(RECONCILE_LOCK_KEY, "next-run")
+            return verify(ids)
+
+        with mock.patch.object(reconciliation, "verify_payments", slow_verify):
+            reconcile_pending_payments()
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(cache.get(RECONCILE_LOCK_KEY), "next-run")
+
+    @override_settings(PAYMENT_RECONCILE_CHUNK_SIZE=20, PAYMENT_RECONCILE_CONCURRENCY=8,
+                       CHAPA_MAX_RETRIES=2, CHAPA_CONNECT_TIMEOUT=3, CHAPA_READ_TIMEOUT=10,
+                       CHAPA_BACKOFF_MAX=2)
+    def test_lock_outlasts_a_chunk_of_timed_out_calls(self):
+        # 3 rounds of 8 calls, each 3 attempts of a timeout and a backoff
+        self.assertEqual(reconcile_lock_timeout(), 3 * 3 * (3 + 10 + 2))
+
+
+class BeatScheduleTests(TransactionTestCase):
+    # The scheduler closes connections it finds inside a transaction
+    def test_task_is_registered_with_the_database_scheduler(self):
+        from django_celery_beat.models import PeriodicTask
+        from django_celery_beat.schedulers import DatabaseScheduler
+
+        DatabaseScheduler(app=app)
+        task = PeriodicTask.objects.get(name="reconcile-pending-payments")
+        self.assertEqual(task.task, "alx_travel_app.listings.tasks.reconcile_pending_payments")
+        self.assertIn(reconcile_pending_payments.name, app.tasks)
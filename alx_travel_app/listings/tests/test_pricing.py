@@ -0,0 +1,126 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings import pricing
+from alx_travel_app.listings.models import Booking, ListingRate
+
+from .fixtures import create_booking, create_listing
+
+User = get_user_model()
+
+# 2030-01-01 is a Tuesday: the week's Friday and Saturday nights are the 4th and 5th
+CHECK_IN, CHECK_OUT = date(2030, 1, 1), date(2030, 1, 8)
+
+
+def add_rate(listing, start, end, **fields):
+    return ListingRate.objects.create(listing=listing, start_date=start, end_date=end, **fields)
+
+
+class PricingEngineTests(TestCase):
+    def setUp(self):
+        self.listing = create_listing(price_per_night=100)
+
+    def test_nights_without_rates_cost_the_base_price(self):
+        quote = pricing.quote(self.listing.pk, CHECK_IN, CHECK_OUT)
+        self.assertEqual(quote.total, Decimal("700.00"))
+        self.assertEqual(quote.nights()[0], (CHECK_IN, Decimal("100.00")))
+
+    def test_seasonal_price_and_weekend_multiplier(self):
+        add_rate(self.listing, date(2030, 1, 3), date(2030, 1, 10), price=150)
+        add_rate(self.listing, date(2029, 6, 1), date(2030, 6, 1),
+                 weekdays=ListingRate.WEEKEND, multiplier=Decimal("1.2"), priority=10)
+        # Ends before the stay
+        add_rate(self.listing, date(2029, 12, 1), CHECK_IN, price=1)
+
+        with self.assertNumQueries(1):
+            quote = pricing.quote(self.listing.pk, CHECK_IN, CHECK_OUT)
+        self.assertEqual(
+            quote.nightly,
+            [Decimal(price) for price in ["100", "100", "150", "180", "180", "150", "150"]],
+        )
+        self.assertEqual(quote.total, Decimal("1010.00"))
+
+    def test_rates_apply_in_priority_order(self):
+        add_rate(self.listing, CHECK_IN, CHECK_OUT, multiplier=Decimal("0.5"), priority=1)
+        add_rate(self.listing, CHECK_IN, CHECK_OUT, price=300, priority=0)
+        self.assertEqual(pricing.quote(self.listing.pk, CHECK_IN, CHECK_OUT).total, Decimal("1050.00"))
+
+    def test_weekday_slices_match_a_night_by_night_calculation(self):
+        rates = [(date(2030, 1, day), date(2030, 3, 1), weekdays, None, Decimal("1.1"))
+                 for day, weekdays in [(3, 0b0000101), (9, 0b1100000), (20, 0b0011010)]]
+        nightly = pricing.price_nights(Decimal("100"), rates, CHECK_IN, date(2030, 2, 1))
+        for i, price in enumerate(nightly):
+            night = date.fromordinal(CHECK_IN.toordinal() + i)
+            expected = Decimal("100")
+            for start, end, weekdays, _, multiplier in rates:
+                if start <= night < end and weekdays & 1 << night.weekday():
+                    expected = (expected * multiplier).quantize(pricing.CENT)
+            self.assertEqual(price, expected, night)
+
+    def test_unknown_listing(self):
+        self.assertIsNone(pricing.quote("00000000-0000-0000-0000-000000000000", CHECK_IN, CHECK_OUT))
+
+
+class BookingPriceTests(APITestCase):
+    def setUp(self):
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.listing = create_listing(price_per_night=100)
+        add_rate(self.listing, CHECK_IN, CHECK_OUT, weekdays=ListingRate.WEEKEND, price=250)
+        self.client.force_authenticate(self.guest)
+
+    def test_client_total_is_ignored(self):
+        response = self.client.post(reverse("booking-list"), {
+            "property": str(self.listing.pk),
+            "start_date": "2030-01-03",
+            "end_date": "2030-01-06",
+            "total_price": "1.00",
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["total_price"], "600.00")
+
+    def test_changing_dates_reprices_the_booking(self):
+        booking = create_booking(self.guest, self.listing, start_date=CHECK_IN, end_date=date(2030, 1, 3))
+        url = reverse("booking-detail", args=[booking.pk])
+        self.client.patch(url, {"status": Booking.BookingStatus.CONFIRMED})
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_price, 200)
+
+        self.client.patch(url, {"end_date": "2030-01-05"})
+        booking.refresh_from_db()
+        self.assertEqual(booking.total_price, 550)
+
+
+@override_settings(LISTING_CACHE_TIMEOUT=60)
+class QuoteEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing = create_listing(price_per_night=100)
+        self.url = reverse("listing-quote", args=[self.listing.pk])
+        self.params = {"from": "2030-01-03", "to": "2030-01-06"}
+
+    def test_quote(self):
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_price"], "300.00")
+        self.assertEqual(response.data["nights"][0], {"date": date(2030, 1, 3), "price": "100.00"})
+
+    def test_repeated_quotes_are_cached_until_a_rate_changes(self):
+        self.client.get(self.url, self.params)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, self.params)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_rate(self.listing, CHECK_IN, CHECK_OUT, weekdays=ListingRate.WEEKEND, price=250)
+        self.assertEqual(self.client.get(self.url, self.params).data["total_price"], "600.00")
+
+    def test_invalid_and_unknown(self):
+        self.assertEqual(self.client.get(self.url, {"from": "2030-01-06", "to": "2030-01-03"}).status_code, 400)
+        url = reverse("listing-quote", args=["00000000-0000-0000-0000-000000000000"])
+        self.assertEqual(self.client.get(url, self.params).status_code, 404)
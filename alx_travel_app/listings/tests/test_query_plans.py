@@ -0,0 +1,111 @@
+from datetime import date, datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings import seeding
+from alx_travel_app.listings.models import Booking, Listing, Payment
+
+from .fixtures import create_payment
+from .query_plans import QueryPlanMixin
+
+User = get_user_model()
+
+OPTIONS = seeding.SeedOptions(users=20, listings=40, bookings=200, start=date(2030, 1, 1))
+
+
+class QueryPlanTests(QueryPlanMixin, APITestCase):
+    """The main API and admin queries read through indexes on a seeded dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seeding.seed(OPTIONS, log=lambda message: None)
+        # User 0 is staff; user 1 a guest with bookings
+        cls.staff = User.objects.get(username=seeding.username(OPTIONS, 0))
+        cls.guest = User.objects.get(username=seeding.username(OPTIONS, 1))
+        for booking in Booking.objects.order_by("pk")[:20]:
+            create_payment(booking)
+        cls.listing = Listing.objects.order_by("pk").first()
+        cls.guest_booking = Booking.objects.filter(user=cls.guest).first()
+
+    def get(self, url, user=None, **params):
+        if user is not None:
+            self.client.force_login(user)
+        with self.assertNoFullScans():
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        # Streamed exports run their queries as they're read
+        b"".join(response.streaming_content) if response.streaming else None
+        return response
+
+    def test_listing_catalogue(self):
+        self.get(reverse("listing-list"))
+        self.get(reverse("listing-list"), ordering="-avg_rating")
+        self.get(reverse("listing-list"), ordering="price_per_night")
+        self.get(reverse("listing-list"), min_price=100, max_price=300)
+        self.get(reverse("listing-list"), available_from="2030-02-01", available_to="2030-02-05")
+
+    def test_deep_pages(self):
+        for ordering in ["-created_at", "-avg_rating", "price_per_night"]:
+            first = self.get(reverse("listing-list"), ordering=ordering, page_size=5)
+            self.get(first.data["next"])
+        first = self.get(reverse("booking-list"), user=self.staff, page_size=5)
+        self.get(first.data["next"])
+
+    def test_listing_detail_availability_and_quote(self):
+        self.get(reverse("listing-detail", args=[self.listing.pk]))
+        stay = {"from": "2030-01-01", "to": "2030-01-15"}
+        self.get(reverse("listing-availability", args=[self.listing.pk]), **stay)
+        self.get(reverse("listing-quote", args=[self.listing.pk]), **stay)
+
+    def test_bookings(self):
+        self.get(reverse("booking-list"), user=self.guest)
+        self.get(reverse("booking-detail", args=[self.guest_booking.pk]), user=self.guest)
+        self.get(reverse("booking-list"), user=self.staff)
+        self.get(reverse("booking-export"), user=self.staff,
+                 status=Booking.BookingStatus.CONFIRMED, **{"from": "2020-01-01"})
+
+    def test_payments(self):
+        self.get(reverse("payment-list"), user=self.guest)
+        self.get(reverse("payment-list"), user=self.staff)
+        self.get(reverse("payment-export"), user=self.staff,
+                 status=Payment.PaymentStatus.PENDING, **{"from": "2020-01-01"})
+
+    def test_scans_are_caught(self):
+        with self.assertRaisesMessage(AssertionError, "listings_booking"):
+            with self.assertNoFullScans():
+                list(Booking.objects.filter(total_price=100))
+
+    def test_reviews(self):
+        self.get(reverse("review-list"))
+
+    def test_admin_filters(self):
+        self.client.force_login(User.objects.create_superuser(username="admin"))
+        self.get(reverse("admin:listings_listing_changelist"),
+                 location=self.listing.location, created_at__gte="2020-01-01")
+        self.get(reverse("admin:listings_booking_changelist"),
+                 status__exact=Booking.BookingStatus.CONFIRMED,
+                 start_date__gte="2030-01-01", start_date__lt="2030-02-01")
+        self.get(reverse("admin:listings_booking_changelist"),
+                 status__exact=Booking.BookingStatus.PENDING, end_date__gte="2030-01-01")
+        self.get(reverse("admin:listings_payment_changelist"),
+                 status__exact=Payment.PaymentStatus.PENDING, currency__exact="ETB",
+                 created_at__gte="2020-01-01")
+
+    def test_admin_filters_narrow_their_indexes(self):
+        since = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.assertUsesIndex(
+            Listing.objects.filter(location=self.listing.location, created_at__gte=since),
+            "listing_location_created_idx",
+        )
+        self.assertUsesIndex(
+            Booking.objects.filter(status=Booking.BookingStatus.CONFIRMED,
+                                   start_date__gte=date(2030, 1, 1)),
+            "booking_status_dates_idx",
+        )
+        self.assertUsesIndex(
+            Payment.objects.filter(status=Payment.PaymentStatus.PENDING, currency="ETB",
+                                   created_at__gte=since),
+            "payment_currency_idx",
+        )
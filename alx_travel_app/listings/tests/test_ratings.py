@@ -0,0 +1,173 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings.models import Listing, Review
+
+User = get_user_model()
+
+
+class ListingRatingAggregateTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host", password="password123")
+        self.guests = [
+            User.objects.create_user(username=f"guest{i}", password="password123")
+            for i in range(3)
+        ]
+        self.listing = self.create_listing("Lake House")
+
+    def create_listing(self, name):
+        return Listing.objects.create(
+            host=self.host,
+            name=name,
+            description="A nice place",
+            location="Bishoftu",
+            price_per_night=100,
+        )
+
+    def review(self, guest, rating, listing=None):
+        self.client.force_authenticate(guest)
+        response = self.client.post(reverse("review-list"), {
+            "property": str((listing or self.listing).pk),
+            "user": guest.pk,
+            "rating": rating,
+            "comment": "Nice",
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["review_id"]
+
+    def assertAggregates(self, count, total, average, listing=None):
+        listing = Listing.objects.get(pk=(listing or self.listing).pk)
+        self.assertEqual(
+            (listing.review_count, listing.rating_sum, listing.avg_rating),
+            (count, total, average),
+        )
+
+    def test_new_listing_has_no_rating(self):
+        self.assertAggregates(0, 0, Decimal("0"))
+        response = self.client.get(reverse("listing-detail", args=[self.listing.pk]))
+        self.assertIsNone(response.data["avg_rating"])
+
+    def test_creating_reviews_updates_aggregates(self):
+        self.review(self.guests[0], 5)
+        self.review(self.guests[1], 4)
+        self.review(self.guests[2], 4)
+        self.assertAggregates(3, 13, Decimal("4.33"))
+
+    def test_editing_a_rating_applies_the_difference(self):
+        review_id = self.review(self.guests[0], 5)
+        self.review(self.guests[1], 3)
+        response = self.client.patch(reverse("review-detail", args=[review_id]), {"rating": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregates(2, 4, Decimal("2.00"))
+
+    def test_editing_only_the_comment_leaves_aggregates(self):
+        review_id = self.review(self.guests[0], 5)
+        self.client.patch(reverse("review-detail", args=[review_id]), {"comment": "Great"})
+        self.assertAggregates(1, 5, Decimal("5.00"))
+
+    def test_editing_a_review_loaded_without_its_rating(self):
+        review_id = self.review(self.guests[0], 5)
+        self.review(self.guests[1], 3)
+        review = Review.objects.only("pk", "comment").get(pk=review_id)
+        review.rating = 1
+        review.save()
+        self.assertAggregates(2, 4, Decimal("2.00"))
+
+        review = Review.objects.defer("rating").get(pk=review_id)
+        review.rating = 4
+        review.save()
+        self.assertAggregates(2, 7, Decimal("3.50"))
+
+    def test_moving_a_review_to_another_listing(self):
+        other = self.create_listing("City Loft")
+        review = Review.objects.get(pk=self.review(self.guests[0], 4))
+        review.property = other
+        review.save()
+        self.assertAggregates(0, 0, Decimal("0"))
+        self.assertAggregates(1, 4, Decimal("4.00"), listing=other)
+
+    def test_deleting_a_review_updates_aggregates(self):
+        review_id = self.review(self.guests[0], 5)
+        self.review(self.guests[1], 2)
+        self.client.force_authenticate(self.guests[0])
+        self.client.delete(reverse("review-detail", args=[review_id]))
+        self.assertAggregates(1, 2, Decimal("2.00"))
+
+    def test_admin_bulk_delete_updates_aggregates(self):
+        self.review(self.guests[0], 5)
+        self.review(self.guests[1], 2)
+        admin = User.objects.create_superuser(username="admin", password="password123")
+        self.client.force_login(admin)
+        response = self.client.post(reverse("admin:listings_review_changelist"), {
+            "action": "delete_selected",
+            "_selected_action": [str(pk) for pk in Review.objects.values_list("pk", flat=True)],
+            "post": "yes",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertAggregates(0, 0, Decimal("0"))
+
+    def test_rebuild_command_fixes_drift(self):
+        Review.objects.bulk_create([
+            Review(property=self.listing, user=self.guests[0], rating=5, comment="ok"),
+            Review(property=self.listing, user=self.guests[1], rating=2, comment="ok"),
+        ])
+        self.assertAggregates(0, 0, Decimal("0"))
+
+        out = StringIO()
+        call_command("rebuild_ratings", batch_size=1, stdout=out)
+        self.assertIn("1 listings had drifted", out.getvalue())
+        self.assertAggregates(2, 7, Decimal("3.50"))
+
+    @override_settings(LISTING_CACHE_TIMEOUT=60)
+    def test_rebuild_drops_cached_responses(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        detail_url = reverse("listing-detail", args=[self.listing.pk])
+        self.client.get(reverse("listing-list"))
+        self.client.get(detail_url)
+        Review.objects.bulk_create([
+            Review(property=self.listing, user=self.guests[0], rating=4, comment="ok"),
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("rebuild_ratings", stdout=StringIO())
+        response = self.client.get(reverse("listing-list"))
+        self.assertEqual(response.data["results"][0]["avg_rating"], "4.00")
+        self.assertEqual(self.client.get(detail_url).data["avg_rating"], "4.00")
+
+    def test_catalogue_can_sort_by_rating(self):
+        other = self.create_listing("City Loft")
+        self.review(self.guests[0], 2)
+        self.review(self.guests[0], 5, listing=other)
+        response = self.client.get(reverse("listing-list"), {"ordering": "-avg_rating"})
+        names = [item["name"] for item in response.data["results"]]
+        self.assertEqual(names, ["City Loft", "Lake House"])
+        self.assertEqual(response.data["results"][0]["avg_rating"], "5.00")
+
+    def test_rating_order_pages_through_unrated_listings(self):
+        rated = [self.create_listing(f"Rated {i}") for i in range(2)]
+        for i in range(3):
+            self.create_listing(f"Unrated {i}")
+        self.review(self.guests[0], 3, listing=rated[0])
+        self.review(self.guests[0], 5, listing=rated[1])
+
+        for ordering in ["-avg_rating", "avg_rating"]:
+            names = []
+            url = reverse("listing-list") + f"?ordering={ordering}&page_size=2"
+            while url:
+                response = self.client.get(url)
+                names += [item["name"] for item in response.data["results"]]
+                url = response.data["next"]
+            # Ties in rating fall back to newest first
+            unrated_names = ["Unrated 2", "Unrated 1", "Unrated 0", "Lake House"]
+            expected = ["Rated 1", "Rated 0", *unrated_names]
+            if ordering == "avg_rating":
+                expected = [*unrated_names, "Rated 0", "Rated 1"]
+            self.assertEqual(names, expected, ordering)
@@ -0,0 +1,124 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, router
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from alx_travel_app.listings import availability, routing
+from alx_travel_app.listings.models import Booking, Listing
+
+from .fixtures import create_booking, create_listing
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASES=["replica"], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The replica is a second SQLite database that receives no writes, like a
+    replica far behind: what a request can see tells where it read.
+    """
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.guest = User.objects.create_user(username="guest", email="guest@example.com")
+        self.listing = create_listing()
+        self.client = APIClient()
+
+    def listing_ids(self, response):
+        return [row["property_id"] for row in response.data["results"]]
+
+    def test_safe_requests_read_the_replica(self):
+        replica_host = User.objects.db_manager("replica").create_user(username="host")
+        replica_listing = Listing.objects.using("replica").create(
+            host=replica_host, name="Replica Loft", description="Lagging", location="Addis Ababa",
+            price_per_night=100,
+        )
+        response = self.client.get(reverse("listing-list"))
+        self.assertEqual(self.listing_ids(response), [str(replica_listing.pk)])
+        self.assertNotIn(routing.PIN_COOKIE, response.cookies)
+
+    @override_settings(LISTING_CACHE_TIMEOUT=60)
+    def test_cached_responses_are_built_from_the_primary(self):
+        self.addCleanup(cache.clear)
+        response = self.client.get(reverse("listing-list"))
+        self.assertEqual(self.listing_ids(response), [str(self.listing.pk)])
+
+    def test_writes_and_their_checks_use_the_primary(self):
+        self.client.force_authenticate(self.guest)
+        response = self.client.post(reverse("booking-list"), {
+            "property": str(self.listing.pk), "start_date": "2030-01-01", "end_date": "2030-01-03",
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(Booking.objects.filter(pk=response.data["booking_id"]).exists())
+        self.assertFalse(Booking.objects.using("replica").exists())
+
+        # The overlap check saw the booking on the primary
+        response = self.client.post(reverse("booking-list"), {
+            "property": str(self.listing.pk), "start_date": "2030-01-02", "end_date": "2030-01-04",
+        })
+        self.assertEqual(response.status_code, 400)
+
+    def test_clients_that_wrote_read_the_primary_for_a_while(self):
+        self.client.force_authenticate(self.guest)
+        response = self.client.post(reverse("booking-list"), {
+            "property": str(self.listing.pk), "start_date": "2030-01-01", "end_date": "2030-01-03",
+        })
+        cookie = response.cookies[routing.PIN_COOKIE]
+        self.assertEqual(cookie["max-age"], 5)
+        self.assertTrue(cookie["httponly"])
+
+        # The client sends the cookie back until it expires
+        response = self.client.get(reverse("booking-list"))
+        self.assertEqual(len(response.data["results"]), 1)
+        del self.client.cookies[routing.PIN_COOKIE]
+        response = self.client.get(reverse("booking-list"))
+        self.assertEqual(response.data["results"], [])
+
+    def test_safe_requests_that_write_are_pinned_too(self):
+        request = RequestFactory().get("/")
+        with routing.request_routing(request) as state:
+            self.assertEqual(router.db_for_read(Listing), "replica")
+            Listing.objects.filter(pk=self.listing.pk).update(name="Renamed")
+            self.assertEqual(router.db_for_read(Listing), "default")
+        self.assertTrue(state.wrote)
+
+    def test_overlap_checks_read_the_primary(self):
+        create_booking(self.guest, self.listing)
+        with routing.request_routing(RequestFactory().get("/")):
+            self.assertFalse(availability.is_available(
+                self.listing.pk, date(2030, 1, 1), date(2030, 1, 3)
+            ))
+            with availability.lock_listing(self.listing.pk):
+                self.assertEqual(router.db_for_read(Booking), "default")
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(router.db_for_read(Listing), "default")
+        with routing.request_routing(RequestFactory().get("/")):
+            with routing.primary():
+                self.assertEqual(router.db_for_read(Listing), "default")
+            # Sessions and other apps' tables aren't replicated reads
+            self.assertEqual(router.db_for_read(User), "default")
+
+    def test_related_objects_come_from_the_same_database(self):
+        with routing.request_routing(RequestFactory().get("/")):
+            listing = Listing.objects.using("default").get(pk=self.listing.pk)
+            self.assertEqual(router.db_for_read(Listing, instance=listing), "default")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate("replica", "listings"))
+        self.assertTrue(router.allow_migrate("default", "listings"))
+        self.assertIn("replica", connections)
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        with routing.request_routing(RequestFactory().get("/")):
+            self.assertEqual(router.db_for_read(Listing), "default")
+        self.client.force_authenticate(self.guest)
+        response = self.client.post(reverse("booking-list"), {
+            "property": str(self.listing.pk), "start_date": "2030-01-01", "end_date": "2030-01-03",
+        })
+        self.assertNotIn(routing.PIN_COOKIE, response.cookies)
@@ -0,0 +1,117 @@
+import re
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from .chapa_stub import ChapaStubMixin
+from .fixtures import create_booking, create_listing, create_payment
+
+User = get_user_model()
+
+SERVER_TIMING = re.compile(
+    r'total;dur=(?P<total>[\d.]+), db;dur=(?P<db>[\d.]+);desc="(?P<queries>\d+) queries", '
+    r'chapa;dur=(?P<chapa>[\d.]+)'
+)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        self.listing = create_listing()
+
+    def timing(self, response):
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertIsNotNone(match, response["Server-Timing"])
+        return match
+
+    def test_server_timing_counts_the_queries_of_the_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("listing-detail", args=[self.listing.pk]))
+        timing = self.timing(response)
+        self.assertEqual(int(timing["queries"]), len(queries))
+        self.assertLessEqual(float(timing["db"]), float(timing["total"]))
+        self.assertEqual(float(timing["chapa"]), 0)
+
+    def test_queries_run_in_threads_are_counted_under_asgi(self):
+        async def get():
+            return await self.async_client.get(reverse("listing-detail", args=[self.listing.pk]))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(get)()
+        self.assertEqual(int(self.timing(response)["queries"]), len(queries))
+        self.assertGreater(len(queries), 0)
+
+    def test_requests_are_observed_per_route(self):
+        labels = {"route": "listing-list", "method": "GET"}
+        before = (sample("http_requests_total", status="200", **labels),
+                  sample("http_request_duration_seconds_count", **labels),
+                  sample("http_request_sql_queries_sum", **labels))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("listing-list"))
+        after = (sample("http_requests_total", status="200", **labels),
+                 sample("http_request_duration_seconds_count", **labels),
+                 sample("http_request_sql_queries_sum", **labels))
+        self.assertEqual(after[0] - before[0], 1)
+        self.assertEqual(after[1] - before[1], 1)
+        self.assertEqual(after[2] - before[2], len(queries))
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_only_counted(self):
+        labels = {"route": "listing-list", "method": "GET"}
+        before = (sample("http_requests_total", status="200", **labels),
+                  sample("http_request_duration_seconds_count", **labels))
+        response = self.client.get(reverse("listing-list"))
+        self.assertNotIn("Server-Timing", response)
+        after = (sample("http_requests_total", status="200", **labels),
+                 sample("http_request_duration_seconds_count", **labels))
+        self.assertEqual((after[0] - before[0], after[1] - before[1]), (1, 0))
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_header_can_be_turned_off(self):
+        response = self.client.get(reverse("listing-list"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_unmatched_urls_share_a_route(self):
+        before = sample("http_requests_total", route="unmatched", method="GET", status="404")
+        self.client.get("/no/such/page/")
+        after = sample("http_requests_total", route="unmatched", method="GET", status="404")
+        self.assertEqual(after - before, 1)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse("listing-list"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'http_request_duration_seconds_bucket{le="0.005",method="GET",route="listing-list"}',
+            response.content.decode(),
+        )
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_metrics_endpoint_token(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+
+
+class ChapaTimingTests(ChapaStubMixin, APITestCase):
+    def test_time_waiting_on_chapa_is_reported(self):
+        guest = User.objects.create_user(username="guest", email="guest@example.com")
+        payment = create_payment(create_booking(guest, create_listing()))
+        self.client.force_authenticate(guest)
+        self.stub.queue(delay=0.05)
+
+        response = self.client.get(reverse("payment-verify", args=[payment.pk]))
+        self.assertEqual(response.status_code, 200)
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        self.assertGreaterEqual(float(match["chapa"]), 50)
+        self.assertGreaterEqual(float(match["total"]), float(match["chapa"]))
@@ -0,0 +1,100 @@
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db.models import F
+from django.test import TestCase
+
+from alx_travel_app.listings import seeding
+from alx_travel_app.listings.availability import BLOCKING_STATUSES
+from alx_travel_app.listings.models import Booking, Listing, Review
+
+User = get_user_model()
+
+START = date(2030, 1, 1)
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, **options):
+        options = {"users": 5, "listings": 8, "bookings": 60, "start": START,
+                   "batch_size": 7, **options}
+        call_command("seed", stdout=StringIO(), **options)
+
+    def test_creates_the_requested_rows(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Listing.objects.count(), 8)
+        self.assertEqual(Booking.objects.count(), 60)
+        self.assertEqual(User.objects.filter(is_staff=True).count(), 1)
+        self.assertTrue(Review.objects.exists())
+
+    def test_users_share_one_password_hash(self):
+        self.seed()
+        self.assertEqual(User.objects.values("password").distinct().count(), 1)
+        self.assertTrue(User.objects.first().check_password(seeding.PASSWORD))
+
+    def test_bookings_never_overlap(self):
+        self.seed(users=3, listings=2, bookings=200)
+        for listing in Listing.objects.all():
+            nights = list(
+                listing.bookings.filter(status__in=BLOCKING_STATUSES)
+                .order_by("start_date").values_list("start_date", "end_date")
+            )
+            for (_, end), (start, _) in zip(nights, nights[1:]):
+                self.assertLessEqual(end, start)
+
+    def test_guests_never_book_their_own_listing(self):
+        self.seed()
+        self.assertFalse(Booking.objects.filter(property__host=F("user")).exists())
+
+    def test_totals_match_the_nightly_price(self):
+        self.seed()
+        for booking in Booking.objects.select_related("property"):
+            nights = (booking.end_date - booking.start_date).days
+            self.assertEqual(booking.total_price, booking.property.price_per_night * nights)
+
+    def test_running_again_adds_nothing(self):
+        self.seed()
+        counts = (User.objects.count(), Listing.objects.count(),
+                  Booking.objects.count(), Review.objects.count())
+        self.seed()
+        self.assertEqual(counts, (User.objects.count(), Listing.objects.count(),
+                                  Booking.objects.count(), Review.objects.count()))
+
+    def test_ratings_are_rebuilt(self):
+        self.seed()
+        listing = Listing.objects.filter(reviews__isnull=False).first()
+        self.assertEqual(listing.review_count, listing.reviews.count())
+
+    def test_workers_insert_the_same_rows(self):
+        self.seed(workers=2)
+        self.assertEqual(Booking.objects.count(), 60)
+        rows = set(Booking.objects.values_list("booking_id", "start_date", "end_date", "status"))
+        Booking.objects.all().delete()
+        self.seed()
+        self.assertEqual(
+            rows, set(Booking.objects.values_list("booking_id", "start_date", "end_date", "status"))
+        )
+
+    def test_bookings_need_listings(self):
+        with self.assertRaises(CommandError):
+            self.seed(listings=0)
+
+
+class SeedGenerationTests(TestCase):
+    def test_blocks_depend_only_on_the_options(self):
+        options = seeding.SeedOptions(users=5, listings=8, bookings=60, start=START, batch_size=7)
+        for generate in (seeding.generate_users, seeding.generate_listings,
+                         seeding.generate_bookings):
+            # In any order, as a pool of workers would produce them
+            blocks = list(options.blocks(60))
+            forward = [generate(options, block) for block in blocks]
+            backward = [generate(options, block) for block in reversed(blocks)][::-1]
+            self.assertEqual(forward, backward)
+
+    def test_seed_changes_the_data(self):
+        first = seeding.SeedOptions(users=5, listings=8, bookings=60, start=START)
+        second = seeding.SeedOptions(users=5, listings=8, bookings=60, seed=7, start=START)
+        self.assertNotEqual(seeding.generate_listings(first, 0),
+                            seeding.generate_listings(second, 0))
@@ -0,0 +1,101 @@
+import time
+from io import StringIO
+
+from celery.signals import task_postrun
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from prometheus_client import REGISTRY, generate_latest, start_http_server
+
+from alx_travel_app.celery import app
+from alx_travel_app.listings import task_metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@app.task(name="tests.metrics.ok")
+def ok():
+    return "ok"
+
+
+@app.task(name="tests.metrics.broken")
+def broken():
+    raise ValueError("broken")
+
+
+class TaskMetricsTests(SimpleTestCase):
+    def test_run_time_and_outcome_are_recorded(self):
+        before = (sample("celery_task_runtime_seconds_count", task=ok.name),
+                  sample("celery_tasks_total", task=ok.name, state="success"))
+        ok.apply()
+        after = (sample("celery_task_runtime_seconds_count", task=ok.name),
+                 sample("celery_tasks_total", task=ok.name, state="success"))
+        self.assertEqual((after[0] - before[0], after[1] - before[1]), (1, 1))
+
+    def test_queue_wait_is_measured_from_the_send_time(self):
+        before = (sample("celery_task_queue_wait_seconds_count", task=ok.name),
+                  sample("celery_task_queue_wait_seconds_sum", task=ok.name))
+        ok.apply(headers={"sent_at": time.time() - 2})
+        after = (sample("celery_task_queue_wait_seconds_count", task=ok.name),
+                 sample("celery_task_queue_wait_seconds_sum", task=ok.name))
+        self.assertEqual(after[0] - before[0], 1)
+        self.assertAlmostEqual(after[1] - before[1], 2, delta=0.5)
+
+    def test_tasks_run_without_a_send_time_have_no_queue_wait(self):
+        before = sample("celery_task_queue_wait_seconds_count", task=ok.name)
+        ok.apply()
+        self.assertEqual(sample("celery_task_queue_wait_seconds_count", task=ok.name), before)
+
+    def test_published_tasks_are_stamped(self):
+        headers = {}
+        task_metrics.stamp_sent_at(headers=headers)
+        self.assertAlmostEqual(headers["sent_at"], time.time(), delta=1)
+
+    def test_failures_are_counted_by_exception(self):
+        before = (sample("celery_tasks_total", task=broken.name, state="failure"),
+                  sample("celery_task_failures_total", task=broken.name, exception="ValueError"))
+        broken.apply(throw=False)
+        after = (sample("celery_tasks_total", task=broken.name, state="failure"),
+                 sample("celery_task_failures_total", task=broken.name, exception="ValueError"))
+        self.assertEqual((after[0] - before[0], after[1] - before[1]), (1, 1))
+
+    def test_retries_are_counted(self):
+        # Eager retries run inline and re-raise, so signal the worker's way
+        before = sample("celery_tasks_total", task=ok.name, state="retry")
+        task_postrun.send(sender=ok, task_id="t-1", task=ok, args=(), kwargs={},
+                          retval=None, state="RETRY")
+        self.assertEqual(sample("celery_tasks_total", task=ok.name, state="retry") - before, 1)
+
+
+class TaskSummaryTests(TestCase):
+    def test_summary_of_a_metrics_page(self):
+        ok.apply(headers={"sent_at": time.time() - 0.2})
+        broken.apply(throw=False)
+        tasks = task_metrics.summarize(generate_latest(REGISTRY).decode(), prefix="tests.metrics.")
+        self.assertGreaterEqual(tasks["ok"].states["success"], 1)
+        self.assertGreaterEqual(tasks["broken"].failures["ValueError"], 1)
+        self.assertGreater(task_metrics.quantile(tasks["ok"].queue_wait, 0.99), 0.1)
+        self.assertNotIn("alx_travel_app.listings.tasks.drain_email_outbox", tasks)
+
+    def test_quantile_interpolates_within_a_bucket(self):
+        buckets = [(0.1, 0), (0.5, 10), (1.0, 20), (float("inf"), 20)]
+        self.assertAlmostEqual(task_metrics.quantile(buckets, 0.5), 0.5)
+        self.assertAlmostEqual(task_metrics.quantile(buckets, 0.25), 0.3)
+        self.assertIsNone(task_metrics.quantile([(float("inf"), 0)], 0.5))
+        # Past the last finite bound, its value is the best estimate
+        self.assertEqual(task_metrics.quantile([(1.0, 1), (float("inf"), 4)], 0.9), 1.0)
+
+    def test_command_prints_the_listings_tasks(self):
+        from alx_travel_app.listings.tasks import drain_email_outbox
+
+        drain_email_outbox.apply()
+        server, thread = start_http_server(0, addr="127.0.0.1")
+        self.addCleanup(server.shutdown)
+        out = StringIO()
+        call_command(
+            "task_metrics", url=f"http://127.0.0.1:{server.server_port}/metrics", once=True,
+            stdout=out,
+        )
+        self.assertIn("drain_email_outbox", out.getvalue())
+        self.assertNotIn("tests.metrics", out.getvalue())
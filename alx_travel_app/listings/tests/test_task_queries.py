@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from alx_travel_app.listings import outbox
+from alx_travel_app.listings.models import Payment
+from alx_travel_app.listings.tasks import (
+    drain_email_outbox, initialize_payment_checkout, reconcile_pending_payments,
+    send_booking_confirmation_email, send_payment_checkout_email,
+    send_payment_confirmation_email,
+)
+
+from .chapa_stub import ChapaStubMixin
+from .fixtures import create_booking, create_listing, create_payment
+from .task_queries import TaskQueriesMixin, queued_tasks
+
+User = get_user_model()
+
+
+class TaskQueryCountTests(TaskQueriesMixin, ChapaStubMixin, APITestCase):
+    """Queries per task in the worker hot path"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.guest = User.objects.create_user(
+            username="guest", email="guest@example.com", first_name="Abebe"
+        )
+        self.listing = create_listing()
+        self.payment = create_payment(create_booking(self.guest, self.listing))
+
+    def test_payment_confirmation_email(self):
+        # Payment with booking, listing and guest; outbox insert
+        result, queued = self.assertTaskNumQueries(
+            2, send_payment_confirmation_email, str(self.payment.pk), "guest@example.com"
+        )
+        self.assertIn("queued", result)
+        self.assertEqual([name for name, *_ in queued],
+                         ["alx_travel_app.listings.tasks.drain_email_outbox"])
+        self.assertIn("Dear Abebe", outbox.OutboundEmail.objects.get().body)
+
+    def test_payment_checkout_email(self):
+        self.assertTaskNumQueries(
+            2, send_payment_checkout_email, str(self.payment.pk), "guest@example.com", "http://pay"
+        )
+
+    def test_booking_confirmation_email(self):
+        self.assertTaskNumQueries(1, send_booking_confirmation_email, "b-1", "g@example.com", "Lake")
+
+    def test_initialize_payment_checkout(self):
+        # Payment with booking; checkout URL update
+        result, queued = self.assertTaskNumQueries(
+            2, initialize_payment_checkout, str(self.payment.pk), "http://cb", "http://ret"
+        )
+        self.assertEqual([name for name, *_ in queued],
+                         ["alx_travel_app.listings.tasks.send_payment_checkout_email"])
+
+    def test_drain_is_constant_per_batch(self):
+        for i in range(25):
+            outbox.queue_email("Hi", "Body", [f"guest{i}@example.com"])
+        # Claim and lease the batch, bulk update it, find nothing more
+        self.assertTaskNumQueries(4, drain_email_outbox)
+
+    def test_reconciliation_is_constant_per_chunk(self):
+        for _ in range(10):
+            create_payment(create_booking(self.guest, self.listing), checkout_url="http://pay")
+        Payment.objects.update(updated_at=timezone.now() - timedelta(hours=1),
+                               checkout_url="http://pay")
+        # Chunk ids, lock, bulk update payments and bookings, empty chunk
+        self.assertTaskNumQueries(5, reconcile_pending_payments)
+
+    def test_booking_create_queues_email_without_extra_queries(self):
+        self.client.force_authenticate(self.guest)
+        with queued_tasks() as queued:
+            response = self.client.post(reverse("booking-list"), {
+                "property": str(self.listing.pk),
+                "start_date": "2031-01-01",
+                "end_date": "2031-01-03",
+                "total_price": "200.00",
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(queued[0][2]["listing_title"], "Lake House")
+        self.assertEqual(queued[0][2]["user_email"], "guest@example.com")
@@ -1,35 +1,251 @@
+import json
+import types
+
 from django.shortcuts import render, get_object_or_404
-from rest_framework import viewsets, permissions, status, views
+from rest_framework import viewsets, permissions, status, views, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.urls import reverse
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Prefetch
 from django_chapa import api as chapa_api
+from . import availability, bulk, cache, chapa, exports, payments, pricing, webhooks
+from .fieldsets import SparseFieldsetViewMixin
+from .filters import ListingCatalogueFilter
 from .models import Listing, Booking, Review, Payment
-from .serializers import ListingSerializer, BookingSerializer, ReviewSerializer, PaymentSerializer
-from .tasks import send_booking_confirmation_email, send_payment_confirmation_email, send_payment_checkout_email
+from .parsers import NDJSONParser
+from .serializers import (
+    ListingSerializer, BookingSerializer, ReviewSerializer, PaymentSerializer,
+    DateRangeQuerySerializer, PaymentInitializeSerializer, ExportQuerySerializer,
+)
+from .tasks import (
+    send_booking_confirmation_email, send_payment_confirmation_email, send_payment_checkout_email,
+    initialize_payment_checkout, process_chapa_event,
+)
+
+
+def bulk_import(request, import_rows):
+    """Run a bulk import over the request body and report per-row errors"""
+    rows = request.data
+    if not isinstance(rows, (list, types.GeneratorType)):
+        return Response(
+            {'error': 'Expected a JSON array or an NDJSON stream'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    result = import_rows(rows, request.user)
+    if not result.errors:
+        response_status = status.HTTP_201_CREATED
+    elif result.created:
+        response_status = status.HTTP_207_MULTI_STATUS
+    else:
+        response_status = status.HTTP_400_BAD_REQUEST
+    return Response({
+        'created': result.created,
+        'failed': len(result.errors),
+        'errors': result.errors,
+    }, status=response_status)
+
+
+def stream_export(request, queryset, columns, statuses, filename):
+    """Stream the rows of ``queryset`` matching the export query parameters"""
+    params = ExportQuerySerializer(data=request.query_params, statuses=statuses)
+    params.is_valid(raise_exception=True)
+    queryset = exports.filter_export(queryset, params.validated_data)
+    # Rows are read after the view returns; pick the database while the
+    # request's routing still applies
+    queryset = queryset.using(queryset.db)
+    return exports.export_response(queryset, columns, params.validated_data['as'], filename)
+
+
+def listing_availability(pk, start_date, end_date):
+    """Body of the availability response; ``None`` if there's no such listing"""
+    nights = availability.free_nights(pk, start_date, end_date)
+    if nights is None:
+        return None
+    return {
+        'property_id': pk,
+        'from': start_date,
+        'to': end_date,
+        'available': len(nights) == (end_date - start_date).days,
+        'free_nights': nights,
+    }
+
+
+def listing_quote(pk, start_date, end_date):
+    """Body of the quote response, cached; ``None`` if there's no such listing"""
+    def build():
+        quote = pricing.quote(pk, start_date, end_date)
+        if quote is None:
+            return None
+        return {
+            'property_id': pk,
+            'from': start_date,
+            'to': end_date,
+            'nights': [{'date': night, 'price': str(price)} for night, price in quote.nights()],
+            'total_price': str(quote.total),
+        }
+
+    return cache.cached_quote(pk, start_date, end_date, build)
+
+
+def record_verification(payment, response):
+    """Complete a payment Chapa reports as paid, and confirm its booking"""
+    if not response.ok:
+        return
+    # Update payment status
+    payment.status = Payment.PaymentStatus.COMPLETED
+    payment.response_dump = response.data
+    payment.save()
+
+    # Send payment confirmation email
+    send_payment_confirmation_email.delay(
+        payment_id=str(payment.id),
+        user_email=payment.booking.user.email
+    )
+
+    # Update booking status
+    booking = payment.booking
+    booking.status = Booking.BookingStatus.CONFIRMED
+    booking.save()
 
 
-class ListingViewSet(viewsets.ModelViewSet):
+def start_initialization(request, payment):
+    """Fill in the payment's customer details; the callback and return URLs for Chapa"""
+    payments.prepare_payment(payment)
+    payment.save()
+
+    callback_url = request.build_absolute_uri('/api/chapa-webhook/')
+    return_url = request.build_absolute_uri(
+        reverse('payment-complete', args=[payment.id])
+    )
+    return callback_url, return_url
+
+
+def queue_initialization(request, payment, callback_url, return_url, notify_url):
+    """Hand the Chapa call to Celery; body of the 202 response"""
+    initialize_payment_checkout.delay(
+        payment_id=str(payment.id),
+        callback_url=callback_url,
+        return_url=return_url,
+        notify_url=notify_url,
+    )
+    return {
+        'transaction_ref': str(payment.id),
+        'status': payment.status,
+        'status_url': request.build_absolute_uri(
+            reverse('payment-status', args=[payment.id])
+        ),
+        'message': 'Payment is being initialized; the checkout link will be sent to your email'
+    }
+
+
+def send_checkout(payment):
+    """Email an initialized payment's checkout URL; body of the response"""
+    send_payment_checkout_email.delay(
+        payment_id=str(payment.id),
+        user_email=payment.email,
+        checkout_url=payment.checkout_url
+    )
+    return {
+        'checkout_url': payment.checkout_url,
+        'transaction_ref': str(payment.id),
+        'message': 'Payment checkout link has been sent to your email'
+    }
+
+
+EXPORT_PARAMETERS = [
+    openapi.Parameter('as', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['csv', 'ndjson'],
+                      description='Output format, csv by default'),
+    openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Only rows with this status'),
+    openapi.Parameter('from', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      format=openapi.FORMAT_DATE, description='Created on or after this day'),
+    openapi.Parameter('to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      format=openapi.FORMAT_DATE, description='Created before this day'),
+]
+
+
+FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Comma-separated fields to return, e.g. name,price_per_night'),
+    openapi.Parameter('expand', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Comma-separated costly fields lists leave out, e.g. reviews'),
+]
+
+
+BULK_IMPORT_DESCRIPTION = (
+    "Send a JSON array, or one object per line with Content-Type application/x-ndjson. "
+    "Rows are validated and inserted in chunks; invalid rows are reported by their index "
+    "and don't stop the rest. Answers 201 if every row was created, 207 if some were and "
+    "400 if none were."
+)
+
+
+class ListingViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing property listings.
     """
 
     queryset = Listing.objects.all()
+    # Reviews are fetched in a single prefetch query for the whole page so
+    # the number of queries doesn't grow with the number of listings.
+    field_prefetches = {
+        "reviews": Prefetch("reviews", queryset=Review.objects.select_related("user")),
+    }
     serializer_class = ListingSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    lookup_value_regex = '[0-9a-fA-F-]{32,36}'
+    filter_backends = [ListingCatalogueFilter, filters.OrderingFilter]
+    ordering_fields = ['created_at', 'avg_rating', 'price_per_night']
+    ordering = ['-created_at']
 
     def perform_create(self, serializer):
         serializer.save(host=self.request.user)
 
     @swagger_auto_schema(
-        operation_description="List all property listings",
+        operation_description="List, search and filter property listings",
+        manual_parameters=[
+            openapi.Parameter('search', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Full-text search over name and description'),
+            openapi.Parameter('location', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Location prefix (case-insensitive)'),
+            openapi.Parameter('min_price', openapi.IN_QUERY, type=openapi.TYPE_NUMBER,
+                              description='Minimum price per night'),
+            openapi.Parameter('max_price', openapi.IN_QUERY, type=openapi.TYPE_NUMBER,
+                              description='Maximum price per night'),
+            openapi.Parameter('min_rating', openapi.IN_QUERY, type=openapi.TYPE_NUMBER,
+                              description='Minimum average review rating (1-5)'),
+            openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='One of created_at, avg_rating, price_per_night; '
+                                          'prefix with - for descending'),
+            openapi.Parameter('available_from', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATE,
+                              description='Only listings free from this night (YYYY-MM-DD)'),
+            openapi.Parameter('available_to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATE,
+                              description='... until this check-out day (YYYY-MM-DD)'),
+            *FIELDSET_PARAMETERS,
+        ],
         responses={200: ListingSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        return cache.cached_response(
+            request,
+            cache.list_key(request),
+            lambda: super(ListingViewSet, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return cache.cached_response(
+            request,
+            cache.detail_key(request, kwargs['pk']),
+            lambda: super(ListingViewSet, self).retrieve(request, *args, **kwargs),
+        )
 
     @swagger_auto_schema(
         operation_description="Create a new property listing",
@@ -39,8 +255,66 @@ class ListingViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_description="Create listings in bulk. " + BULK_IMPORT_DESCRIPTION,
+        request_body=ListingSerializer(many=True),
+    )
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Import listings hosted by the requesting user"""
+        return bulk_import(
+            request,
+            lambda rows, user: bulk.import_listings(rows, user, self.get_serializer_context()),
+        )
 
-class BookingViewSet(viewsets.ModelViewSet):
+    @swagger_auto_schema(
+        operation_description="List the free nights of a listing between two dates",
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATE, required=True,
+                              description='First night (YYYY-MM-DD)'),
+            openapi.Parameter('to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATE, required=True,
+                              description='Check-out day, exclusive (YYYY-MM-DD)'),
+        ],
+    )
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        """Free nights for a listing in ``[from, to)``"""
+        params = DateRangeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date, end_date = params.validated_data['from'], params.validated_data['to']
+
+        data = listing_availability(pk, start_date, end_date)
+        if data is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    @swagger_auto_schema(
+        operation_description="Price a stay at a listing, night by night",
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATE, required=True,
+                              description='Check-in day (YYYY-MM-DD)'),
+            openapi.Parameter('to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATE, required=True,
+                              description='Check-out day, exclusive (YYYY-MM-DD)'),
+        ],
+    )
+    @action(detail=True, methods=['get'])
+    def quote(self, request, pk=None):
+        """Total and nightly prices for a stay in ``[from, to)``"""
+        params = DateRangeQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date, end_date = params.validated_data['from'], params.validated_data['to']
+
+        data = listing_quote(pk, start_date, end_date)
+        if data is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+
+class BookingViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing bookings.
     """
@@ -61,15 +335,17 @@ class BookingViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         booking = serializer.save(user=self.request.user)
-        # Send booking confirmation email asynchronously
+        # Task arguments come from objects already in memory: the request's
+        # user and the listing the serializer loaded during validation
         send_booking_confirmation_email.delay(
             booking_id=str(booking.booking_id),
-            user_email=booking.user.email,
-            listing_title=booking.property.name
+            user_email=self.request.user.email,
+            listing_title=serializer.validated_data['property'].name
         )
 
     @swagger_auto_schema(
         operation_description="List all bookings for the authenticated user",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={200: BookingSerializer(many=True)}
     )
     def list(self, request, *args, **kwargs):
@@ -83,8 +359,33 @@ class BookingViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_description=(
+            "Create bookings in bulk for the authenticated user. Rows that overlap a stored "
+            "booking or an earlier row are rejected. " + BULK_IMPORT_DESCRIPTION
+        ),
+        request_body=BookingSerializer(many=True),
+    )
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Import bookings for the requesting user"""
+        return bulk_import(
+            request,
+            lambda rows, user: bulk.import_bookings(rows, user, self.get_serializer_context()),
+        )
+
+    @swagger_auto_schema(
+        operation_description="Stream the bookings visible to the user as CSV or NDJSON",
+        manual_parameters=EXPORT_PARAMETERS,
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Download bookings, oldest first"""
+        return stream_export(request, self.get_queryset(), exports.BOOKING_COLUMNS,
+                             Booking.BookingStatus.choices, 'bookings')
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing reviews.
     """
@@ -96,8 +397,16 @@ class ReviewViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @swagger_auto_schema(
+        operation_description="List reviews, newest first",
+        manual_parameters=FIELDSET_PARAMETERS,
+        responses={200: ReviewSerializer(many=True)}
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing payments.
     """
@@ -115,6 +424,15 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return Payment.objects.all()
         return Payment.objects.filter(booking__user=user)
 
+    @swagger_auto_schema(
+        operation_description="List the payments visible to the user, without Chapa's "
+                              "response unless expanded with ?expand=response_dump",
+        manual_parameters=FIELDSET_PARAMETERS,
+        responses={200: PaymentSerializer(many=True)}
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @swagger_auto_schema(
         operation_description="Verify payment status with Chapa",
         responses={
@@ -130,131 +448,120 @@ class PaymentViewSet(viewsets.ModelViewSet):
         payment = self.get_object()
         
         try:
-            # Prepare headers with Chapa secret key
-            headers = {
-                'Authorization': f'Bearer {settings.CHAPA_SECRET}',
-                'Content-Type': 'application/json'
-            }
-
             # Make verification request to Chapa API
-            import requests
-            response = requests.get(
-                f'{settings.CHAPA_API_URL}/v1/transaction/verify/{payment.id}',
-                headers=headers
-            )
-            response_data = response.json()
-
-            if response.status_code == 200 and response_data.get('status') == 'success':
-                # Update payment status
-                payment.status = Payment.PaymentStatus.COMPLETED
-                payment.response_dump = response_data
-                payment.save()
-
-                # Send payment confirmation email
-                send_payment_confirmation_email.delay(
-                    payment_id=str(payment.id),
-                    user_email=payment.booking.user.email
-                )
-
-                # Update booking status
-                booking = payment.booking
-                booking.status = Booking.BookingStatus.CONFIRMED
-                booking.save()
+            response = chapa.get_client().verify(payment.id)
 
+            record_verification(payment, response)
             return Response(PaymentSerializer(payment).data)
 
+        except chapa.ChapaUnavailable as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @swagger_auto_schema(
+        operation_description=(
+            "Initialize payment for a booking. By default the Chapa call runs in the "
+            "background: the response is 202 with a status URL to poll, and the result "
+            "is POSTed to notify_url if one is given."
+        ),
+        request_body=PaymentInitializeSerializer,
+    )
     @action(detail=True, methods=['post'])
     def initialize(self, request, pk=None):
         """Initialize payment for a booking"""
+        options = PaymentInitializeSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+
         payment = self.get_object()
-        booking = payment.booking
-        user = booking.user
 
         # Update payment with user details
-        payment.email = user.email
-        payment.first_name = user.first_name or 'Guest'
-        payment.last_name = user.last_name or 'User'
-        payment.payment_title = 'Booking Payment'
-        payment.description = f'Booking from {booking.start_date} to {booking.end_date}'
-        payment.save()
-
-        callback_url = request.build_absolute_uri('/api/chapa-webhook/')
-        return_url = request.build_absolute_uri(
-            reverse('payment-complete', args=[payment.id])
-        )
-
-        try:
-            # Prepare headers with Chapa secret key
-            headers = {
-                'Authorization': f'Bearer {settings.CHAPA_SECRET}',
-                'Content-Type': 'application/json'
-            }
+        callback_url, return_url = start_initialization(request, payment)
 
-            # Prepare payload for Chapa API
-            payload = {
-                'amount': str(payment.amount),
-                'currency': payment.currency,
-                'email': payment.email,
-                'first_name': payment.first_name,
-                'last_name': payment.last_name,
-                'phone_number': payment.phone_number,
-                'tx_ref': str(payment.id),
-                'callback_url': callback_url,
-                'return_url': return_url,
-                'customization': {
-                    'title': 'Booking Payment',
-                    'description': payment.description
-                }
-            }
-
-            # Make direct request to Chapa API
-            import requests
-            response = requests.post(
-                f'{settings.CHAPA_API_URL}/v1/transaction/initialize',
-                json=payload,
-                headers=headers
-            )
-            response_data = response.json()
+        if not settings.CHAPA_INITIALIZE_ASYNC:
+            return self._initialize_now(payment, callback_url, return_url)
 
-            if response.status_code != 200:
-                payment.status = Payment.PaymentStatus.FAILED
-                payment.save()
-                raise Exception(f"Chapa API error: {response_data.get('message', str(response_data))}")
+        return Response(
+            queue_initialization(request, payment, callback_url, return_url,
+                                 options.validated_data.get('notify_url')),
+            status=status.HTTP_202_ACCEPTED
+        )
 
-            # Update payment with checkout URL and response
-            payment.checkout_url = response_data['data']['checkout_url']
-            payment.response_dump = response_data
-            payment.save()
+    def _initialize_now(self, payment, callback_url, return_url):
+        """Synchronous initialization: the request waits for Chapa"""
+        try:
+            payments.initialize_payment(payment, callback_url, return_url)
 
             # Send checkout URL to user's email
-            send_payment_checkout_email.delay(
-                payment_id=str(payment.id),
-                user_email=payment.email,
-                checkout_url=payment.checkout_url
-            )
-
-            return Response({
-                'checkout_url': payment.checkout_url,
-                'transaction_ref': str(payment.id),
-                'message': 'Payment checkout link has been sent to your email'
-            })
+            return Response(send_checkout(payment))
 
+        except chapa.ChapaUnavailable as e:
+            # Chapa was never called, so the payment can be retried as is
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             # Update payment status on failure
-            payment.status = Payment.PaymentStatus.FAILED
-            payment.save()
-            
+            payments.fail_initialization(payment)
+
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @swagger_auto_schema(
+        operation_description="Lightweight payment status for polling after initialize",
+    )
+    @action(detail=True, methods=['get'], url_path='status', url_name='status')
+    def payment_status(self, request, pk=None):
+        """Current status and checkout URL of a payment"""
+        try:
+            row = self.get_queryset().filter(pk=pk).values(
+                'id', 'status', 'checkout_url', 'updated_at'
+            ).first()
+        except ValidationError:
+            # Not a UUID, so not a payment either
+            row = None
+        if row is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'transaction_ref': str(row['id']),
+            'status': row['status'],
+            'checkout_url': row['checkout_url'],
+            'initialized': row['checkout_url'] is not None,
+            'updated_at': row['updated_at'],
+        })
+
+    @swagger_auto_schema(
+        operation_description="Stream the payments visible to the user as CSV or NDJSON",
+        manual_parameters=EXPORT_PARAMETERS,
+    )
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Download payments, oldest first"""
+        return stream_export(request, self.get_queryset(), exports.PAYMENT_COLUMNS,
+                             Payment.PaymentStatus.choices, 'payments')
+
+    @swagger_auto_schema(
+        operation_description="Latency and error counters of the Chapa client in this process",
+    )
+    @action(detail=False, methods=['get'], url_path='chapa-stats',
+            permission_classes=[permissions.IsAdminUser])
+    def chapa_stats(self, request):
+        """Chapa client counters for this worker process"""
+        client = chapa.get_client()
+        return Response({
+            'circuit_breaker': client.breaker.state,
+            'operations': client.stats.snapshot(),
+        })
+
     @swagger_auto_schema(
         operation_description="Create a new payment for a booking",
         request_body=openapi.Schema(
@@ -306,3 +613,54 @@ class PaymentCompleteView(views.APIView):
             
         serializer = PaymentSerializer(payment)
         return Response(serializer.data)
+
+
+class ChapaWebhookView(views.APIView):
+    """
+    Receive Chapa webhooks (POST) and payment callbacks (GET).
+
+    Each delivery is stored once and handed to a Celery task; retries of a
+    delivery already stored are acknowledged without further work.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_description="Chapa webhook. Signed with CHAPA_WEBHOOK_SECRET when it is set.",
+        responses={200: "Event received", 400: "Invalid payload", 403: "Invalid signature"},
+    )
+    def post(self, request):
+        if not webhooks.signature_is_valid(request.body, request.headers):
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return Response({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(payload, dict):
+            return Response({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+
+        event = payload.get('event') or payload.get('status') or 'unknown'
+        return self._accept(str(event), payload.get('tx_ref') or payload.get('trx_ref'), payload)
+
+    @swagger_auto_schema(
+        operation_description="Chapa redirect to callback_url after a payment attempt",
+        manual_parameters=[
+            openapi.Parameter('trx_ref', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description='Transaction reference (the payment id)'),
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+        responses={200: "Event received", 400: "Missing trx_ref"},
+    )
+    def get(self, request):
+        payload = request.query_params.dict()
+        tx_ref = payload.get('trx_ref') or payload.get('tx_ref')
+        return self._accept(webhooks.CALLBACK_EVENT, tx_ref, payload)
+
+    def _accept(self, event_name, tx_ref, payload):
+        if not tx_ref:
+            return Response({'error': 'Missing tx_ref'}, status=status.HTTP_400_BAD_REQUEST)
+
+        event = webhooks.record_event(event_name, str(tx_ref), payload)
+        if event is not None:
+            transaction.on_commit(lambda: process_chapa_event.delay(event.pk))
+        return Response({'received': True, 'duplicate': event is None})
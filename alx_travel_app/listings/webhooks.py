@@ -0,0 +1,48 @@
+"""
+Intake of Chapa webhooks and payment callbacks.
+
+Deliveries are stored as received in ``ChapaWebhookEvent`` and processed by
+the ``process_chapa_event`` Celery task, so the endpoint answers without
+waiting on Chapa or the mail server. A delivery already stored is
+acknowledged but not processed again.
+"""
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .models import ChapaWebhookEvent
+
+# Event name used for the browser redirect to callback_url
+CALLBACK_EVENT = 'callback'
+
+
+def signature_is_valid(body, headers):
+    """
+    Check Chapa's signature headers against ``CHAPA_WEBHOOK_SECRET``.
+
+    ``x-chapa-signature`` signs the body and ``chapa-signature`` signs the
+    secret itself; either is accepted. Without a secret nothing is checked.
+    """
+    secret = settings.CHAPA_WEBHOOK_SECRET
+    if not secret:
+        return True
+    key = secret.encode()
+    body_signature = hmac.new(key, body, hashlib.sha256).hexdigest()
+    secret_signature = hmac.new(key, key, hashlib.sha256).hexdigest()
+    return (
+        hmac.compare_digest(headers.get('X-Chapa-Signature', ''), body_signature)
+        or hmac.compare_digest(headers.get('Chapa-Signature', ''), secret_signature)
+    )
+
+
+def record_event(event, tx_ref, payload):
+    """Store a delivery; return the new row, or None if it was seen before"""
+    try:
+        with transaction.atomic():
+            return ChapaWebhookEvent.objects.create(
+                event=event[:50], tx_ref=tx_ref[:100], payload=payload
+            )
+    except IntegrityError:
+        return None
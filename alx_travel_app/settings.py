@@ -34,6 +34,7 @@ THIRD_PARTY_APPS = [
     "rest_framework",
     "drf_yasg",
     "corsheaders",
+    "django_celery_beat",
 ]
 
 LOCAL_APPS = [
@@ -46,6 +47,9 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS + [
 
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "alx_travel_app.listings.metrics.RequestMetricsMiddleware",
+    "alx_travel_app.listings.routing.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -62,8 +66,18 @@ TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
+            # Spelled out so every process compiles a template once and reuses
+            # it, including the email templates rendered by Celery workers
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
             "context_processors": [
                 "django.template.context_processors.debug",
                 "django.template.context_processors.request",
@@ -91,9 +105,40 @@ DATABASES = {
             "charset": "utf8mb4",
             "use_unicode": True,
         },
+        # Keep connections open between requests (and Celery tasks) for this
+        # many seconds instead of connecting for each one; 0 closes them
+        # every time. Leave it at 0 under ASGI, where requests run in
+        # threads of their own and their connections would pile up.
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+        # Check a reused connection is alive before its first query of a request
+        "CONN_HEALTH_CHECKS": env.bool("DB_CONN_HEALTH_CHECKS", default=True),
+    }
+}
+
+# Read replicas of the default database, one alias per host (replica1, ...).
+# Safe requests read the listings app from them; see listings/routing.py.
+for _number, _host in enumerate(env.list("MYSQL_REPLICA_HOSTS", default=[]), start=1):
+    DATABASES[f"replica{_number}"] = {**DATABASES["default"], "HOST": _host}
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["alx_travel_app.listings.routing.ReplicaRouter"]
+# Seconds a client reads from the primary after writing, to see its own writes
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=5)
+
+# CONN_MAX_AGE for Celery worker processes; unset uses DB_CONN_MAX_AGE.
+# See listings/db_connections.py.
+DB_WORKER_CONN_MAX_AGE = env.int("DB_WORKER_CONN_MAX_AGE", default=None)
+
+# Cache used for listing responses; Redis runs alongside the app in docker-compose
+CACHES = {
+    "default": {
+        "BACKEND": env("CACHE_BACKEND", default="django.core.cache.backends.redis.RedisCache"),
+        "LOCATION": env("CACHE_LOCATION", default="redis://redis:6379/1"),
     }
 }
 
+# Seconds a cached listing list/detail response lives; 0 disables the cache
+LISTING_CACHE_TIMEOUT = env.int("LISTING_CACHE_TIMEOUT", default=300)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -150,8 +195,22 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
+    "DEFAULT_PAGINATION_CLASS": "alx_travel_app.listings.pagination.CreatedAtCursorPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=20),
 }
 
+# Upper bound for the ?page_size= query parameter on list endpoints
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=100)
+
+# Rows validated and inserted per transaction by the bulk import endpoints
+BULK_IMPORT_CHUNK_SIZE = env.int("BULK_IMPORT_CHUNK_SIZE", default=1000)
+
+# Rows read per query by the streaming export endpoints
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
+
+# Longest date range accepted by the availability endpoint
+AVAILABILITY_MAX_NIGHTS = env.int("AVAILABILITY_MAX_NIGHTS", default=366)
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
@@ -188,6 +247,31 @@ CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 # Celery Beat Settings
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 
+# Pending payments are verified with Chapa in the background (see
+# listings/reconciliation.py). A payment is checked once it has been pending
+# for PAYMENT_RECONCILE_STALE_AFTER seconds, and given up on after
+# PAYMENT_RECONCILE_MAX_AGE seconds, when its checkout link has expired.
+PAYMENT_RECONCILE_INTERVAL = env.float("PAYMENT_RECONCILE_INTERVAL", default=300.0)
+PAYMENT_RECONCILE_STALE_AFTER = env.int("PAYMENT_RECONCILE_STALE_AFTER", default=600)
+PAYMENT_RECONCILE_MAX_AGE = env.int("PAYMENT_RECONCILE_MAX_AGE", default=24 * 60 * 60)
+PAYMENT_RECONCILE_CHUNK_SIZE = env.int("PAYMENT_RECONCILE_CHUNK_SIZE", default=200)
+PAYMENT_RECONCILE_CONCURRENCY = env.int("PAYMENT_RECONCILE_CONCURRENCY", default=8)
+
+# Entries are copied into django_celery_beat's PeriodicTask table when beat
+# starts, so the interval can be changed from the admin afterwards.
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-pending-payments": {
+        "task": "alx_travel_app.listings.tasks.reconcile_pending_payments",
+        "schedule": PAYMENT_RECONCILE_INTERVAL,
+    },
+    # Safety net for retries and for drains lost with a worker; new mail
+    # schedules its own drain EMAIL_OUTBOX_FLUSH_DELAY seconds after queueing
+    "drain-email-outbox": {
+        "task": "alx_travel_app.listings.tasks.drain_email_outbox",
+        "schedule": env.float("EMAIL_OUTBOX_INTERVAL", default=60.0),
+    },
+}
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = env('EMAIL_HOST', default='mailpit')
@@ -195,9 +279,57 @@ EMAIL_PORT = env('EMAIL_PORT', default=1025)
 EMAIL_USE_TLS = env('EMAIL_USE_TLS', default=False)
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='test@alxtravelapp.com')
 
+# Email outbox (see listings/outbox.py)
+EMAIL_OUTBOX_BATCH_SIZE = env.int('EMAIL_OUTBOX_BATCH_SIZE', default=100)
+EMAIL_OUTBOX_FLUSH_DELAY = env.float('EMAIL_OUTBOX_FLUSH_DELAY', default=1.0)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)
+EMAIL_OUTBOX_RETRY_BACKOFF = env.float('EMAIL_OUTBOX_RETRY_BACKOFF', default=60.0)
+EMAIL_OUTBOX_LEASE = env.float('EMAIL_OUTBOX_LEASE', default=300.0)
+
 # Chapa Payment Configuration
 CHAPA_SECRET = env('CHAPA_SECRET_KEY')
 CHAPA_API_URL = 'https://api.chapa.co'
 CHAPA_API_VERSION = 'v1'
 CHAPA_TRANSACTION_MODEL = 'listings.Payment'
 CHAPA_WEBHOOK_URL = '/api/chapa-webhook/'
+# Shared secret from the Chapa dashboard used to check webhook signatures;
+# leave empty to accept unsigned deliveries (they are verified with Chapa
+# before any payment is confirmed either way)
+CHAPA_WEBHOOK_SECRET = env('CHAPA_WEBHOOK_SECRET', default='')
+
+# Chapa HTTP client (see listings/chapa.py)
+CHAPA_CONNECT_TIMEOUT = env.float('CHAPA_CONNECT_TIMEOUT', default=3.05)
+CHAPA_READ_TIMEOUT = env.float('CHAPA_READ_TIMEOUT', default=10.0)
+CHAPA_MAX_RETRIES = env.int('CHAPA_MAX_RETRIES', default=2)
+CHAPA_BACKOFF_BASE = env.float('CHAPA_BACKOFF_BASE', default=0.2)
+CHAPA_BACKOFF_MAX = env.float('CHAPA_BACKOFF_MAX', default=2.0)
+CHAPA_POOL_SIZE = env.int('CHAPA_POOL_SIZE', default=10)
+CHAPA_BREAKER_THRESHOLD = env.int('CHAPA_BREAKER_THRESHOLD', default=5)
+CHAPA_BREAKER_RESET_TIMEOUT = env.float('CHAPA_BREAKER_RESET_TIMEOUT', default=30.0)
+
+# Run the Chapa call of PaymentViewSet.initialize in a Celery task and answer
+# 202 straight away; False keeps the request waiting for Chapa.
+CHAPA_INITIALIZE_ASYNC = env.bool('CHAPA_INITIALIZE_ASYNC', default=True)
+
+# Hosts the notify_url of a payment initialization may point at, e.g.
+# hooks.example.com, or .example.com for its subdomains. Empty refuses every
+# notify_url. Only https URLs resolving to public addresses are accepted.
+PAYMENT_NOTIFY_ALLOWED_HOSTS = env.list('PAYMENT_NOTIFY_ALLOWED_HOSTS', default=[])
+
+# Serve payment verify/initialize and listing availability/quote from the
+# async views in listings/async_views.py. Only worth it under ASGI
+# (gunicorn -k uvicorn.workers.UvicornWorker alx_travel_app.asgi:application);
+# under WSGI each request would run in its own event loop.
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+
+# Request metrics (see listings/metrics.py). Share of requests whose wall,
+# SQL and Chapa time is measured and observed in the /metrics histograms;
+# every request is still counted.
+METRICS_SAMPLE_RATE = env.float('METRICS_SAMPLE_RATE', default=1.0)
+# Send the measured times back in a Server-Timing header
+METRICS_SERVER_TIMING = env.bool('METRICS_SERVER_TIMING', default=True)
+# Bearer token /metrics requires; leave empty to serve it to anyone
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+# Port Celery workers serve their task metrics on (see listings/task_metrics.py);
+# 0 doesn't serve them
+TASK_METRICS_PORT = env.int('TASK_METRICS_PORT', default=0)
@@ -0,0 +1,60 @@
+"""
+Settings used by the test suite.
+
+Runs against SQLite with eager Celery tasks and the in-memory email backend so
+the tests don't need MySQL, RabbitMQ or an SMTP server.
+
+    python manage.py test --settings=alx_travel_app.test_settings
+"""
+
+import os
+
+# Values normally provided by the .env file
+for key, value in {
+    "DJANGO_SECRET_KEY": "test-secret-key",
+    "MYSQL_DB": "alx_travel_test",
+    "MYSQL_USER": "test",
+    "MYSQL_PASSWORD": "test",
+    "MYSQL_PORT": "3306",
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+    "CHAPA_SECRET_KEY": "CHASECK_TEST-test",
+}.items():
+    os.environ.setdefault(key, value)
+
+from .settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_db.sqlite3",  # noqa: F405
+        # A file rather than the shared in-memory database: threaded tests
+        # then wait on SQLite's busy timeout instead of failing with
+        # "database table is locked"
+        "TEST": {"NAME": BASE_DIR / "test_db.test.sqlite3"},  # noqa: F405
+    },
+    # Stands in for a read replica in the routing tests, which switch it on
+    # with REPLICA_DATABASES; only they create it
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test_replica.sqlite3",  # noqa: F405
+        "TEST": {"NAME": BASE_DIR / "test_replica.test.sqlite3"},  # noqa: F405
+    },
+}
+REPLICA_DATABASES = []
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Response caching is switched on by the tests that exercise it
+LISTING_CACHE_TIMEOUT = 0
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
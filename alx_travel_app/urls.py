@@ -4,6 +4,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from alx_travel_app.listings.metrics import metrics_view
+
 # Schema view configuration for Swagger
 schema_view = get_schema_view(
     openapi.Info(
@@ -22,6 +24,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('alx_travel_app.listings.urls')),
     path('api-auth/', include('rest_framework.urls')),
+    path('metrics', metrics_view, name='metrics'),
     
     # Swagger URLs
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -0,0 +1,302 @@
+"""
+Benchmark the main API endpoints on a seeded dataset.
+
+    python -m benchmarks.api --listings 2000 --bookings 10000 --output results.json
+
+The dataset is built with the ``seed`` command, so the same options give the
+same rows. Each case runs in-process through the test client, where the SQL
+queries of a request are counted, and then over HTTP against a gunicorn
+server on the same database with ``--concurrency`` clients. Payment
+verification talks to a local Chapa stub in both.
+
+Every row reports p50/p95/p99 latency and throughput; ``--output`` also
+writes them, with the commit and options they were measured with, as JSON
+for comparing one change against another.
+"""
+import http.client
+import io
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+from .common import (
+    argument_parser, benchmark_database, count_queries, print_row, setup_django, summarize,
+)
+
+START = date(2030, 1, 1)
+TARGETS = ["inprocess", "gunicorn"]
+# Cases whose requests write to the database
+WRITES = {"booking create", "payment verify"}
+
+
+def build_dataset(args):
+    """Seed the database; return the guest the cases act as and the rows they use"""
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from alx_travel_app.listings import seeding
+    from alx_travel_app.listings.models import Booking, Listing
+    from alx_travel_app.listings.tests.fixtures import create_booking, create_payment
+
+    call_command(
+        "seed", users=args.users, listings=args.listings, bookings=args.bookings,
+        seed=args.seed, start=START, stdout=io.StringIO(),
+    )
+    options = seeding.SeedOptions(args.users, args.listings, args.bookings, seed=args.seed)
+    # User 0 is staff and sees everything; user 1 is a regular guest
+    guest = get_user_model().objects.get(username=seeding.username(options, 1))
+    listings = [str(pk) for pk in Listing.objects.order_by("pk").values_list("pk", flat=True)]
+
+    # The first night after every seeded booking; new bookings go after it
+    free = START + timedelta(days=seeding.SLOT_DAYS * -(-args.bookings // args.listings))
+    bookings = list(Booking.objects.filter(user=guest)[:20])
+    if not bookings:
+        bookings = [create_booking(guest, Listing.objects.get(pk=listings[0]),
+                                   start_date=free, end_date=free + timedelta(days=1))]
+    payments = [str(create_payment(booking).pk) for booking in bookings]
+    return guest, listings, payments, free + timedelta(days=1)
+
+
+def make_cases(listings, payments, first_night):
+    """
+    ``name: request()`` returning the ``(method, path, body)`` of the next
+    request of a case. Requests are numbered across targets so that every
+    booking is for nights still free.
+    """
+    counter = itertools.count()
+
+    def booking(i):
+        # Request i books night i // len(listings) of a listing, so none overlap
+        night = first_night + timedelta(days=i // len(listings))
+        return "POST", "/api/bookings/", {
+            "property": listings[i % len(listings)],
+            "start_date": night.isoformat(),
+            "end_date": (night + timedelta(days=1)).isoformat(),
+        }
+
+    cases = {
+        "listing list": lambda i: ("GET", "/api/listings/", None),
+        "listing detail": lambda i: ("GET", f"/api/listings/{listings[i % len(listings)]}/", None),
+        "booking create": booking,
+        "review list": lambda i: ("GET", "/api/reviews/", None),
+        "payment verify": lambda i: (
+            "GET", f"/api/payments/{payments[i % len(payments)]}/verify/", None
+        ),
+    }
+    return {
+        name: (lambda request=request: request(next(counter)))
+        for name, request in cases.items()
+    }
+
+
+def check(name, status, content):
+    if status >= 400:
+        raise RuntimeError(f"{name}: HTTP {status}: {content[:200]!r}")
+
+
+def run_inprocess(cases, guest, repeat):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_login(guest)
+    for name, request in cases.items():
+
+        def send():
+            method, path, body = request()
+            response = client.generic(
+                method, path, json.dumps(body) if body else "", content_type="application/json"
+            )
+            check(name, response.status_code, response.content)
+
+        # The warm-up request is the one whose queries are counted
+        _, queries = count_queries(send)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            send()
+            samples.append(time.perf_counter() - started)
+        yield name, samples, sum(samples), queries, 1
+
+
+def run_http(cases, port, cookie, csrf_token, repeat, concurrency, serial_writes=False):
+    local = threading.local()
+    headers = {
+        "Cookie": cookie,
+        "X-CSRFToken": csrf_token,
+        "Content-Type": "application/json",
+    }
+
+    def send(name, request):
+        method, path, body = request()
+        if not hasattr(local, "connection"):
+            # Reopened by http.client whenever gunicorn closes it
+            local.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        started = time.perf_counter()
+        local.connection.request(
+            method, path, body=json.dumps(body) if body else None, headers=headers
+        )
+        response = local.connection.getresponse()
+        content = response.read()
+        elapsed = time.perf_counter() - started
+        check(name, response.status, content)
+        return elapsed
+
+    for name, request in cases.items():
+        clients = 1 if serial_writes and name in WRITES else concurrency
+        with ThreadPoolExecutor(clients) as pool:
+            # Warm every worker process and client thread up first
+            list(pool.map(lambda _: send(name, request), range(clients * 2)))
+            started = time.perf_counter()
+            samples = list(pool.map(lambda _: send(name, request), range(repeat)))
+            yield name, samples, time.perf_counter() - started, None, clients
+
+
+@contextmanager
+def gunicorn(database, chapa_url, workers, app="alx_travel_app.wsgi:application",
+             worker_class="sync", env=None):
+    """A gunicorn server for the benchmark database; yields its port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        **(env or {}),
+        "DJANGO_SETTINGS_MODULE": "benchmarks.server_settings",
+        "BENCHMARK_SETTINGS": os.environ["DJANGO_SETTINGS_MODULE"],
+        "BENCHMARK_DATABASE": str(database),
+        "BENCHMARK_CHAPA_URL": chapa_url,
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", app, "--worker-class", worker_class,
+         "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn didn't start listening within 30s")
+                time.sleep(0.2)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def session_headers(guest):
+    """The cookie and CSRF token of a logged-in session for ``guest``"""
+    from django.conf import settings
+    from django.test import Client
+    from django.utils.crypto import get_random_string
+
+    client = Client()
+    client.force_login(guest)
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    csrf_token = get_random_string(32)
+    cookie = f"{settings.SESSION_COOKIE_NAME}={session}; {settings.CSRF_COOKIE_NAME}={csrf_token}"
+    return cookie, csrf_token
+
+
+def metadata(args, connection):
+    import django
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "cpus": os.cpu_count(),
+        "options": vars(args),
+    }
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.set_defaults(repeat=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--listings", type=int, default=500)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--target", choices=TARGETS, action="append",
+                        help="Run only against this target (repeatable); both by default")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Concurrent HTTP clients against gunicorn")
+    parser.add_argument("--gunicorn-workers", type=int, default=2)
+    parser.add_argument("--chapa-delay", type=float, default=0,
+                        help="Seconds the Chapa stub waits before answering")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+    if args.users < 2 or args.listings < 1:
+        parser.error("--users must be at least 2 and --listings at least 1")
+
+    setup_django()
+    from django.test import override_settings
+
+    from alx_travel_app.listings import chapa
+    from alx_travel_app.listings.tests.chapa_stub import ChapaStub
+
+    results = []
+    with benchmark_database() as connection, ChapaStub(delay=args.chapa_delay) as stub:
+        guest, listings, payments, first_night = build_dataset(args)
+        cases = make_cases(listings, payments, first_night)
+        runs = {}
+        if "inprocess" in (args.target or TARGETS):
+            runs["inprocess"] = lambda: run_inprocess(cases, guest, args.repeat)
+        if "gunicorn" in (args.target or TARGETS):
+            cookie, csrf_token = session_headers(guest)
+
+            def run_gunicorn():
+                with gunicorn(connection.settings_dict["NAME"], stub.url,
+                              args.gunicorn_workers) as port:
+                    yield from run_http(
+                        cases, port, cookie, csrf_token, args.repeat, args.concurrency,
+                        # SQLite can't make concurrent writers wait: the
+                        # second one fails with "database is locked"
+                        serial_writes=connection.vendor == "sqlite",
+                    )
+
+            runs["gunicorn"] = run_gunicorn
+
+        with override_settings(CHAPA_API_URL=stub.url):
+            chapa.reset_client()
+            for target, run in runs.items():
+                for name, samples, elapsed, queries, clients in run():
+                    stats = summarize(samples)
+                    throughput = len(samples) / elapsed
+                    print_row(f"{name} ({target})", stats,
+                              rps=f"{throughput:.1f}", clients=clients, queries=queries)
+                    results.append({
+                        "target": target, "case": name, "clients": clients, **stats,
+                        "throughput_rps": throughput, "queries": queries,
+                    })
+        meta = metadata(args, connection)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
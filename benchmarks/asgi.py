@@ -0,0 +1,93 @@
+"""
+Compare sync and async serving of the endpoints that wait.
+
+    python -m benchmarks.asgi --chapa-delay 0.2 --concurrency 32
+
+Starts gunicorn twice on the same seeded database: with sync workers
+serving the DRF views, then with uvicorn workers and ``ASYNC_VIEWS`` on.
+Both get ``--concurrency`` concurrent clients verifying payments, with the
+Chapa stub answering after ``--chapa-delay`` seconds, and reading listing
+availability and quotes.
+
+A sync worker serves one request at a time, so verification throughput is
+capped at workers / Chapa delay however many clients wait; an async
+worker keeps up to ``CHAPA_POOL_SIZE`` verifications waiting on Chapa at
+once. The reads don't wait on anything but the database, which Django 4.2
+queries synchronously in both modes.
+"""
+import itertools
+
+from .api import build_dataset, gunicorn, run_http, session_headers
+from .common import argument_parser, benchmark_database, print_row, setup_django, summarize
+
+MODES = {
+    "sync": {"app": "alx_travel_app.wsgi:application", "worker_class": "sync"},
+    "async": {
+        "app": "alx_travel_app.asgi:application",
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "env": {"ASYNC_VIEWS": "True"},
+    },
+}
+
+
+def make_cases(listings, payments):
+    """``name: request()`` as in ``benchmarks.api``"""
+    stay = "from=2030-03-01&to=2030-03-08"
+    cases = {
+        "payment verify": lambda i: (
+            "GET", f"/api/payments/{payments[i % len(payments)]}/verify/", None
+        ),
+        "listing availability": lambda i: (
+            "GET", f"/api/listings/{listings[i % len(listings)]}/availability/?{stay}", None
+        ),
+        "listing quote": lambda i: (
+            "GET", f"/api/listings/{listings[i % len(listings)]}/quote/?{stay}", None
+        ),
+    }
+    return {
+        name: (lambda request=request, counter=itertools.count(): request(next(counter)))
+        for name, request in cases.items()
+    }
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.set_defaults(repeat=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--listings", type=int, default=100)
+    parser.add_argument("--bookings", type=int, default=400)
+    parser.add_argument("--mode", choices=MODES, action="append",
+                        help="Run only this mode (repeatable); both by default")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent HTTP clients")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--chapa-delay", type=float, default=0.2,
+                        help="Seconds the Chapa stub waits before answering")
+    args = parser.parse_args()
+
+    setup_django()
+    from alx_travel_app.listings.tests.chapa_stub import ChapaStub
+
+    with benchmark_database() as connection, ChapaStub(delay=args.chapa_delay) as stub:
+        guest, listings, payments, _ = build_dataset(args)
+        cases = make_cases(listings, payments)
+        cookie, csrf_token = session_headers(guest)
+        for mode in args.mode or MODES:
+            options = MODES[mode]
+            env = {
+                **options.get("env", {}),
+                # Enough Chapa connections for every client to wait at once
+                "CHAPA_POOL_SIZE": str(args.concurrency),
+                # Confirmation emails are queued, not sent inside the request
+                "BENCHMARK_EAGER_TASKS": "0",
+            }
+            with gunicorn(connection.settings_dict["NAME"], stub.url, args.workers,
+                          app=options["app"], worker_class=options["worker_class"],
+                          env=env) as port:
+                runs = run_http(cases, port, cookie, csrf_token, args.repeat, args.concurrency)
+                for name, samples, elapsed, _, clients in runs:
+                    print_row(f"{name} ({mode})", summarize(samples),
+                              rps=f"{len(samples) / elapsed:.1f}", clients=clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare importing listings one POST at a time with the bulk endpoint.
+
+    python -m benchmarks.bulk_import --listings 100000 --single 500
+
+``--single`` listings are created through ``POST /api/listings/`` to get
+the per-row rate of the old path; ``--listings`` rows are then sent to
+``POST /api/listings/bulk/`` as a JSON array and as an NDJSON stream.
+"""
+from .common import argument_parser, benchmark_database, setup_django
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--listings", type=int, default=100000)
+    parser.add_argument("--single", type=int, default=500, help="Rows to POST one at a time")
+    parser.add_argument("--chunk-size", type=int, help="Override BULK_IMPORT_CHUNK_SIZE")
+    args = parser.parse_args()
+
+    setup_django()
+    import json
+    import random
+    import time
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from alx_travel_app.listings.models import Listing
+
+    rng = random.Random(args.seed)
+    rows = [
+        {"name": f"Listing {i}", "description": "A nice place",
+         "location": rng.choice(["Addis Ababa", "Adama", "Bishoftu", "Hawassa"]),
+         "price_per_night": f"{rng.randint(50, 500)}.00"}
+        for i in range(args.listings)
+    ]
+    chunk_size = args.chunk_size or settings.BULK_IMPORT_CHUNK_SIZE
+
+    with benchmark_database(), override_settings(BULK_IMPORT_CHUNK_SIZE=chunk_size):
+        host = get_user_model().objects.create_user(username="host")
+        client = APIClient()
+        client.force_authenticate(host)
+
+        started = time.perf_counter()
+        for row in rows[:args.single]:
+            assert client.post(reverse("listing-list"), row, format="json").status_code == 201
+        single = (time.perf_counter() - started) / args.single
+        _report("POST /api/listings/ per row", single * args.single, args.single,
+                projected=f"{single * args.listings:.0f}s for {args.listings}")
+
+        for name, body, content_type in [
+            ("bulk JSON array", json.dumps(rows), "application/json"),
+            ("bulk NDJSON", "\n".join(json.dumps(row) for row in rows), "application/x-ndjson"),
+        ]:
+            Listing.objects.all().delete()
+            started = time.perf_counter()
+            response = client.post(reverse("listing-bulk"), body, content_type=content_type)
+            elapsed = time.perf_counter() - started
+            assert response.data["created"] == args.listings, response.data
+            _report(f"{name} (chunks of {chunk_size})", elapsed, args.listings,
+                    speedup=f"{single * args.listings / elapsed:.0f}x")
+
+
+def _report(name, elapsed, count, **extra):
+    columns = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(f"{name:<40} {count} rows in {elapsed:7.2f}s ({count / elapsed:8.0f}/s) {columns}")
+
+
+if __name__ == "__main__":
+    main()
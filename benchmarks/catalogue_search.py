@@ -0,0 +1,113 @@
+"""
+Benchmark the listing catalogue filters on a large dataset.
+
+    python -m benchmarks.catalogue_search --listings 100000
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .common import (
+    argument_parser, benchmark_database, count_queries, measure, print_row, setup_django,
+    summarize,
+)
+
+CITIES = ["Addis Ababa", "Bahir Dar", "Bishoftu", "Gondar", "Hawassa", "Lalibela", "Mekelle"]
+WORDS = [
+    "cozy", "lake", "mountain", "villa", "loft", "garden", "pool", "view", "family",
+    "quiet", "modern", "historic", "terrace", "cabin", "studio", "spacious",
+]
+
+CASES = {
+    "no filters": {},
+    "search": {"search": "lake villa"},
+    "location prefix": {"location": "Bishoftu"},
+    "price range": {"min_price": 100, "max_price": 150},
+    "min rating": {"min_rating": 4},
+    "availability window": {"available_from": "2030-06-10", "available_to": "2030-06-14"},
+    "combined": {"location": "Addis", "max_price": 300, "available_from": "2030-06-10",
+                 "available_to": "2030-06-14"},
+}
+
+
+def seed(listings, rng, batch_size=5000):
+    from django.contrib.auth import get_user_model
+    from alx_travel_app.listings.models import Booking, Listing, Review
+    from alx_travel_app.listings.ratings import rebuild_ratings
+
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(username=f"bench{i}", email=f"bench{i}@example.com") for i in range(20)
+    ])
+    host = users[0]
+
+    created = []
+    for offset in range(0, listings, batch_size):
+        batch = [
+            Listing(
+                host=host,
+                name=" ".join(rng.sample(WORDS, 3)).title(),
+                description=" ".join(rng.choices(WORDS, k=20)),
+                location=f"{rng.choice(CITIES)}, {rng.randint(1, 99)}",
+                price_per_night=Decimal(rng.randint(30, 500)),
+            )
+            for _ in range(min(batch_size, listings - offset))
+        ]
+        created.extend(Listing.objects.bulk_create(batch))
+
+    # Reviews on a tenth of the listings, bookings on a fifth
+    reviewed = rng.sample(created, len(created) // 10)
+    Review.objects.bulk_create(
+        [
+            Review(property=listing, user=user, rating=rng.randint(1, 5), comment="ok")
+            for listing in reviewed
+            for user in rng.sample(users[1:], 3)
+        ],
+        batch_size=batch_size,
+    )
+    # bulk_create skips the signals that maintain the rating aggregates
+    rebuild_ratings(Listing.objects.filter(pk__in=[listing.pk for listing in reviewed]))
+    booked = rng.sample(created, len(created) // 5)
+    start = date(2030, 6, 1)
+    Booking.objects.bulk_create(
+        [
+            Booking(
+                property=listing,
+                user=users[1],
+                start_date=start + timedelta(days=rng.randint(0, 20)),
+                end_date=start + timedelta(days=rng.randint(21, 30)),
+                total_price=listing.price_per_night,
+                status=Booking.BookingStatus.CONFIRMED,
+            )
+            for listing in booked
+        ],
+        batch_size=batch_size,
+    )
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--listings", type=int, default=100_000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    with benchmark_database():
+        seed(args.listings, random.Random(args.seed))
+        print(f"Seeded {args.listings} listings on {connection.vendor}")
+
+        client = APIClient()
+        url = reverse("listing-list")
+        for name, params in CASES.items():
+            response, queries = count_queries(lambda: client.get(url, params))
+            assert response.status_code == 200, response.content
+            samples = measure(lambda: client.get(url, params), args.repeat)
+            print_row(name, summarize(samples), queries=queries,
+                      rows=len(response.data["results"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created from the settings
+module in DJANGO_SETTINGS_MODULE, ``alx_travel_app.test_settings`` (SQLite) by
+default. Point it at ``alx_travel_app.settings`` to benchmark against MySQL.
+"""
+import argparse
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_travel_app.test_settings")
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Create a fresh test database for the duration of the block"""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def argument_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the dataset")
+    return parser
+
+
+def measure(fn, repeat):
+    """Call ``fn`` ``repeat`` times after one warm-up call; return seconds per call"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def count_queries(fn):
+    """Run ``fn`` once and return ``(result, number of SQL queries)``"""
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    # queries_log is a bounded deque; clear it so the count isn't capped
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        result = fn()
+    return result, len(queries)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "runs": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def print_row(name, stats, **extra):
+    columns = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(
+        f"{name:<40} p50={stats['p50_ms']:8.2f}ms p95={stats['p95_ms']:8.2f}ms "
+        f"p99={stats['p99_ms']:8.2f}ms mean={stats['mean_ms']:8.2f}ms {columns}"
+    )
@@ -0,0 +1,88 @@
+"""
+Measure what reusing database connections saves on the listing endpoints.
+
+    python -m benchmarks.db_connections --repeat 500
+
+Starts gunicorn on the same seeded database with ``CONN_MAX_AGE`` 0 (a new
+connection per request), with it raised, and raised with health checks,
+and times listing list and detail requests against each. The connections
+the workers opened and the requests that reused one are read back from
+``/metrics``.
+
+SQLite opens a file, so connecting costs far less than over the network
+with the ``init_command`` MySQL runs; run it with
+``DJANGO_SETTINGS_MODULE=alx_travel_app.settings`` to see the MySQL numbers.
+"""
+import tempfile
+import urllib.request
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from .api import build_dataset, gunicorn, make_cases, run_http, session_headers
+from .common import argument_parser, benchmark_database, print_row, setup_django, summarize
+
+CASES = ["listing list", "listing detail"]
+# (name, CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+CONFIGURATIONS = [
+    ("max age 0", 0, False),
+    ("max age 60", 60, False),
+    ("max age 60, health checks", 60, True),
+]
+
+
+def connection_stats(port):
+    """Connections opened, and requests on a new or reused one, across the workers"""
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        text = response.read().decode()
+    stats = {"opened": 0, "new": 0, "reused": 0}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            if sample.name == "db_connections_opened_total":
+                stats["opened"] += int(sample.value)
+            elif sample.name == "db_connection_uses_total" and sample.labels["unit"] == "request":
+                stats[sample.labels["connection"]] += int(sample.value)
+    return stats
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.set_defaults(repeat=500)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--listings", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent HTTP clients")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    args = parser.parse_args()
+
+    setup_django()
+
+    with benchmark_database() as connection:
+        guest, listings, payments, first_night = build_dataset(args)
+        cases = {
+            name: request
+            for name, request in make_cases(listings, payments, first_night).items()
+            if name in CASES
+        }
+        cookie, csrf_token = session_headers(guest)
+        for configuration, max_age, health_checks in CONFIGURATIONS:
+            # Every worker's metrics in /metrics, not just the one answering
+            with tempfile.TemporaryDirectory() as metrics_dir:
+                env = {
+                    "BENCHMARK_CONN_MAX_AGE": str(max_age),
+                    "BENCHMARK_CONN_HEALTH_CHECKS": "1" if health_checks else "0",
+                    "PROMETHEUS_MULTIPROC_DIR": metrics_dir,
+                }
+                with gunicorn(connection.settings_dict["NAME"], "http://127.0.0.1:9", args.workers,
+                              env=env) as port:
+                    runs = run_http(cases, port, cookie, csrf_token, args.repeat,
+                                    args.concurrency)
+                    for name, samples, elapsed, _, clients in runs:
+                        print_row(f"{name} ({configuration})", summarize(samples),
+                                  rps=f"{len(samples) / elapsed:.1f}", clients=clients)
+                    stats = connection_stats(port)
+                print(f"  {configuration}: {stats['opened']} connections opened; "
+                      f"{stats['reused']} requests reused one, {stats['new']} opened one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare sending emails one ``send_mail`` call at a time with draining the
+outbox in batches, against an in-process SMTP server.
+
+    python -m benchmarks.email_outbox --emails 500 --handshake-delay 0.02
+
+``--handshake-delay`` is added to every new SMTP connection to stand in for
+network latency and TLS setup. Use ``--smtp-host``/``--smtp-port`` to send to
+the mailpit container instead.
+"""
+from .common import argument_parser, benchmark_database, setup_django
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--handshake-delay", type=float, default=0.02)
+    parser.add_argument("--smtp-host", help="Send to this server instead of the stub")
+    parser.add_argument("--smtp-port", type=int, default=1025)
+    args = parser.parse_args()
+
+    setup_django()
+    import time
+    from contextlib import nullcontext
+
+    from django.conf import settings
+    from django.core.mail import send_mail
+    from django.test import override_settings
+
+    from alx_travel_app.listings import outbox
+    from alx_travel_app.listings.tests.smtp_stub import SMTPStub
+
+    if args.smtp_host:
+        stub = nullcontext()
+        smtp_settings = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=args.smtp_host, EMAIL_PORT=args.smtp_port, EMAIL_USE_TLS=False,
+        )
+    else:
+        stub = SMTPStub(handshake_delay=args.handshake_delay)
+        smtp_settings = stub.settings()
+
+    with benchmark_database(), stub, smtp_settings:
+        recipients = [f"guest{i}@example.com" for i in range(args.emails)]
+
+        started = time.perf_counter()
+        for address in recipients:
+            send_mail("Booking Confirmation", "Thank you for your booking!",
+                      settings.DEFAULT_FROM_EMAIL, [address])
+        per_message = time.perf_counter() - started
+        connections = stub.connections if args.smtp_host is None else "-"
+        _report("send_mail per message", per_message, args.emails, connections=connections)
+
+        for address in recipients:
+            outbox.queue_email("Booking Confirmation", "Thank you for your booking!", [address])
+        baseline = stub.connections if args.smtp_host is None else 0
+        started = time.perf_counter()
+        result = outbox.drain(batch_size=args.batch_size)
+        drained = time.perf_counter() - started
+        connections = stub.connections - baseline if args.smtp_host is None else "-"
+        _report(f"outbox drain (batch {args.batch_size})", drained, result.sent,
+                connections=connections, batches=result.batches,
+                speedup=f"{per_message / drained:.1f}x")
+
+
+def _report(name, elapsed, count, **extra):
+    columns = " ".join(f"{key}={value}" for key, value in extra.items())
+    print(f"{name:<40} {count} emails in {elapsed:6.2f}s "
+          f"({count / elapsed:6.0f}/s, {elapsed / count * 1000:6.2f}ms each) {columns}")
+
+
+if __name__ == "__main__":
+    main()
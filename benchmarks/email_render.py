@@ -0,0 +1,100 @@
+"""
+Measure email render throughput per worker process.
+
+    python -m benchmarks.email_render --messages 5000 --workers 4
+
+Each of ``--workers`` processes renders ``--messages`` payment confirmation
+emails (subject, text and HTML) three ways: compiling the templates for
+every message, as with a non-caching loader; ``emails.render`` per message
+through the cached loader; and ``emails.render_many`` for the whole run.
+"""
+from .common import argument_parser, setup_django
+
+UNCACHED_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--messages", type=int, default=5000, help="Messages per worker")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    import multiprocessing
+
+    # Forked workers inherit the configured Django process
+    pool = multiprocessing.get_context("fork").Pool(args.workers)
+    with pool:
+        baseline = None
+        for case in ("compile per message", "render (cached loader)", "render_many"):
+            elapsed = pool.map(_run, [(case, args.messages, args.seed + i)
+                                      for i in range(args.workers)])
+            per_worker = [args.messages / seconds for seconds in elapsed]
+            mean = sum(per_worker) / len(per_worker)
+            baseline = baseline or mean
+            print(f"{case:<40} {mean:8.0f} msgs/s per worker "
+                  f"(min {min(per_worker):.0f}, max {max(per_worker):.0f}), "
+                  f"{args.messages * args.workers / max(elapsed):8.0f} msgs/s total, "
+                  f"speedup={mean / baseline:.1f}x")
+
+
+def _contexts(count, seed):
+    import random
+    from datetime import date, timedelta
+    from decimal import Decimal
+
+    from django.contrib.auth import get_user_model
+
+    from alx_travel_app.listings.models import Booking, Listing, Payment
+
+    rng = random.Random(seed)
+    user = get_user_model()(username="guest", first_name="Abebe", last_name="Kebede")
+    contexts = []
+    for i in range(count):
+        start = date(2030, 1, 1) + timedelta(days=rng.randrange(365))
+        listing = Listing(name=f"Listing {i} & <friends>", price_per_night=100)
+        booking = Booking(property=listing, user=user, start_date=start,
+                          end_date=start + timedelta(days=rng.randint(1, 14)))
+        payment = Payment(booking=booking, currency="ETB",
+                          amount=Decimal(rng.randint(100, 5000)))
+        contexts.append({"payment": payment, "booking": booking,
+                         "guest_name": user.get_full_name()})
+    return contexts
+
+
+def _run(job):
+    import time
+
+    from django.conf import settings
+    from django.test import override_settings
+
+    from alx_travel_app.listings import emails
+
+    case, count, seed = job
+    contexts = _contexts(count, seed)
+    if case == "compile per message":
+        templates = [{**settings.TEMPLATES[0], "OPTIONS": {
+            **settings.TEMPLATES[0]["OPTIONS"], "loaders": UNCACHED_LOADERS,
+        }}]
+        with override_settings(TEMPLATES=templates):
+            started = time.perf_counter()
+            for context in contexts:
+                emails.render("payment_confirmation", context)
+            return time.perf_counter() - started
+
+    # Warm the cache as a long-running worker would have
+    emails.render("payment_confirmation", contexts[0])
+    started = time.perf_counter()
+    if case == "render_many":
+        emails.render_many("payment_confirmation", contexts)
+    else:
+        for context in contexts:
+            emails.render("payment_confirmation", context)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
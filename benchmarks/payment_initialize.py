@@ -0,0 +1,62 @@
+"""
+Compare request latency of synchronous and queued payment initialization
+against a slow local Chapa stub.
+
+    python -m benchmarks.payment_initialize --chapa-delay 0.3
+
+In async mode the task is published to the in-memory broker of the test
+settings and never run, so the numbers are the request path alone.
+"""
+from .common import (
+    argument_parser, benchmark_database, count_queries, print_row, setup_django, summarize,
+)
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--chapa-delay", type=float, default=0.3,
+                        help="Seconds the stub waits before answering")
+    args = parser.parse_args()
+
+    setup_django()
+    import time
+
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from alx_travel_app.celery import app
+    from alx_travel_app.listings import chapa
+    from alx_travel_app.listings.tests.chapa_stub import ChapaStub
+    from alx_travel_app.listings.tests.fixtures import create_booking, create_listing, create_payment
+
+    User = get_user_model()
+
+    with benchmark_database(), ChapaStub(delay=args.chapa_delay) as stub:
+        guest = User.objects.create_user(username="guest", email="guest@example.com")
+        listing = create_listing()
+        client = APIClient()
+        client.force_authenticate(guest)
+        # Publish to the in-memory broker instead of running tasks inline
+        app.conf.CELERY_TASK_ALWAYS_EAGER = False
+
+        for mode, is_async in [("sync", False), ("async", True)]:
+            payments = [create_payment(create_booking(guest, listing)) for _ in range(args.repeat + 1)]
+            with override_settings(CHAPA_API_URL=stub.url, CHAPA_INITIALIZE_ASYNC=is_async):
+                chapa.reset_client()
+                samples = []
+                for index, payment in enumerate(payments):
+                    url = reverse("payment-initialize", args=[payment.pk])
+                    if index == 0:
+                        response, queries = count_queries(lambda: client.post(url))
+                        continue
+                    started = time.perf_counter()
+                    response = client.post(url)
+                    samples.append(time.perf_counter() - started)
+                print_row(f"initialize ({mode})", summarize(samples),
+                          status=response.status_code, queries=queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measure the overhead of the request metrics middleware.
+
+    python -m benchmarks.request_metrics --repeat 500
+
+Times the same requests without the middleware and at several sample
+rates, on a small seeded dataset.
+"""
+import io
+
+from .common import argument_parser, benchmark_database, measure, print_row, setup_django, summarize
+
+MIDDLEWARE = "alx_travel_app.listings.metrics.RequestMetricsMiddleware"
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.set_defaults(repeat=500)
+    parser.add_argument("--rates", type=float, nargs="+", default=[0, 0.1, 1],
+                        help="Sample rates to compare")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from django.test import modify_settings, override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    from alx_travel_app.listings.models import Listing
+
+    with benchmark_database():
+        call_command("seed", users=10, listings=50, bookings=200, seed=args.seed,
+                     stdout=io.StringIO())
+        client = APIClient()
+        cases = {
+            "listing list": reverse("listing-list"),
+            "listing detail": reverse("listing-detail", args=[Listing.objects.first().pk]),
+        }
+        configurations = [("no middleware", modify_settings(MIDDLEWARE={"remove": MIDDLEWARE}))]
+        configurations += [
+            (f"sample rate {rate:g}", override_settings(METRICS_SAMPLE_RATE=rate))
+            for rate in args.rates
+        ]
+        for name, url in cases.items():
+            for configuration, overrides in configurations:
+                with overrides:
+                    samples = measure(lambda: client.get(url), args.repeat)
+                print_row(f"{name} ({configuration})", summarize(samples))
+
+
+if __name__ == "__main__":
+    main()
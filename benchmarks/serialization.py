@@ -0,0 +1,152 @@
+"""
+Compare full, lean and sparse list pages of listings and payments.
+
+    python -m benchmarks.serialization --rows 1000 --reviews 5
+
+Seeds ``--rows`` listings with ``--reviews`` reviews each, and as many
+payments carrying a Chapa response, then fetches one page of ``--rows``
+rows per case: expanded to the full representation lists used to return,
+the lean default, and a ``?fields=`` selection. Each case prints the
+request latency, the time spent serializing and rendering the page alone
+(``serialize_ms``), the response size and the SQL query count.
+"""
+import os
+import random
+import statistics
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .common import (
+    argument_parser, benchmark_database, count_queries, measure, print_row, setup_django,
+    summarize,
+)
+
+CASES = {
+    "listing-list": {
+        "expanded": {"expand": "reviews"},
+        "lean": {},
+        "fields": {"fields": "property_id,name,location,price_per_night,avg_rating"},
+    },
+    "payment-list": {
+        "expanded": {"expand": "response_dump"},
+        "lean": {},
+        "fields": {"fields": "id,booking,amount,currency,status,created_at"},
+    },
+}
+
+
+def chapa_response(rng, payment_id):
+    """A verify response shaped like Chapa's"""
+    return {
+        "message": "Payment details",
+        "status": "success",
+        "data": {
+            "first_name": "Guest", "last_name": "User", "email": "guest@example.com",
+            "currency": "ETB", "amount": rng.randint(100, 5000), "charge": 3.5,
+            "mode": "test", "method": "telebirr", "type": "API", "status": "success",
+            "reference": f"AP{rng.getrandbits(64):x}", "tx_ref": str(payment_id),
+            "customization": {"title": "Booking", "description": "Booking payment",
+                              "logo": None},
+            "meta": None, "created_at": "2030-01-01T00:00:00.000000Z",
+            "updated_at": "2030-01-01T00:00:00.000000Z",
+        },
+    }
+
+
+def seed(rows, reviews, rng):
+    from django.contrib.auth import get_user_model
+
+    from alx_travel_app.listings.models import Booking, Listing, Payment, Review
+    from alx_travel_app.listings.ratings import rebuild_ratings
+
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(username=f"bench{i}", email=f"bench{i}@example.com") for i in range(reviews + 1)
+    ])
+    staff = users[0]
+    staff.is_staff = True
+    staff.save(update_fields=["is_staff"])
+
+    listings = Listing.objects.bulk_create([
+        Listing(
+            host=staff, name=f"Listing {i}", description="A quiet place by the lake. " * 20,
+            location="Bishoftu", price_per_night=Decimal(rng.randint(30, 500)),
+        )
+        for i in range(rows)
+    ])
+    Review.objects.bulk_create([
+        Review(property=listing, user=user, rating=rng.randint(1, 5),
+               comment="Clean, quiet and close to the lake. " * 8)
+        for listing in listings
+        for user in users[1:]
+    ], batch_size=5000)
+    rebuild_ratings()
+
+    start = date(2030, 1, 1)
+    bookings = Booking.objects.bulk_create([
+        Booking(property=listing, user=users[1], start_date=start + timedelta(days=2 * i),
+                end_date=start + timedelta(days=2 * i + 1), total_price=listing.price_per_night)
+        for i, listing in enumerate(listings)
+    ])
+    payments = [
+        Payment(booking=booking, amount=booking.total_price, email="guest@example.com",
+                phone_number="0911000000", first_name="Guest", last_name="User",
+                description="Booking payment", status=Payment.PaymentStatus.COMPLETED)
+        for booking in bookings
+    ]
+    for payment in payments:
+        payment.response_dump = chapa_response(rng, payment.id)
+    Payment.objects.bulk_create(payments)
+    return staff
+
+
+def render_page(response):
+    """Serialize and render the rows of ``response``'s page again, from memory"""
+    from rest_framework.renderers import JSONRenderer
+
+    view = response.renderer_context["view"]
+    if not hasattr(response, "page_rows"):
+        queryset = view.filter_queryset(view.get_queryset())
+        response.page_rows = list(queryset[:len(response.data["results"])])
+    return JSONRenderer().render(view.get_serializer(response.page_rows, many=True).data)
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per page")
+    parser.add_argument("--reviews", type=int, default=5, help="Reviews per listing")
+    args = parser.parse_args()
+
+    # Read when the settings load; let a single page hold every row
+    os.environ.setdefault("API_MAX_PAGE_SIZE", str(args.rows))
+    setup_django()
+    from django.db import connection
+    from django.test import override_settings
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    with benchmark_database(), override_settings(LISTING_CACHE_TIMEOUT=0):
+        staff = seed(args.rows, args.reviews, random.Random(args.seed))
+        print(f"Seeded {args.rows} listings and payments on {connection.vendor}")
+
+        client = APIClient()
+        client.force_authenticate(staff)
+        for route, cases in CASES.items():
+            url = reverse(route)
+            baseline = None
+            for name, params in cases.items():
+                params = {**params, "page_size": args.rows}
+                response, queries = count_queries(lambda: client.get(url, params))
+                assert response.status_code == 200, response.content
+                assert len(response.data["results"]) == args.rows
+                size = len(response.content)
+                baseline = baseline or size
+                samples = measure(lambda: client.get(url, params), args.repeat)
+                serialize = measure(lambda: render_page(response), args.repeat)
+                print_row(f"{route} {name}", summarize(samples), queries=queries,
+                          serialize_ms=f"{statistics.median(serialize) * 1000:.1f}",
+                          kb=f"{size / 1024:.0f}", smaller=f"{1 - size / baseline:.0%}")
+
+
+if __name__ == "__main__":
+    main()
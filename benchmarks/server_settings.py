@@ -0,0 +1,30 @@
+"""
+Settings for the gunicorn servers started by ``benchmarks.api`` and
+``benchmarks.asgi``.
+
+The benchmark's own settings module, pointed at its test database and
+Chapa stub, all of which the parent process passes in the environment.
+"""
+import os
+from importlib import import_module
+
+globals().update(
+    (name, value)
+    for name, value in vars(import_module(os.environ["BENCHMARK_SETTINGS"])).items()
+    if name.isupper()
+)
+
+DATABASES["default"]["NAME"] = os.environ["BENCHMARK_DATABASE"]  # noqa: F821
+CHAPA_API_URL = os.environ["BENCHMARK_CHAPA_URL"]
+if "BENCHMARK_CONN_MAX_AGE" in os.environ:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ["BENCHMARK_CONN_MAX_AGE"])  # noqa: F821
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = (  # noqa: F821
+        os.environ.get("BENCHMARK_CONN_HEALTH_CHECKS") == "1"
+    )
+# Off: tasks go to the broker, as from a real web process, instead of
+# running inside the request
+if os.environ.get("BENCHMARK_EAGER_TASKS") == "0":
+    CELERY_TASK_ALWAYS_EAGER = False
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
@@ -0,0 +1,95 @@
+"""
+Replay thousands of duplicate Chapa webhook deliveries and check that each
+payment is confirmed, and its guest emailed, exactly once.
+
+    python -m benchmarks.webhook_replay --payments 200 --events 5000
+
+Deliveries are spread over ``--threads`` clients. The acknowledgement is
+timed with Celery tasks only published to the in-memory broker; the stored
+events are then processed twice each, as a broker redelivering every task
+would, against a local Chapa stub.
+"""
+from .common import argument_parser, benchmark_database, print_row, setup_django, summarize
+
+
+def main():
+    parser = argument_parser(__doc__)
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--events", type=int, default=5000, help="Deliveries to send in total")
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    import json
+    import random
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.contrib.auth import get_user_model
+    from django.core import mail
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from alx_travel_app.celery import app
+    from alx_travel_app.listings import chapa
+    from alx_travel_app.listings.models import ChapaWebhookEvent, Payment
+    from alx_travel_app.listings.tasks import process_chapa_event
+    from alx_travel_app.listings.tests.chapa_stub import ChapaStub
+    from alx_travel_app.listings.tests.fixtures import create_booking, create_listing, create_payment
+
+    User = get_user_model()
+    rng = random.Random(args.seed)
+    url = reverse("chapa-webhook")
+
+    with benchmark_database(), ChapaStub() as stub, override_settings(CHAPA_API_URL=stub.url):
+        chapa.reset_client()
+        guest = User.objects.create_user(username="guest", email="guest@example.com")
+        listing = create_listing()
+        payments = [create_payment(create_booking(guest, listing)) for _ in range(args.payments)]
+        bodies = [
+            json.dumps({"event": "charge.success", "tx_ref": str(rng.choice(payments).pk),
+                        "status": "success"})
+            for _ in range(args.events)
+        ]
+
+        app.conf.CELERY_TASK_ALWAYS_EAGER = False
+
+        def deliver(batch):
+            client = Client()
+            samples = []
+            try:
+                for body in batch:
+                    started = time.perf_counter()
+                    response = client.post(url, body, content_type="application/json")
+                    samples.append(time.perf_counter() - started)
+                    assert response.status_code == 200, response.content
+            finally:
+                connection.close()
+            return samples
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            batches = pool.map(deliver, [bodies[i::args.threads] for i in range(args.threads)])
+            samples = [sample for batch in batches for sample in batch]
+        elapsed = time.perf_counter() - started
+        stored = ChapaWebhookEvent.objects.count()
+        print_row("webhook ack", summarize(samples),
+                  throughput=f"{len(samples) / elapsed:.0f}/s", stored=stored)
+
+        app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        started = time.perf_counter()
+        for event_id in ChapaWebhookEvent.objects.values_list("pk", flat=True):
+            process_chapa_event(event_id)
+            process_chapa_event(event_id)
+        elapsed = time.perf_counter() - started
+
+        completed = Payment.objects.filter(status=Payment.PaymentStatus.COMPLETED).count()
+        print(f"processed {stored} events twice in {elapsed:.2f}s: "
+              f"{len(stub.requests)} verify calls, {completed} payments completed, "
+              f"{len(mail.outbox)} emails")
+        assert completed == len(mail.outbox) == len(stub.requests) == stored
+
+
+if __name__ == "__main__":
+    main()